@@ -0,0 +1,118 @@
+# benchmarks/datasets.py
+# Deterministic synthetic datasets for benchmarking the inference engine
+
+import numpy as np
+import pandas as pd
+
+# Column kinds the generator can produce, with the default share of columns
+DEFAULT_TYPE_MIX = {
+    'int': 0.25,
+    'float': 0.2,
+    'bool': 0.1,
+    'date': 0.15,
+    'category': 0.15,
+    'text': 0.15,
+}
+
+# strftime formats date columns are written in, cycled across date columns
+DEFAULT_DATE_FORMATS = ['%Y-%m-%d', '%m/%d/%Y', '%d %b %Y']
+
+# Values that do not parse as the column's type, mixed in at the dirty rate
+DIRTY_VALUES = ['n/a', '?', 'unknown', '#REF!', '-']
+
+BOOLEAN_PAIRS = [('Yes', 'No'), ('true', 'false'), ('Y', 'N'), ('1', '0')]
+CATEGORIES = ['north', 'south', 'east', 'west', 'central', 'online', 'partner', 'other']
+
+
+def column_kinds(columns: int, type_mix: dict[str, float]) -> list[str]:
+    """
+    Assign a kind to every column according to the type mix.
+
+    Args:
+        columns: Number of columns
+        type_mix: Dictionary mapping column kinds to their share of columns
+
+    Returns:
+        List of column kinds, interleaved so that any prefix follows the mix
+    """
+    total = sum(type_mix.values())
+    kinds = []
+    counts = dict.fromkeys(type_mix, 0)
+    for position in range(1, columns + 1):
+        # Pick the kind furthest behind its target share
+        kind = max(type_mix, key=lambda k: type_mix[k] / total * position - counts[k])
+        counts[kind] += 1
+        kinds.append(kind)
+    return kinds
+
+
+def generate_column(kind: str, rows: int, rng: np.random.Generator, date_format: str) -> pd.Series:
+    """
+    Generate the clean text values of one column.
+
+    Args:
+        kind: Column kind, one of the keys of DEFAULT_TYPE_MIX
+        rows: Number of values
+        rng: Random generator
+        date_format: strftime format used by date columns
+
+    Returns:
+        Series of strings
+    """
+    if kind == 'int':
+        return pd.Series(rng.integers(-10_000, 1_000_000, rows)).astype(str)
+    if kind == 'float':
+        return pd.Series(np.round(rng.normal(1000, 250, rows), 2)).astype(str)
+    if kind == 'bool':
+        true, false = BOOLEAN_PAIRS[rng.integers(len(BOOLEAN_PAIRS))]
+        return pd.Series(np.where(rng.random(rows) < 0.5, true, false))
+    if kind == 'date':
+        days = rng.integers(0, 365 * 30, rows)
+        return pd.Series(pd.Timestamp('1995-01-01') + pd.to_timedelta(days, unit='D')).dt.strftime(date_format)
+    if kind == 'category':
+        return pd.Series(np.array(CATEGORIES)[rng.integers(len(CATEGORIES), size=rows)])
+    if kind == 'text':
+        return pd.Series(rng.integers(0, 2**40, rows)).map(lambda value: f"item-{value:x}")
+    raise ValueError(f"Unknown column kind: {kind}")
+
+
+def generate_dataset(rows: int = 100_000, columns: int = 12, type_mix: dict[str, float] | None = None,
+                     null_rate: float = 0.05, dirty_rate: float = 0.01,
+                     date_formats: list[str] | None = None, seed: int = 0) -> pd.DataFrame:
+    """
+    Generate a DataFrame of text values, as read from a CSV file.
+
+    The same arguments always produce the same data, so benchmark runs are
+    comparable.
+
+    Args:
+        rows: Number of rows
+        columns: Number of columns
+        type_mix: Dictionary mapping column kinds to their share of columns
+        null_rate: Share of values replaced by nulls
+        dirty_rate: Share of values replaced by values that do not parse
+        date_formats: strftime formats cycled across date columns
+        seed: Random seed
+
+    Returns:
+        DataFrame with one column per generated column, named after its kind
+    """
+    rng = np.random.default_rng(seed)
+    date_formats = date_formats or DEFAULT_DATE_FORMATS
+
+    data = {}
+    date_columns = 0
+    for position, kind in enumerate(column_kinds(columns, type_mix or DEFAULT_TYPE_MIX)):
+        date_format = date_formats[date_columns % len(date_formats)]
+        date_columns += kind == 'date'
+        values = generate_column(kind, rows, rng, date_format).astype(object)
+
+        if kind != 'text' and dirty_rate:
+            dirty = rng.random(rows) < dirty_rate
+            values[dirty] = np.array(DIRTY_VALUES, dtype=object)[rng.integers(len(DIRTY_VALUES), size=dirty.sum())]
+        if null_rate:
+            values[rng.random(rows) < null_rate] = None
+
+        data[f"{kind}_{position}"] = values
+
+    return pd.DataFrame(data)
@@ -0,0 +1,171 @@
+# benchmarks/load_test.py
+# Measure the throughput of concurrent uploads against running servers
+#
+# The sync endpoint holds a worker for the whole upload; the async endpoint
+# buffers uploads on the event loop and runs inference on a bounded executor.
+# Start the servers to compare, for example:
+#   gunicorn django_backend.wsgi --workers 1 --threads 4 --bind :8000
+#   uvicorn django_backend.asgi:application --workers 1 --port 8001
+#
+# Usage:
+#   python benchmarks/load_test.py --requests 200 --concurrency 32
+#   python benchmarks/load_test.py --target wsgi=http://localhost:8000/api/data_inference/upload_file/ \
+#       --target asgi=http://localhost:8001/api/async/data_inference/upload_file/ --output load.json
+
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory to the path to import the module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.datasets import generate_dataset
+
+# Endpoints compared when no targets are given
+DEFAULT_TARGETS = {
+    'wsgi': 'http://localhost:8000/api/data_inference/upload_file/',
+    'asgi': 'http://localhost:8001/api/async/data_inference/upload_file/',
+}
+
+
+def multipart_body(file_name: str, content: bytes, fields: dict[str, str]) -> tuple[bytes, str]:
+    """
+    Encode a file and form fields as a multipart/form-data body.
+
+    Returns:
+        Tuple of the body and its content type
+    """
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{file_name}"\r\n'
+        f'Content-Type: text/csv\r\n\r\n'.encode() + content + b'\r\n'
+    )
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def make_payloads(tag: str, count: int, rows: int, columns: int, fields: dict[str, str]) -> list[tuple[bytes, str]]:
+    """
+    Build the upload bodies of a run.
+
+    Every upload has its own file name and a distinct trailing row, so none
+    is served from the server's result cache or overwrites another upload.
+    """
+    content = generate_dataset(rows, columns).to_csv(index=False).encode()
+    return [
+        multipart_body(f'load_{tag}_{i}.csv', content + ','.join([f'{tag}{i}'] * columns).encode() + b'\n', fields)
+        for i in range(count)
+    ]
+
+
+def post(url: str, body: bytes, content_type: str, timeout: float) -> tuple[int, float]:
+    """
+    Send one upload.
+
+    Returns:
+        Tuple of the response status (0 when no response arrived) and the latency in seconds
+    """
+    request = urllib.request.Request(url, data=body, method='POST', headers={'Content-Type': content_type})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, TimeoutError, ConnectionError):
+        status = 0
+    return status, time.perf_counter() - start
+
+
+def percentile(values: list[float], share: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(share * len(ordered)) - 1))]
+
+
+def run_load(url: str, payloads: list[tuple[bytes, str]], concurrency: int, timeout: float) -> dict:
+    """
+    Send the uploads to an endpoint from concurrent clients.
+
+    Args:
+        url: Upload endpoint
+        payloads: Bodies and content types, as returned by make_payloads
+        concurrency: Number of uploads in flight at once
+        timeout: Seconds a client waits for each response
+
+    Returns:
+        Dictionary with the request and error counts, the throughput in
+        requests per second and the latency percentiles of successful requests
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(lambda payload: post(url, *payload, timeout), payloads))
+    elapsed = time.perf_counter() - start
+
+    latencies = [seconds for status, seconds in outcomes if status == 200]
+    results = {
+        'requests': len(outcomes),
+        'errors': len(outcomes) - len(latencies),
+        'seconds': elapsed,
+        'requests_per_second': len(latencies) / elapsed,
+    }
+    if latencies:
+        results.update({
+            'latency_p50': percentile(latencies, 0.50),
+            'latency_p95': percentile(latencies, 0.95),
+            'latency_p99': percentile(latencies, 0.99),
+            'latency_max': max(latencies),
+        })
+    return results
+
+
+def parse_target(value: str) -> tuple[str, str]:
+    name, separator, url = value.partition('=')
+    if not separator:
+        raise argparse.ArgumentTypeError(f"Targets are given as NAME=URL, got: {value}")
+    return name, url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the upload throughput of running servers")
+    parser.add_argument('--target', type=parse_target, action='append',
+                        help="Upload endpoint as NAME=URL, may be repeated (default: local WSGI and ASGI servers)")
+    parser.add_argument('--requests', type=int, default=100, help="Uploads sent to each target")
+    parser.add_argument('--concurrency', type=int, default=16, help="Uploads in flight at once")
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--columns', type=int, default=12)
+    parser.add_argument('--apply-types', action='store_true', help="Convert the uploads to their inferred types")
+    parser.add_argument('--timeout', type=float, default=300)
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    targets = dict(args.target) if args.target else DEFAULT_TARGETS
+    fields = {'apply_inferred_types': 'true' if args.apply_types else 'false'}
+
+    results = {}
+    for name, url in targets.items():
+        # Payloads are tagged per target, so one target's uploads are not cached for the next
+        payloads = make_payloads(name, args.requests, args.rows, args.columns, fields)
+        results[name] = run_load(url, payloads, args.concurrency, args.timeout)
+        target = results[name]
+        print(f"{name}: {target['requests_per_second']:.2f} req/s, {target['errors']} errors, "
+              f"p50 {target.get('latency_p50', float('nan')):.3f}s, "
+              f"p99 {target.get('latency_p99', float('nan')):.3f}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# benchmarks/run_benchmarks.py
+# Time the stages of the inference engine on synthetic datasets
+#
+# Usage:
+#   python benchmarks/run_benchmarks.py --rows 100000 --columns 12 --output results.json
+#   python benchmarks/run_benchmarks.py --baseline results.json
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the path to import the module
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_inference.infer_data_type import ENGINE_VERSION, InferenceEngine
+from benchmarks.datasets import DEFAULT_DATE_FORMATS, DEFAULT_TYPE_MIX, generate_dataset
+
+# Slowdown against the baseline from which a stage counts as a regression
+DEFAULT_REGRESSION_THRESHOLD = 1.2
+
+
+def measure(func, repeat: int) -> dict:
+    """
+    Time a benchmark stage and record its peak memory.
+
+    The best of several timed runs is reported; peak memory is measured in a
+    separate run since tracing allocations slows the stage down.
+
+    Args:
+        func: Callable running the stage
+        repeat: Number of timed runs
+
+    Returns:
+        Dictionary with the best time in seconds and the peak traced memory
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'seconds': min(timings), 'peak_memory_bytes': peak}
+
+
+def run_benchmarks(rows: int, columns: int, type_mix: dict[str, float], null_rate: float,
+                   dirty_rate: float, date_formats: list[str], seed: int, repeat: int) -> dict:
+    """
+    Benchmark every stage of the engine on one synthetic dataset.
+
+    Args:
+        rows: Number of rows
+        columns: Number of columns
+        type_mix: Dictionary mapping column kinds to their share of columns
+        null_rate: Share of null values
+        dirty_rate: Share of values that do not parse as their column's type
+        date_formats: strftime formats of the date columns
+        seed: Random seed of the generator
+        repeat: Number of timed runs per stage
+
+    Returns:
+        Dictionary with the run configuration, environment and per-stage results
+    """
+    df = generate_dataset(rows, columns, type_mix, null_rate, dirty_rate, date_formats, seed)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, 'benchmark.csv')
+        df.to_csv(file_path, index=False)
+        file_size = os.path.getsize(file_path)
+
+        engine = InferenceEngine()
+        parsed = engine.read_file(file_path)
+        inferred_types = engine.infer_column_types(parsed)
+        date_formats_found = {column: details['date_format'] for column, details in engine.column_details.items()
+                              if details.get('date_format')}
+
+        stages = {
+            'read_file': lambda: InferenceEngine().read_file(file_path),
+            'infer_column_types': lambda: InferenceEngine().infer_column_types(parsed),
+            'convert_column_types': lambda: InferenceEngine().convert_column_types(
+                parsed, inferred_types, date_formats_found),
+            'get_dataframe_info': lambda: InferenceEngine().get_dataframe_info(parsed),
+            'process_file': lambda: InferenceEngine().process_file(file_path, convert_to_inferred_type=True),
+        }
+
+        results = {}
+        for name, func in stages.items():
+            result = measure(func, repeat)
+            result['rows_per_second'] = rows / result['seconds'] if result['seconds'] else None
+            results[name] = result
+            print(f"{name:<22} {result['seconds']:>9.3f}s {result['rows_per_second']:>14,.0f} rows/s "
+                  f"{result['peak_memory_bytes'] / 2**20:>9.1f} MiB peak")
+
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'engine_version': ENGINE_VERSION,
+        'environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'config': {
+            'rows': rows,
+            'columns': columns,
+            'type_mix': type_mix,
+            'null_rate': null_rate,
+            'dirty_rate': dirty_rate,
+            'date_formats': date_formats,
+            'seed': seed,
+            'repeat': repeat,
+            'file_size_bytes': file_size,
+        },
+        'inferred_types': inferred_types,
+        'stages': results,
+    }
+
+
+def compare_results(results: dict, baseline: dict, threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> list[str]:
+    """
+    Compare stage timings against a baseline run.
+
+    Args:
+        results: Output of run_benchmarks
+        baseline: Output of an earlier run_benchmarks with the same configuration
+        threshold: Slowdown ratio from which a stage counts as a regression
+
+    Returns:
+        Names of the stages that regressed
+    """
+    if baseline['config'] != results['config']:
+        print("Warning: the baseline was run with a different configuration")
+
+    regressions = []
+    for name, result in results['stages'].items():
+        if name not in baseline['stages']:
+            continue
+        ratio = result['seconds'] / baseline['stages'][name]['seconds']
+        memory_ratio = result['peak_memory_bytes'] / max(baseline['stages'][name]['peak_memory_bytes'], 1)
+        flag = 'REGRESSION' if ratio > threshold else ''
+        print(f"{name:<22} {ratio:>6.2f}x time {memory_ratio:>6.2f}x memory {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def parse_type_mix(value: str) -> dict[str, float]:
+    """Parse a type mix written as kind=share pairs, e.g. 'int=2,text=1'."""
+    type_mix = {}
+    for pair in value.split(','):
+        kind, share = pair.split('=')
+        if kind not in DEFAULT_TYPE_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown column kind: {kind}")
+        type_mix[kind] = float(share)
+    return type_mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the inference engine on synthetic data")
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--columns', type=int, default=12)
+    parser.add_argument('--type-mix', type=parse_type_mix, default=DEFAULT_TYPE_MIX,
+                        help="Share of each column kind, e.g. 'int=2,float=1,date=1,text=1'")
+    parser.add_argument('--null-rate', type=float, default=0.05)
+    parser.add_argument('--dirty-rate', type=float, default=0.01)
+    parser.add_argument('--date-formats', type=lambda value: value.split(','), default=DEFAULT_DATE_FORMATS,
+                        help="Comma-separated strftime formats of the date columns")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per stage, the best is reported")
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    parser.add_argument('--baseline', help="Compare against the results in this JSON file")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="Slowdown against the baseline reported as a regression")
+    parser.add_argument('--verbose', action='store_true', help="Show the engine's log messages")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        # Dirty values make the engine log every failed conversion
+        logging.disable(logging.CRITICAL)
+
+    results = run_benchmarks(args.rows, args.columns, args.type_mix, args.null_rate, args.dirty_rate,
+                             args.date_formats, args.seed, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare_results(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class DataProcessorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'data_inference'
+
+    def ready(self):
+        from django.conf import settings
+        from . import metrics
+
+        metrics.registry.enabled = settings.INFERENCE_METRICS_ENABLED
@@ -0,0 +1,223 @@
+# Async upload and apply-types views for ASGI deployments
+
+import asyncio
+import contextvars
+import json
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import metrics
+from .batch import save_upload
+from .excel import EXCEL_EXTENSIONS
+from .infer_data_type import ENGINE_VERSION, OUTPUT_FORMATS
+from .jobs import QueueFull
+from .models import ProcessedFile
+from .services import apply_column_types, create_engine, discard_upload, process_upload, result_cache, select_sheets
+from .views import DataInferenceViewSet
+
+# Pandas work of the async views runs on this pool, so the event loop keeps
+# accepting uploads while inference runs with bounded parallelism
+executor = ThreadPoolExecutor(max_workers=settings.INFERENCE_ASYNC_WORKERS, thread_name_prefix='inference-async')
+
+# Requests waiting for or running on the executor
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+class admitted:
+    """
+    Reserve a place among the requests the executor may hold.
+
+    Raises QueueFull when INFERENCE_ASYNC_MAX_PENDING requests are already
+    waiting for or running on the executor.
+    """
+
+    def __enter__(self):
+        global _pending
+        with _pending_lock:
+            if _pending >= settings.INFERENCE_ASYNC_MAX_PENDING:
+                raise QueueFull(f"{_pending} requests are already processing, try again later")
+            _pending += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        global _pending
+        with _pending_lock:
+            _pending -= 1
+        return False
+
+
+def _in_worker(function, *args):
+    """Run a function on an executor thread with its own database connection."""
+    close_old_connections()
+    try:
+        return function(*args)
+    finally:
+        close_old_connections()
+
+
+async def run_blocking(function, *args):
+    """
+    Run ORM or pandas work on the executor without blocking the event loop.
+
+    The call runs in a copy of the request's context, so stage timings it
+    records are collected with the request.
+
+    Args:
+        function: Synchronous function to call
+        *args: Arguments passed to the function
+
+    Returns:
+        The function's return value
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(executor, context.run, _in_worker, function, *args)
+
+
+def json_response(data, status=200):
+    """Encode response data the way the REST framework views do."""
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+async def timed(action_name, handler, request, *args):
+    """
+    Run an async handler under a request timer.
+
+    Mirrors DataInferenceViewSet.timed: the stage timings are added to the
+    response as 'timings' when the include_timings parameter is 'true'.
+    """
+    data, files = await asyncio.to_thread(_read_form, request)
+    include_timings = str(request.GET.get('include_timings', data.get('include_timings', 'false'))).lower() == 'true'
+
+    with metrics.collect_timings(include_timings) as timings, metrics.request(action_name):
+        response_data, status = await handler(request, data, files, *args)
+
+    if timings is not None and isinstance(response_data, dict):
+        response_data['timings'] = timings
+    return json_response(response_data, status)
+
+
+def _read_form(request):
+    """
+    Parse the body of a request into its data and files.
+
+    Multipart bodies are parsed from the buffered request, writing large
+    files to temporary files, so this runs off the event loop.
+    """
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}'), {}
+        except json.JSONDecodeError:
+            return {}, {}
+    return request.POST, request.FILES
+
+
+def _process_sheets(file: dict, sheets: list, cache_keys: list, apply_types: bool, output_format: str,
+                    optimize_memory: bool) -> list[dict]:
+    """Process each selected sheet of a saved upload."""
+    engine = create_engine()
+    return [
+        process_upload(
+            engine, file['file_path'], file['file_name'], file['file_size'], apply_types, cache_key,
+            output_format, optimize_memory, sheet=sheet
+        )
+        for sheet, cache_key in zip(sheets, cache_keys)
+    ]
+
+
+@csrf_exempt
+@require_POST
+async def upload_file(request):
+    """Upload and process a data file, offloading inference to the executor."""
+    return await timed('async_upload_file', _upload_file, request)
+
+
+async def _upload_file(request, data, files):
+    if 'file' not in files:
+        return {"error": "No file provided"}, 400
+
+    file_obj = files['file']
+    apply_types = data.get('apply_inferred_types', 'false').lower() == 'true'
+    optimize_memory = data.get('optimize_memory', 'false').lower() == 'true'
+    output_format = data.get('output_format', 'csv').lower()
+    if output_format not in OUTPUT_FORMATS:
+        return {"error": f"Unsupported output format: {output_format}"}, 400
+    all_sheets = data.get('all_sheets', 'false').lower() == 'true'
+
+    try:
+        with admitted():
+            # Save the uploaded file, hashing its content so repeated uploads can be served from cache
+            with metrics.stage('receive_upload') as stage:
+                file = await asyncio.to_thread(save_upload, file_obj)
+                stage.bytes = file['file_size']
+
+            try:
+                # Excel uploads are processed one worksheet at a time
+                sheets = [None]
+                if file['file_name'].split('.')[-1].lower() in EXCEL_EXTENSIONS:
+                    try:
+                        sheets = await run_blocking(select_sheets, file['file_path'], data.get('sheet'), all_sheets)
+                    except ValueError as e:
+                        return {"error": str(e)}, 400
+
+                cache_keys = [(file['content_hash'], ENGINE_VERSION, apply_types, output_format, optimize_memory,
+                               sheet) for sheet in sheets]
+                cached_responses = [result_cache.get(cache_key) for cache_key in cache_keys]
+                if all(cached_response is not None for cached_response in cached_responses):
+                    return DataInferenceViewSet.sheets_response(
+                        file['file_name'], cached_responses, all_sheets, cached=True
+                    ), 200
+
+                responses = await run_blocking(
+                    _process_sheets, file, sheets, cache_keys, apply_types, output_format, optimize_memory
+                )
+                return DataInferenceViewSet.sheets_response(file['file_name'], responses, all_sheets,
+                                                            cached=False), 200
+            finally:
+                # Only kept for the processed files made from it
+                await run_blocking(discard_upload, file['file_path'])
+
+    except QueueFull as e:
+        return {"error": str(e)}, 503
+    except Exception as e:
+        return {"error": str(e)}, 500
+
+
+@csrf_exempt
+@require_POST
+async def apply_types(request, pk):
+    """Apply custom data types to a processed file, offloading conversion to the executor."""
+    return await timed('async_apply_types', _apply_types, request, pk)
+
+
+async def _apply_types(request, data, files, pk):
+    try:
+        processed_file = await ProcessedFile.objects.aget(pk=pk)
+    except ProcessedFile.DoesNotExist:
+        return {"error": "File not found"}, 404
+
+    column_types = data.get('column_types', {})
+    if not column_types:
+        return {"error": "No column types provided"}, 400
+
+    output_format = data.get('output_format', processed_file.output_format).lower()
+    if output_format not in OUTPUT_FORMATS:
+        return {"error": f"Unsupported output format: {output_format}"}, 400
+
+    try:
+        with admitted():
+            return await run_blocking(
+                apply_column_types, create_engine(), processed_file, column_types, output_format
+            ), 200
+    except QueueFull as e:
+        return {"error": str(e)}, 503
+    except Exception as e:
+        return {"error": str(e)}, 500
@@ -0,0 +1,242 @@
+# Batch uploads analyzed concurrently on a process pool
+
+import hashlib
+import logging
+import os
+import zipfile
+
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.db import transaction
+
+from . import metrics
+from .excel import EXCEL_EXTENSIONS
+from .infer_data_type import ENGINE_VERSION, InferenceEngine
+from .services import (
+    analyze_upload, discard_upload, result_cache, save_upload_records, select_sheets, upload_path, upload_response
+)
+
+logger = logging.getLogger(__name__)
+
+# File types accepted in a batch, directly or inside a zip archive
+BATCH_EXTENSIONS = ('csv', 'parquet', 'feather') + EXCEL_EXTENSIONS
+
+# Bytes copied at a time when extracting archive members
+EXTRACT_CHUNK_SIZE = 1024 * 1024
+
+
+class BatchError(ValueError):
+    """Raised when a batch upload is rejected as a whole."""
+
+
+def extract_archive(archive, max_files: int, max_bytes: int) -> list[dict]:
+    """
+    Extract the data files of a zip archive into the upload directory.
+
+    Directories, hidden files and files of unsupported types are skipped.
+    Each member is written to a path of its own, so members with the same
+    name in different folders are kept apart.
+
+    Args:
+        archive: Path or file object of the zip archive
+        max_files: Largest number of data files accepted
+        max_bytes: Largest total uncompressed size accepted
+
+    Returns:
+        List of dictionaries with the 'file_path', 'file_name', 'file_size'
+        and 'content_hash' of each extracted file
+    """
+    try:
+        zip_file = zipfile.ZipFile(archive)
+    except zipfile.BadZipFile:
+        raise BatchError("Archive is not a valid zip file")
+
+    with zip_file:
+        members = [
+            member for member in zip_file.infolist()
+            if not member.is_dir()
+            and not any(part.startswith(('.', '__MACOSX')) for part in member.filename.split('/'))
+            and member.filename.split('.')[-1].lower() in BATCH_EXTENSIONS
+        ]
+        if len(members) > max_files:
+            raise BatchError(f"Archive holds {len(members)} files, at most {max_files} are accepted")
+        # Sizes in the archive directory can be forged, so extraction checks them again
+        if sum(member.file_size for member in members) > max_bytes:
+            raise BatchError(f"Archive expands to more than {max_bytes} bytes")
+
+        files = []
+        total_bytes = 0
+        try:
+            for member in members:
+                file_name = os.path.basename(member.filename)
+                file_path = upload_path(file_name)
+                files.append({'file_path': file_path, 'file_name': file_name})
+                content_hash = hashlib.sha256()
+                with zip_file.open(member) as source, open(file_path, 'wb') as destination:
+                    while chunk := source.read(EXTRACT_CHUNK_SIZE):
+                        total_bytes += len(chunk)
+                        if total_bytes > max_bytes:
+                            raise BatchError(f"Archive expands to more than {max_bytes} bytes")
+                        content_hash.update(chunk)
+                        destination.write(chunk)
+                files[-1].update(file_size=os.path.getsize(file_path), content_hash=content_hash.hexdigest())
+        except Exception:
+            # A rejected archive keeps none of its members
+            for file in files:
+                discard_upload(file['file_path'])
+            raise
+    return files
+
+
+def save_upload(file_obj) -> dict:
+    """
+    Write an uploaded file into the upload directory, hashing its content.
+
+    Args:
+        file_obj: Uploaded file
+
+    Returns:
+        Dictionary with the 'file_path', 'file_name', 'file_size' and 'content_hash' of the file
+    """
+    file_path = upload_path(file_obj.name)
+    content_hash = hashlib.sha256()
+    with open(file_path, 'wb+') as destination:
+        for chunk in file_obj.chunks():
+            content_hash.update(chunk)
+            destination.write(chunk)
+    return {
+        'file_path': file_path,
+        'file_name': file_obj.name,
+        'file_size': file_obj.size,
+        'content_hash': content_hash.hexdigest(),
+    }
+
+
+def collect_files(file_objs: list) -> list[dict]:
+    """
+    Save the files of a batch upload, extracting zip archives.
+
+    Args:
+        file_objs: Uploaded files and archives
+
+    Returns:
+        Saved files as returned by save_upload, in upload order
+    """
+    max_files = settings.INFERENCE_BATCH_MAX_FILES
+    files = []
+    try:
+        for file_obj in file_objs:
+            extension = file_obj.name.split('.')[-1].lower()
+            if extension == 'zip':
+                files.extend(extract_archive(file_obj, max_files - len(files), settings.INFERENCE_BATCH_MAX_BYTES))
+            elif extension in BATCH_EXTENSIONS:
+                files.append(save_upload(file_obj))
+            else:
+                raise BatchError(f"Unsupported file extension: {extension}")
+            if len(files) > max_files:
+                raise BatchError(f"At most {max_files} files are accepted per batch")
+    except Exception:
+        # A rejected batch keeps none of its files
+        for file in files:
+            discard_upload(file['file_path'])
+        raise
+    if not files:
+        raise BatchError("No data files provided")
+    return files
+
+
+def _analyze_file(engine: InferenceEngine, file: dict, apply_types: bool, output_format: str,
+                  optimize_memory: bool) -> dict:
+    """
+    Analyze one file of a batch in a worker process.
+
+    Failures are returned rather than raised so that one bad file does not
+    fail the rest of the batch.
+    """
+    try:
+        analysis = analyze_upload(
+            engine, file['file_path'], file['file_name'], file['file_size'], apply_types,
+            output_format, optimize_memory, sheet=file['sheet']
+        )
+        return {'analysis': analysis}
+    except Exception as e:
+        logger.error(f"Batch file {file['file_name']} failed: {e}")
+        return {'error': str(e)}
+
+
+def process_batch(engine: InferenceEngine, files: list[dict], apply_types: bool, output_format: str = 'csv',
+                  optimize_memory: bool = False, workers: int | None = None) -> list[dict]:
+    """
+    Process the files of a batch concurrently and store their records together.
+
+    Files are analyzed on a pool of worker processes, so a batch scales with
+    the cores available. The records of every successful file are created in
+    a single transaction once all files are analyzed. Files already in the
+    result cache are not processed again. Excel files are processed from
+    their first worksheet. Stage timings of the workers are not collected.
+
+    Args:
+        engine: Engine copied into the workers
+        files: Saved files as returned by collect_files
+        apply_types: Whether to convert columns to their inferred types
+        output_format: Format the converted files are written in
+        optimize_memory: Whether to shrink columns to their smallest safe dtypes
+        workers: Number of worker processes. None uses every CPU.
+
+    Returns:
+        One response per file, in order: the upload response with 'cached'
+        set, or the file name and an 'error'
+    """
+    results = [None] * len(files)
+    cache_keys = [None] * len(files)
+    pending = []
+    for position, file in enumerate(files):
+        file = {**file, 'sheet': None}
+        if file['file_name'].split('.')[-1].lower() in EXCEL_EXTENSIONS:
+            try:
+                file['sheet'] = select_sheets(file['file_path'])[0]
+            except Exception as e:
+                results[position] = {'file_name': file['file_name'], 'error': str(e)}
+                continue
+
+        cache_keys[position] = (file['content_hash'], ENGINE_VERSION, apply_types, output_format,
+                                optimize_memory, file['sheet'])
+        cached_response = result_cache.get(cache_keys[position])
+        if cached_response is not None:
+            results[position] = {**cached_response, 'cached': True}
+        else:
+            pending.append((position, file))
+
+    if not pending:
+        return results
+
+    workers = min(len(pending), workers or os.cpu_count() or 1)
+    with metrics.stage('process_batch') as stage:
+        stage.rows = len(pending)
+        if workers == 1:
+            outcomes = [_analyze_file(engine, file, apply_types, output_format, optimize_memory)
+                        for _, file in pending]
+        else:
+            logger.info(f"Processing {len(pending)} files on {workers} worker processes")
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                outcomes = list(executor.map(
+                    _analyze_file, [engine] * len(pending), [file for _, file in pending],
+                    [apply_types] * len(pending), [output_format] * len(pending), [optimize_memory] * len(pending)
+                ))
+
+    analyzed = [(position, outcome['analysis']) for (position, _), outcome in zip(pending, outcomes)
+                if 'analysis' in outcome]
+    with metrics.stage('save_records') as stage, transaction.atomic():
+        # Database rows written: each file and one per column
+        stage.rows = sum(analysis['info']['total_columns'] + 1 for _, analysis in analyzed)
+        processed_files = [save_upload_records(analysis) for _, analysis in analyzed]
+
+    for (position, analysis), processed_file in zip(analyzed, processed_files):
+        response_data = upload_response(processed_file, analysis)
+        result_cache.set(cache_keys[position], response_data)
+        results[position] = {**response_data, 'cached': False}
+    for (position, file), outcome in zip(pending, outcomes):
+        if 'error' in outcome:
+            results[position] = {'file_name': file['file_name'], 'error': outcome['error']}
+
+    return results
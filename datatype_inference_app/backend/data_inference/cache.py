@@ -0,0 +1,136 @@
+# In-process caches shared across requests
+
+import threading
+
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Size-bounded cache that evicts the least recently used entry first.
+
+    The cache is bounded by its number of entries, by the total size of its
+    values as measured by sizeof, or both. Hits, misses and evictions are
+    counted so the cache's effectiveness can be measured. All operations are
+    thread safe.
+    """
+
+    def __init__(self, max_entries: int | None = 128, max_bytes: int | None = None, sizeof=None):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_entries: Number of entries kept before the oldest is evicted,
+                or None for no limit
+            max_bytes: Total size of the values kept before the oldest are
+                evicted, or None for no limit
+            sizeof: Function returning the size of a value in bytes, required
+                with max_bytes
+        """
+        if max_bytes is not None and sizeof is None:
+            raise ValueError("max_bytes requires a sizeof function")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.bytes = 0
+        self._sizes = {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """
+        Look up an entry and mark it as most recently used.
+
+        Args:
+            key: Cache key
+            default: Value returned on a miss
+
+        Returns:
+            Cached value, or default if the key is not cached
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def set(self, key, value):
+        """
+        Store an entry, evicting the least recently used ones beyond the limits.
+
+        Values larger than max_bytes on their own are not stored.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+        """
+        size = self.sizeof(value) if self.sizeof is not None else 0
+        with self._lock:
+            self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.bytes += size
+            while ((self.max_entries is not None and len(self._entries) > self.max_entries)
+                   or (self.max_bytes is not None and self.bytes > self.max_bytes)):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        """Drop an entry if present. The lock must be held."""
+        if key in self._entries:
+            del self._entries[key]
+            self.bytes -= self._sizes.pop(key)
+
+    def discard_if(self, predicate) -> int:
+        """
+        Remove every entry for which predicate(key, value) is true.
+
+        Args:
+            predicate: Function of a key and its cached value
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            stale = [key for key, value in self._entries.items() if predicate(key, value)]
+            for key in stale:
+                self._remove(key)
+            return len(stale)
+
+    def clear(self):
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """
+        Report the size and counters of the cache.
+
+        Returns:
+            Dictionary of cache statistics
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,286 @@
+# Type detectors evaluated from cheapest to most expensive
+
+import pandas as pd
+
+from . import metrics
+
+# Longest text a date detector considers, longer values are never dates
+MAX_DATE_LENGTH = 40
+
+
+class ColumnContext:
+    """
+    Everything the detectors know about a column.
+
+    Values that several detectors need, such as the character-class
+    statistics, are computed once per column on first use.
+    """
+
+    def __init__(self, engine, series: pd.Series, values: pd.Series, sample: pd.Series,
+                 ratios: dict[str, float], threshold: float, statistics: dict | None = None):
+        """
+        Initialize the context of a column.
+
+        Args:
+            engine: InferenceEngine running the detection
+            series: Full column
+            values: Non-null values of the column
+            sample: Sampled values type detection runs on
+            ratios: Match ratios of the sample, from InferenceEngine.compute_match_ratios
+            threshold: Share of values that must match a type
+            statistics: Output of InferenceEngine.column_statistics, if computed
+        """
+        self.engine = engine
+        self.series = series
+        self.values = values
+        self.sample = sample
+        self.ratios = ratios
+        self.threshold = threshold
+        self.statistics = statistics
+        self._text = None
+        self._stats = None
+
+    @property
+    def name(self):
+        return self.series.name
+
+    @property
+    def text(self) -> pd.Series:
+        """Stripped, non-empty string values of the sample."""
+        if self._text is None:
+            self._text = self.engine._string_values(self.sample)
+        return self._text
+
+    @property
+    def stats(self) -> dict:
+        """
+        Character-class statistics of the sample, computed on first use.
+
+        Returns:
+            Dictionary with the share of values containing digits, containing
+            letters and short enough to be a date
+        """
+        if self._stats is None:
+            text = self.text
+            if text.empty:
+                self._stats = {'count': 0, 'digit_share': 0.0, 'alpha_share': 0.0, 'date_length_share': 0.0}
+            else:
+                self._stats = {
+                    'count': len(text),
+                    'digit_share': float(text.str.contains(r'\d').mean()),
+                    'alpha_share': float(text.str.contains(r'[^\W\d_]').mean()),
+                    'date_length_share': float((text.str.len() <= MAX_DATE_LENGTH).mean()),
+                }
+        return self._stats
+
+
+class Detector:
+    """
+    Base class of type detectors.
+
+    Each detector declares the dtype it detects, its relative cost and its
+    priority. When several detectors match a column, the one with the lowest
+    priority wins. prefilter() rejects columns cheaply from the character
+    statistics before detect() runs.
+    """
+
+    name = None
+    dtype = None
+    cost = 1
+    priority = 100
+
+    def prefilter(self, context: ColumnContext) -> bool:
+        """
+        Cheaply rule out columns that cannot match.
+
+        Args:
+            context: Column being inferred
+
+        Returns:
+            False if the column certainly does not match, True otherwise
+        """
+        return True
+
+    def detect(self, context: ColumnContext) -> dict | None:
+        """
+        Check whether the column holds this detector's type.
+
+        Args:
+            context: Column being inferred
+
+        Returns:
+            None if the column does not match. Otherwise a dictionary of
+            column details, whose 'ratio' is the share of matching values
+            used for the confidence score when known.
+        """
+        raise NotImplementedError
+
+
+class RatioDetector(Detector):
+    """
+    Matches when the match ratio of its dtype reaches the threshold.
+
+    The ratios are computed together in one vectorized pass over the sample,
+    so these detectors need no prefilter.
+    """
+
+    def detect(self, context: ColumnContext) -> dict | None:
+        ratio = context.ratios[self.dtype]
+        return {'ratio': ratio} if ratio >= context.threshold else None
+
+
+class BooleanDetector(RatioDetector):
+    name = 'bool'
+    dtype = 'bool'
+    priority = 10
+
+
+class IntegerDetector(RatioDetector):
+    name = 'integer'
+    dtype = 'int64'
+    priority = 20
+
+
+class FloatDetector(RatioDetector):
+    name = 'float'
+    dtype = 'float64'
+    priority = 30
+
+
+class DateFormatDetector(Detector):
+    """Matches dates written in a single strftime format."""
+
+    name = 'date_format'
+    dtype = 'datetime64[ns]'
+    cost = 10
+    priority = 40
+
+    def prefilter(self, context: ColumnContext) -> bool:
+        stats = context.stats
+        return stats['digit_share'] >= context.threshold and stats['date_length_share'] >= context.threshold
+
+    def detect(self, context: ColumnContext) -> dict | None:
+        date_format = context.engine.infer_date_format(context.text)
+        if date_format is None:
+            return None
+        ratio = pd.to_datetime(context.text, format=date_format, errors='coerce').notna().mean()
+        return {'ratio': ratio, 'date_format': date_format}
+
+
+class DateParseDetector(DateFormatDetector):
+    """Matches dates in mixed formats by parsing values one at a time."""
+
+    name = 'date_parse'
+    cost = 100
+    priority = 41
+
+    def detect(self, context: ColumnContext) -> dict | None:
+        return {} if context.engine.check_if_date(context.sample.head(100).tolist()) else None
+
+
+class CategoricalDetector(Detector):
+    """Matches text columns with few distinct values."""
+
+    name = 'categorical'
+    dtype = 'category'
+    cost = 5
+    priority = 50
+
+    def detect(self, context: ColumnContext) -> dict | None:
+        unique_count = context.statistics['unique_count'] if context.statistics else None
+        if not context.engine.check_if_categorical(context.series, unique_count):
+            return None
+        # Text columns are as certain as the closest rejected type allows
+        return {'ratio': max(context.ratios.values())}
+
+
+class DetectorRegistry:
+    """
+    Ordered collection of the detectors the engine evaluates.
+
+    Detectors run from cheapest to most expensive. Once a detector matches,
+    only detectors with a lower priority are evaluated, and evaluation stops
+    as soon as none are left.
+    """
+
+    def __init__(self, detectors: list[Detector] | None = None):
+        """
+        Initialize the registry.
+
+        Args:
+            detectors: Detectors to register
+        """
+        self._detectors = {}
+        for detector in detectors or []:
+            self.register(detector)
+
+    def register(self, detector: Detector):
+        """
+        Add a detector, replacing any registered under the same name.
+
+        Args:
+            detector: Detector instance
+        """
+        self._detectors[detector.name] = detector
+        self._ordered = sorted(self._detectors.values(), key=lambda d: (d.cost, d.priority))
+
+    def unregister(self, name: str):
+        """
+        Remove a detector.
+
+        Args:
+            name: Name of the detector
+        """
+        del self._detectors[name]
+        self._ordered = sorted(self._detectors.values(), key=lambda d: (d.cost, d.priority))
+
+    def __iter__(self):
+        return iter(self._ordered)
+
+    def __len__(self):
+        return len(self._ordered)
+
+    def detect(self, context: ColumnContext) -> tuple[Detector | None, dict | None]:
+        """
+        Find the matching detector with the lowest priority.
+
+        Args:
+            context: Column being inferred
+
+        Returns:
+            Tuple of the winning detector and its details, or (None, None)
+            if no detector matches
+        """
+        best, best_details = None, None
+        for position, detector in enumerate(self._ordered):
+            if best is not None and detector.priority >= best.priority:
+                continue
+            if not detector.prefilter(context):
+                continue
+            with metrics.detector(context.name, detector.name):
+                details = detector.detect(context)
+            if details is None:
+                continue
+
+            best, best_details = detector, details
+            if all(other.priority >= best.priority for other in self._ordered[position + 1:]):
+                break
+        return best, best_details
+
+
+# Detectors used by engines that are not given their own registry
+default_registry = DetectorRegistry([
+    BooleanDetector(), IntegerDetector(), FloatDetector(),
+    DateFormatDetector(), DateParseDetector(), CategoricalDetector(),
+])
+
+
+def register_detector(detector: Detector, registry: DetectorRegistry | None = None):
+    """
+    Register a detector, by default with every engine using the default registry.
+
+    Args:
+        detector: Detector instance
+        registry: Registry to add it to
+    """
+    (registry or default_registry).register(detector)
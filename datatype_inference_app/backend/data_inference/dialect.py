@@ -0,0 +1,123 @@
+# CSV dialect detection from the first bytes of a file
+
+import codecs
+import csv
+
+# Bytes read from the start of a file to detect its dialect
+SNIFF_BYTES = 64 * 1024
+
+# Delimiters considered, in order of preference when equally likely
+DELIMITERS = ',;\t|'
+
+# Encodings tried in order; latin-1 decodes any bytes, so one always fits
+ENCODINGS = ['utf-8', 'cp1252', 'latin-1']
+
+DEFAULT_DIALECT = {'delimiter': ',', 'quotechar': '"', 'encoding': 'utf-8', 'header': True}
+
+
+def detect_encoding(sample: bytes) -> str:
+    """
+    Detect the text encoding of the first bytes of a file.
+
+    Args:
+        sample: First bytes of the file, possibly ending mid-character
+
+    Returns:
+        Name of the encoding
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    for encoding in ENCODINGS:
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return ENCODINGS[-1]
+
+
+def _is_number(value: str) -> bool:
+    """Check whether a field holds a number."""
+    try:
+        float(value.replace(',', '.'))
+        return True
+    except ValueError:
+        return False
+
+
+def _has_header(text: str, delimiter: str, quotechar: str) -> bool:
+    """
+    Decide whether the first row of a sample holds column names.
+
+    A first row of distinct, non-empty, non-numeric values is taken as a
+    header. Anything else is left to csv.Sniffer, which compares the first
+    row against the types and lengths of the rows below it.
+    """
+    rows = csv.reader(text.splitlines(), delimiter=delimiter, quotechar=quotechar)
+    first = next(rows, [])
+    if first and len(set(first)) == len(first) and all(value.strip() and not _is_number(value) for value in first):
+        return True
+    try:
+        return csv.Sniffer().has_header(text)
+    except csv.Error:
+        return True
+
+
+def sniff_bytes(sample: bytes, complete: bool = False) -> dict:
+    """
+    Detect the delimiter, quote character, encoding and header of a CSV sample.
+
+    Args:
+        sample: First bytes of the file
+        complete: Whether the sample is the whole file. Otherwise its last,
+            possibly cut off, line is ignored.
+
+    Returns:
+        Dictionary with 'delimiter', 'quotechar', 'encoding' and 'header'
+    """
+    encoding = detect_encoding(sample)
+    text = codecs.getincrementaldecoder(encoding)(errors='replace').decode(sample, final=complete)
+    if not complete and '\n' in text:
+        text = text[:text.rindex('\n') + 1]
+    if not text.strip():
+        return {**DEFAULT_DIALECT, 'encoding': encoding}
+
+    first_line = text.split('\n', 1)[0]
+    try:
+        sniffed = csv.Sniffer().sniff(text, delimiters=DELIMITERS)
+        delimiter, quotechar = sniffed.delimiter, sniffed.quotechar
+    except csv.Error:
+        delimiter, quotechar = None, '"'
+    if delimiter is None or delimiter not in first_line:
+        # Fall back to the candidate the header line uses most
+        counts = {candidate: first_line.count(candidate) for candidate in DELIMITERS}
+        delimiter = max(DELIMITERS, key=counts.get) if any(counts.values()) else ','
+
+    return {
+        'delimiter': delimiter,
+        'quotechar': quotechar,
+        'encoding': encoding,
+        'header': _has_header(text, delimiter, quotechar),
+    }
+
+
+def sniff_file(file_path: str) -> dict:
+    """
+    Detect the dialect of a CSV file from its first SNIFF_BYTES bytes.
+
+    Args:
+        file_path: Path to the CSV file
+
+    Returns:
+        Dictionary with 'delimiter', 'quotechar', 'encoding' and 'header'
+    """
+    with open(file_path, 'rb') as f:
+        sample = f.read(SNIFF_BYTES + 1)
+    return sniff_bytes(sample[:SNIFF_BYTES], complete=len(sample) <= SNIFF_BYTES)
+
+
+def column_names(count: int) -> list[str]:
+    """Names given to the columns of a file without a header row."""
+    return [f"column_{i + 1}" for i in range(count)]
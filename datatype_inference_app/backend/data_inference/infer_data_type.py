@@ -1,22 +1,138 @@
 # Core functionality
 
 import logging
+import os
 import numpy as np
 import pandas as pd
 import re
+import warnings
 
 from dateutil.parser import parse
+from pandas.tseries.api import guess_datetime_format
+import pyarrow as pa
+from pyarrow import feather
+
+from . import dialect as csv_dialect, excel, metrics
+from .detectors import ColumnContext, DetectorRegistry, default_registry
+from .cache import LRUCache
+from .parallel import map_columns
+from .sampling import Sampler, decision_confidence, get_sampler
+from .sketches import DEFAULT_DISTINCT_ERROR, HyperLogLog
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Bumped whenever inference results can change, invalidating cached results
+ENGINE_VERSION = '1.10'
+
+# Share of non-null samples that must match a type for it to be inferred
+MATCH_THRESHOLD = 0.8
+
+BOOLEAN_VALUES = {'true', 'false', 't', 'f', 'yes', 'no', 'y', 'n', '1', '0'}
+# Values each boolean spelling converts to
+BOOLEAN_MAP = {'true': True, 'false': False, 'yes': True, 'no': False,
+               't': True, 'f': False, 'y': True, 'n': False, '1': True, '0': False}
+INTEGER_PATTERN = r'[+-]?\d+'
+
+# Digits of the largest int64, which integer text may not exceed
+INT64_MAX_DIGITS = str(np.iinfo(np.int64).max)
+
+DATE_PATTERNS = [
+    re.compile(r'\d{4}-\d{1,2}-\d{1,2}'),  # YYYY-MM-DD
+    re.compile(r'\d{1,2}/\d{1,2}/\d{2,4}'),  # MM/DD/YY or MM/DD/YYYY
+    re.compile(r'\d{1,2}-\d{1,2}-\d{2,4}'),  # MM-DD-YY or MM-DD-YYYY
+    re.compile(r'\d{1,2}\s+[A-Za-z]{3,9}\s+\d{2,4}'),  # DD Month YYYY
+    re.compile(r'[A-Za-z]{3,9}\s+\d{1,2},?\s+\d{2,4}'),  # Month DD, YYYY
+]
+
+# Formats tried after those guessed from the column itself
+DATE_FORMATS = [
+    '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y/%m/%d',
+    '%m/%d/%Y', '%d/%m/%Y', '%m/%d/%y', '%d/%m/%y', '%m-%d-%Y', '%d-%m-%Y',
+    '%d %B %Y', '%d %b %Y', '%B %d, %Y', '%b %d, %Y', '%B %d %Y', '%b %d %Y',
+]
+
+# File formats processed files can be written in, each also used as the extension
+OUTPUT_FORMATS = ('csv', 'parquet', 'feather')
+COLUMNAR_COMPRESSION = 'zstd'
+
+# Text columns with fewer distinct values than this share of rows become categories
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+# Column count from which n_jobs > 1 switches to the process pool
+DEFAULT_PARALLEL_MIN_COLUMNS = 64
+
+# Values used to shortlist date formats before validating against the column
+DATE_FORMAT_SAMPLE_SIZE = 200
+
+# Columns whose match ratio lands this close to MATCH_THRESHOLD are resampled,
+# growing the sample by ESCALATION_FACTOR up to the maximum sample size
+ESCALATION_MARGIN = 0.1
+ESCALATION_FACTOR = 10
+DEFAULT_MAX_SAMPLE_SIZE = 10_000
+
+# Columns with more non-null values than this get an estimated distinct count
+DEFAULT_EXACT_DISTINCT_MAX_ROWS = 1_000_000
+
+# Leading non-null values of each column whose character shapes go into the
+# schema fingerprint, searched for within the first SIGNATURE_ROWS rows
+SIGNATURE_VALUES = 3
+SIGNATURE_ROWS = 1000
+
+# Values a type remembered for a schema is checked against before reuse
+SCHEMA_CHECK_SAMPLE_SIZE = 20
+
 class InferenceEngine:
     """
     Class which contains core Python logic of the application
     """
 
-    def __init__(self):
-        """Initialize the DataTypeInferenceEngine."""
+    def __init__(self, sample_size: int | None = 100, n_jobs: int = 1,
+                 parallel_min_columns: int = DEFAULT_PARALLEL_MIN_COLUMNS,
+                 sampler: str | Sampler = 'stratified',
+                 max_sample_size: int | None = DEFAULT_MAX_SAMPLE_SIZE,
+                 exact_distinct_max_rows: int | None = DEFAULT_EXACT_DISTINCT_MAX_ROWS,
+                 distinct_error: float = DEFAULT_DISTINCT_ERROR,
+                 detectors: DetectorRegistry | None = None,
+                 schema_cache: LRUCache | None = None):
+        """
+        Initialize the DataTypeInferenceEngine.
+
+        Args:
+            sample_size: Number of non-null values per column used for type
+                detection. None scans the full column.
+            sampler: Sampling strategy, one of 'head', 'head_tail', 'reservoir'
+                and 'stratified', or a Sampler instance
+            max_sample_size: Largest sample that undecided columns are escalated
+                to. None allows scanning the full column.
+            exact_distinct_max_rows: Columns with more non-null values have their
+                distinct values estimated with a HyperLogLog sketch. None always
+                counts exactly.
+            distinct_error: Relative standard error of estimated distinct counts
+            detectors: Type detectors to evaluate. None uses the default
+                registry, which register_detector adds to.
+            schema_cache: Cache remembering the column types of each schema
+                fingerprint, so recurring feeds skip detection. None disables it.
+            n_jobs: Number of worker processes for per-column inference.
+                1 runs serially, None uses every CPU.
+            parallel_min_columns: Narrower DataFrames are always inferred serially
+        """
+        self.sample_size = sample_size
+        self.n_jobs = n_jobs
+        self.parallel_min_columns = parallel_min_columns
+        self.sampler = get_sampler(sampler)
+        self.max_sample_size = max_sample_size
+        self.exact_distinct_max_rows = exact_distinct_max_rows
+        self.distinct_error = distinct_error
+        self.detectors = default_registry if detectors is None else detectors
+        self.schema_cache = schema_cache
+
+        # Column types remembered for the schema being inferred, see lookup_schema
+        self.schema_hint = {}
+
+        # Per-column details recorded by the last infer_column_types run
+        self.column_details = {}
+
         # Define mappings from pandas dtypes to user-friendly names
         self.dtype_display_mapping = {
             'object': 'Text',
@@ -28,13 +144,45 @@ class InferenceEngine:
             'timedelta[ns]': 'Time Duration',
             'complex128': 'Complex Number',
         }
+        # Reverse mapping for types chosen by display name
+        self.display_dtype_mapping = {display: dtype for dtype, display in self.dtype_display_mapping.items()}
+
+        # Narrower dtypes produced by memory optimization
+        for dtype in ['int8', 'int16', 'int32', 'uint8', 'uint16', 'uint32', 'uint64',
+                      'Int8', 'Int16', 'Int32', 'Int64', 'UInt8', 'UInt16', 'UInt32', 'UInt64']:
+            self.dtype_display_mapping[dtype] = 'Integer'
+        self.dtype_display_mapping['float32'] = 'Decimal'
+        self.dtype_display_mapping['boolean'] = 'Boolean'
+
+    def __getstate__(self) -> dict:
+        # Worker processes get the schema hint but not the shared cache
+        state = self.__dict__.copy()
+        state['schema_cache'] = None
+        return state
 
-    def read_file(self, file_path: str) -> pd.DataFrame:
+    def runs_in_parallel(self, df: pd.DataFrame) -> bool:
+        """
+        Check whether the columns of a DataFrame are inferred in worker processes.
+
+        Args:
+            df: DataFrame to analyze
+
+        Returns:
+            True if the process pool is used, False otherwise.
+        """
+        return self.n_jobs != 1 and len(df.columns) >= self.parallel_min_columns
+
+    def read_file(self, file_path: str, sheet: int | str = 0, skip_rows: int = 0,
+                  max_rows: int | None = None, dialect: dict | None = None) -> pd.DataFrame:
         """
         Function to read CSV or excel file and covert it into a Pandas Dataframe
 
         Args:
             file_path: Path to the file to be read
+            sheet: Sheet name or position read from Excel workbooks
+            skip_rows: Data rows skipped after the header
+            max_rows: Number of data rows read. None reads the whole file.
+            dialect: Output of sniff_dialect for CSV files. Sniffed if not given.
 
         Returns:
             Dataframe containing file data
@@ -44,19 +192,340 @@ class InferenceEngine:
             extension = file_path.split('.')[-1].lower()
 
             if extension == 'csv':
-                try:
-                    df = pd.read_csv(file_path, sep=',')
-                except pd.errors.ParserError:
-                    df = pd.read_csv(file_path, sep=';')
-            elif extension in ['xls', 'xlsx']:
-                df = pd.read_excel(file_path)
+                # Parsed once with the dialect sniffed from the start of the file
+                dialect = dialect or self.sniff_dialect(file_path)
+                first_row = 1 if dialect['header'] else 0
+                df = pd.read_csv(file_path, **self.csv_options(dialect), nrows=max_rows,
+                                 skiprows=range(first_row, first_row + skip_rows) if skip_rows else None)
+                df = self._name_columns(df, dialect)
+            elif extension in excel.EXCEL_EXTENSIONS:
+                df = excel.read_sheet(file_path, sheet, skip_rows, max_rows)
+            elif extension == 'parquet':
+                df = self._row_range(pd.read_parquet(file_path), skip_rows, max_rows)
+            elif extension == 'feather':
+                df = self._row_range(pd.read_feather(file_path), skip_rows, max_rows)
             else:
-                raise ValueError("Unsupported file extension: {extension}")
+                raise ValueError(f"Unsupported file extension: {extension}")
             return df
         except Exception as e:
             logger.error(f"Error reading {file_path} : {e}")
             raise
 
+    def sniff_dialect(self, file_path: str) -> dict:
+        """
+        Detect the delimiter, quote character, encoding and header of a CSV file.
+
+        Only the first few KB of the file are read.
+
+        Args:
+            file_path: Path to the CSV file
+
+        Returns:
+            Dictionary with 'delimiter', 'quotechar', 'encoding' and 'header'
+        """
+        return csv_dialect.sniff_file(file_path)
+
+    def csv_options(self, dialect: dict) -> dict:
+        """
+        Translate a sniffed dialect into pd.read_csv arguments.
+
+        Args:
+            dialect: Output of sniff_dialect
+
+        Returns:
+            Keyword arguments for pd.read_csv
+        """
+        return {
+            'sep': dialect['delimiter'],
+            'quotechar': dialect['quotechar'],
+            'encoding': dialect['encoding'],
+            'header': 0 if dialect['header'] else None,
+        }
+
+    def _name_columns(self, df: pd.DataFrame, dialect: dict) -> pd.DataFrame:
+        """Name the columns of a file read without a header row."""
+        if not dialect['header']:
+            df.columns = csv_dialect.column_names(len(df.columns))
+        return df
+
+    def _row_range(self, df: pd.DataFrame, skip_rows: int, max_rows: int | None) -> pd.DataFrame:
+        """Slice a row range out of a DataFrame read in full."""
+        if not skip_rows and max_rows is None:
+            return df
+        stop = None if max_rows is None else skip_rows + max_rows
+        return df.iloc[skip_rows:stop].reset_index(drop=True)
+
+    def read_workbook(self, file_path: str, max_rows: int | None = None) -> dict[str, pd.DataFrame]:
+        """
+        Read every worksheet of an Excel workbook.
+
+        Args:
+            file_path: Path to the workbook
+            max_rows: Number of data rows read from each sheet. None reads them all.
+
+        Returns:
+            Dictionary mapping sheet names to their data, in workbook order
+        """
+        return {sheet: self.read_file(file_path, sheet, max_rows=max_rows) for sheet in excel.sheet_names(file_path)}
+
+    def write_file(self, df: pd.DataFrame, file_path: str, output_format: str = 'csv'):
+        """
+        Write a DataFrame to disk in one of the supported output formats.
+
+        Parquet and Feather keep the column dtypes, including categorical,
+        datetime, boolean and nullable types, and are written compressed.
+
+        Args:
+            df: DataFrame to write
+            file_path: Path to write the file to
+            output_format: One of OUTPUT_FORMATS
+        """
+        try:
+            if output_format == 'csv':
+                df.to_csv(file_path, index=False)
+            elif output_format == 'parquet':
+                self._arrow_compatible(df).to_parquet(file_path, index=False, compression=COLUMNAR_COMPRESSION)
+            elif output_format == 'feather':
+                self._arrow_compatible(df).to_feather(file_path, compression=COLUMNAR_COMPRESSION)
+            else:
+                raise ValueError(f"Unsupported output format: {output_format}")
+        except Exception as e:
+            logger.error(f"Error writing {file_path} : {e}")
+            raise
+
+    def _arrow_compatible(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Turn object columns mixing strings with other values into text.
+
+        Arrow columns hold a single type, so such columns could not be written
+        to Parquet or Feather otherwise.
+
+        Args:
+            df: DataFrame to write
+
+        Returns:
+            DataFrame that Arrow can represent
+        """
+        mixed_columns = [
+            column for column in df.columns
+            if df[column].dtype == 'object'
+            and pd.api.types.infer_dtype(df[column], skipna=True) in ('mixed', 'mixed-integer')
+        ]
+        if not mixed_columns:
+            return df
+
+        df = df.copy(deep=False)
+        for column in mixed_columns:
+            df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+        return df
+
+    def write_snapshot(self, df: pd.DataFrame, file_path: str):
+        """
+        Write a parsed DataFrame as an uncompressed Feather snapshot.
+
+        Uncompressed Arrow data can be memory-mapped when loaded, so reading a
+        snapshot back costs little more than the columns actually touched.
+
+        Args:
+            df: Parsed DataFrame
+            file_path: Path to write the snapshot to
+        """
+        self._arrow_compatible(df).to_feather(file_path, compression='uncompressed')
+
+    def read_snapshot(self, file_paths: str | list[str]) -> pd.DataFrame:
+        """
+        Load a snapshot written by write_snapshot through a memory map.
+
+        A snapshot kept in segments, e.g. one per append, is merged here into
+        one DataFrame, with each column in its type across the segments.
+
+        Args:
+            file_paths: Path of the snapshot, or of its segments in row order
+
+        Returns:
+            The parsed DataFrame
+        """
+        tables = self._snapshot_tables(file_paths)
+        if len(tables) == 1:
+            return tables[0].to_pandas()
+        return pa.concat_tables(self._cast_segments(tables)).to_pandas()
+
+    def read_snapshot_rows(self, file_paths: str | list[str], offset: int, limit: int) -> tuple[pd.DataFrame, int]:
+        """
+        Load a range of rows from a snapshot written by write_snapshot.
+
+        The memory-mapped segments are sliced before conversion, so only the
+        requested rows are read whatever their position in the file.
+
+        Args:
+            file_paths: Path of the snapshot, or of its segments in row order
+            offset: Position of the first row
+            limit: Largest number of rows returned
+
+        Returns:
+            Tuple of the rows, indexed by their position, and the total number of rows
+        """
+        tables = self._snapshot_tables(file_paths)
+        if len(tables) > 1:
+            tables = self._cast_segments(tables)
+        # Position of the range within each segment in turn
+        pieces = [tables[0].slice(0, 0)]
+        start, remaining = offset, limit
+        for table in tables:
+            if start < table.num_rows and remaining > 0:
+                pieces.append(table.slice(start, remaining))
+                remaining -= pieces[-1].num_rows
+            start = max(0, start - table.num_rows)
+        rows = pa.concat_tables(pieces).to_pandas()
+        rows.index = pd.RangeIndex(offset, offset + len(rows))
+        return rows, sum(table.num_rows for table in tables)
+
+    def _snapshot_tables(self, file_paths: str | list[str]) -> list[pa.Table]:
+        """Memory-map the segments of a snapshot."""
+        if isinstance(file_paths, str):
+            file_paths = [file_paths]
+        return [feather.read_table(file_path, memory_map=True) for file_path in file_paths]
+
+    def snapshot_column_types(self, schemas: list[pa.Schema]) -> list[pa.DataType]:
+        """
+        Give the Arrow type of each column across the segments of a snapshot.
+
+        Each segment holds rows parsed on their own, so a column can have a
+        different type in each. Numbers widen to their common numeric type and
+        segments where the column is entirely null take the others' type, as
+        reading all rows at once would have done. Any other mix is text.
+
+        Args:
+            schemas: Schemas of the segments, with the same columns
+
+        Returns:
+            Arrow type of each column, in column order
+        """
+        column_types = []
+        for position in range(len(schemas[0])):
+            types = {schema.field(position).type for schema in schemas} - {pa.null()}
+            if len(types) <= 1:
+                column_types.append(types.pop() if types else pa.null())
+            elif all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in types):
+                column_types.append(pa.from_numpy_dtype(np.result_type(*(t.to_pandas_dtype() for t in types))))
+            else:
+                column_types.append(pa.string())
+        return column_types
+
+    def _cast_segments(self, tables: list[pa.Table]) -> list[pa.Table]:
+        """Cast the segments of a snapshot to the column types they share."""
+        schema = pa.schema([
+            pa.field(name, column_type)
+            for name, column_type in zip(tables[0].column_names, self.snapshot_column_types([t.schema for t in tables]))
+        ])
+        return [table.rename_columns(schema.names).cast(schema) for table in tables]
+
+    def read_text_columns(self, file_path: str, positions: list[int], sheet: int | str = 0,
+                          dialect: dict | None = None) -> pd.DataFrame:
+        """
+        Read columns of a file as the text they are written as.
+
+        Parsing turns e.g. codes with leading zeros into numbers, whose text no
+        longer tells how the values were written. CSV files are read again as
+        strings, other formats store typed values, which are rendered as text.
+
+        Args:
+            file_path: Path to the file to be read
+            positions: Positions of the columns to read
+            sheet: Sheet name or position read from Excel workbooks
+            dialect: Output of sniff_dialect for CSV files. Sniffed if not given.
+
+        Returns:
+            DataFrame of the columns in position order, holding strings and nulls
+        """
+        positions = sorted(positions)
+        if file_path.split('.')[-1].lower() == 'csv':
+            dialect = dialect or self.sniff_dialect(file_path)
+            return pd.read_csv(file_path, **self.csv_options(dialect), usecols=positions, dtype=str)
+        df = self.read_file(file_path, sheet).iloc[:, positions]
+        return df.apply(lambda column: column.astype(object).where(column.isna(), column.astype(str)))
+
+    def read_file_in_chunks(self, file_path: str, chunksize: int, dialect: dict | None = None):
+        """
+        Read a CSV file as a stream of DataFrames of at most chunksize rows.
+
+        Args:
+            file_path: Path to the file to be read
+            chunksize: Maximum number of rows per chunk
+            dialect: Output of sniff_dialect. Sniffed if not given.
+
+        Returns:
+            Iterator over the DataFrame chunks
+        """
+        extension = file_path.split('.')[-1].lower()
+        if extension != 'csv':
+            raise ValueError(f"Chunked reading is only supported for CSV files, not {extension}")
+        dialect = dialect or self.sniff_dialect(file_path)
+        chunks = pd.read_csv(file_path, **self.csv_options(dialect), chunksize=chunksize)
+        return (self._name_columns(chunk, dialect) for chunk in chunks)
+
+    def _string_values(self, values: pd.Series | list) -> pd.Series:
+        """
+        Reduce values to a Series of stripped, non-empty strings.
+
+        Non-string values are dropped, mirroring the per-value checks which
+        only ever counted strings.
+
+        Args:
+            values: Series or list of raw column values
+
+        Returns:
+            Series containing only the candidate string values
+        """
+        if not isinstance(values, pd.Series):
+            values = pd.Series(values, dtype=object)
+        values = values.dropna()
+
+        # Only mixed object columns need the (slower) per-value type filter
+        if pd.api.types.infer_dtype(values, skipna=True) != 'string':
+            values = values[values.map(type) == str]
+
+        values = values.astype(str).str.strip()
+        return values[values != '']
+
+    def _boolean_ratio(self, text: pd.Series) -> float:
+        """Share of string values that spell a boolean."""
+        if text.empty:
+            return 1.0
+        return float(text.str.lower().isin(BOOLEAN_VALUES).mean())
+
+    def _integer_ratio(self, text: pd.Series) -> float:
+        """Share of string values that parse as an integer."""
+        if text.empty:
+            return 1.0
+        return float(text.str.fullmatch(INTEGER_PATTERN).mean())
+
+    def _float_ratio(self, text: pd.Series) -> float:
+        """Share of string values that parse as a float."""
+        if text.empty:
+            return 1.0
+        return float(pd.to_numeric(text, errors='coerce').notna().mean())
+
+    def compute_match_ratios(self, values: pd.Series | list) -> dict[str, float]:
+        """
+        Compute the match ratio of every candidate type for a set of values.
+
+        All checks are vectorized over the whole Series, so this can be run
+        against full columns rather than small samples.
+
+        Args:
+            values: Series or list of raw column values
+
+        Returns:
+            Dictionary mapping candidate dtypes to the share of values matching
+        """
+        text = self._string_values(values)
+        return {
+            'bool': self._boolean_ratio(text),
+            'int64': self._integer_ratio(text),
+            'float64': self._float_ratio(text),
+        }
+
     def check_if_boolean(self, samples: list[str]) -> bool:
         """
         Check if a string value from a list is representing a boolean.
@@ -67,26 +536,32 @@ class InferenceEngine:
         Returns:
             True if the list contains booleans, False otherwise.
         """
-        bool_values = {'true', 'false', 't', 'f', 
-        'yes', 'no', 'y', 
-        'n', '1', '0'}
+        return self._boolean_ratio(self._string_values(samples)) >= MATCH_THRESHOLD
 
-        valid_count = 0
-        total_non_null = 0
-        for value in samples:
-            if value and isinstance(value, str):
-                if value.lower() in bool_values:
-                    valid_count += 1
-                total_non_null += 1
+    def count_distinct(self, values: pd.Series) -> tuple[int, bool]:
+        """
+        Count the distinct values of a column, estimating it for long columns.
+
+        Args:
+            values: Non-null column values
 
-        return valid_count >= 0.8 * total_non_null
+        Returns:
+            Tuple of the distinct count and whether it is exact
+        """
+        if self.exact_distinct_max_rows is None or len(values) <= self.exact_distinct_max_rows:
+            return values.nunique(dropna=False), True
+
+        sketch = HyperLogLog.for_error(self.distinct_error)
+        sketch.add(values)
+        return sketch.count(), False
 
-    def check_if_categorical(self, series: pd.Series) -> bool:
+    def check_if_categorical(self, series: pd.Series, unique_count: int | None = None) -> bool:
         """
         Check if a Pandas Series is categorical.
 
         Args:
             series: Pandas Series
+            unique_count: Number of distinct values, if already known
 
         Returns:
             True if the series is categorical, False otherwise.
@@ -94,7 +569,7 @@ class InferenceEngine:
         if series.dtype != 'object':
             return False
 
-        unique_values = series.nunique()
+        unique_values = self.count_distinct(series.dropna())[0] if unique_count is None else unique_count
         total_values = len(series)
          
         if unique_values / total_values < 0.05 or unique_values < 20:
@@ -112,20 +587,12 @@ class InferenceEngine:
             True if the list contains dates, False otherwise.
         """
 
-        date_patterns = [
-            r'\d{4}-\d{1,2}-\d{1,2}',  # YYYY-MM-DD
-            r'\d{1,2}/\d{1,2}/\d{2,4}',  # MM/DD/YY or MM/DD/YYYY
-            r'\d{1,2}-\d{1,2}-\d{2,4}',  # MM-DD-YY or MM-DD-YYYY
-            r'\d{1,2}\s+[A-Za-z]{3,9}\s+\d{2,4}',  # DD Month YYYY
-            r'[A-Za-z]{3,9}\s+\d{1,2},?\s+\d{2,4}'  # Month DD, YYYY
-        ]
-
         valid_count = 0
         total_non_null = 0
         for value in samples:
             if value and isinstance(value, str):
                 total_non_null += 1
-                if any(re.match(pattern, value) for pattern in date_patterns):
+                if any(pattern.match(value) for pattern in DATE_PATTERNS):
                     valid_count += 1
                 else:
                     try:
@@ -134,7 +601,50 @@ class InferenceEngine:
                     except (ValueError, TypeError):
                         pass
 
-        return valid_count >= 0.8 * total_non_null
+        return valid_count >= MATCH_THRESHOLD * total_non_null
+
+    def infer_date_format(self, values: pd.Series | list) -> str | None:
+        """
+        Find the strftime format that the dates in a column are written in.
+
+        Candidate formats are guessed from a few values and shortlisted on a
+        small sample, then the best one is validated against all values with
+        a single vectorized pd.to_datetime call.
+
+        Args:
+            values: Series or list of raw column values
+
+        Returns:
+            The matching format, or None if no single format fits the values
+        """
+        text = self._string_values(values)
+        if text.empty:
+            return None
+
+        sample = text.head(DATE_FORMAT_SAMPLE_SIZE)
+        with warnings.catch_warnings():
+            # Day-first guesses are expected here; the shortlist settles ambiguity
+            warnings.simplefilter('ignore', UserWarning)
+            guessed = [guess_datetime_format(value) for value in sample.drop_duplicates().head(5)]
+        candidates = list(dict.fromkeys(fmt for fmt in guessed + DATE_FORMATS if fmt))
+
+        shortlist = []
+        for fmt in candidates:
+            ratio = pd.to_datetime(sample, format=fmt, errors='coerce').notna().mean()
+            if ratio >= MATCH_THRESHOLD:
+                shortlist.append((ratio, fmt))
+        if not shortlist:
+            return None
+
+        # Stable sort keeps guessed formats ahead of equally good fallbacks
+        shortlist.sort(key=lambda item: item[0], reverse=True)
+        for _, fmt in shortlist:
+            if len(text) == len(sample):
+                return fmt
+            ratio = pd.to_datetime(text, format=fmt, errors='coerce').notna().mean()
+            if ratio >= MATCH_THRESHOLD:
+                return fmt
+        return None
 
     def check_if_float(self, samples: list[str]) -> bool:
         """
@@ -146,18 +656,7 @@ class InferenceEngine:
         Returns:
             True if the list contains floats, False otherwise.
         """
-        value_count = 0
-        total_non_null = 0
-        for value in samples:
-            if value and isinstance(value, str):
-                total_non_null += 1
-                try:
-                    float(value)
-                    value_count += 1
-                except ValueError:
-                    pass
-
-        return value_count >= 0.8 * total_non_null
+        return self._float_ratio(self._string_values(samples)) >= MATCH_THRESHOLD
 
     def check_if_integer(self, samples: list[str]) -> bool:
         """
@@ -170,18 +669,85 @@ class InferenceEngine:
             True if the list contains integers, False otherwise.
         
         """
-        valid_count = 0
-        total_non_null = 0
-        for value in samples:
-            if value and isinstance(value, str):
-                total_non_null += 1
-                try:
-                    int(value)
-                    valid_count += 1
-                except ValueError:
-                    pass
+        return self._integer_ratio(self._string_values(samples)) >= MATCH_THRESHOLD
+
+    def sample_column(self, values: pd.Series) -> tuple[pd.Series, dict[str, float]]:
+        """
+        Sample the values of a column and compute their match ratios.
+
+        Columns whose ratios sit within ESCALATION_MARGIN of the threshold are
+        resampled with a larger sample until the decision is clear or the
+        maximum sample size is reached.
 
-        return valid_count >= 0.8*total_non_null
+        Args:
+            values: Non-null column values
+
+        Returns:
+            Tuple of the final sample and its match ratios
+        """
+        size = self.sample_size
+        sample = self.sampler.sample(values, size)
+        ratios = self.compute_match_ratios(sample)
+
+        limit = len(values) if self.max_sample_size is None else min(self.max_sample_size, len(values))
+        while len(sample) < limit and any(abs(ratio - MATCH_THRESHOLD) < ESCALATION_MARGIN for ratio in ratios.values()):
+            size = min(len(sample) * ESCALATION_FACTOR, limit)
+            sample = self.sampler.sample(values, size)
+            ratios = self.compute_match_ratios(sample)
+
+        return sample, ratios
+
+    def infer_column_type(self, series: pd.Series, statistics: dict | None = None) -> str:
+        """
+        Infer the data type of a single column.
+
+        The registered detectors are evaluated from cheapest to most
+        expensive, see DetectorRegistry.detect. Details such as the date
+        format, the sample size and the confidence of the decision are
+        recorded in column_details.
+
+        Args:
+            series: Column to analyze
+            statistics: Output of column_statistics for the column, if already computed
+
+        Returns:
+            Inferred data type
+        """
+        column = series.name
+
+        # Accept correctly typed columns
+        if series.dtype != 'object':
+            return str(series.dtype)
+
+        values = statistics['values'] if statistics else series.dropna()
+
+        # Infer all null value columns as 'object'
+        if values.empty:
+            return 'object'
+
+        # Types remembered for the same schema only need confirming on a small sample
+        hint = self.schema_hint.get(column)
+        if hint is not None:
+            inferred_type = self.reuse_cached_type(series, values, hint, statistics)
+            if inferred_type is not None:
+                return inferred_type
+
+        with metrics.detector(column, 'match_ratios'):
+            sample, ratios = self.sample_column(values)
+        details = self.column_details[column] = {'sample_size': len(sample)}
+
+        context = ColumnContext(self, series, values, sample, ratios, MATCH_THRESHOLD, statistics)
+        detector, result = self.detectors.detect(context)
+        if detector is None:
+            # Text columns are as certain as the closest rejected type allows
+            result = {'ratio': max(ratios.values())}
+
+        ratio = result.pop('ratio', None)
+        details.update(result)
+        if ratio is not None:
+            details['confidence'] = decision_confidence(ratio, MATCH_THRESHOLD, len(sample), len(values))
+
+        return detector.dtype if detector is not None else 'object'
 
     def infer_column_types(self, df: pd.DataFrame) -> dict[str, str]:
         """
@@ -193,94 +759,447 @@ class InferenceEngine:
         Returns:
             Dictionary mapping column names to inferred data types
         """
-        inferred_types = {}
+        self.column_details = {}
+        fingerprint = self.lookup_schema(df)
 
-        for column in df.columns:
-            series = df[column]
+        if self.runs_in_parallel(df):
+            inferred_types = map_columns(self, df, 'infer_column_type')
+        else:
+            inferred_types = [self.infer_column_type(df[column]) for column in df.columns]
 
-            # Accept correctly typed columns
-            if series.dtype != 'object':
-                inferred_types[column] = str(series.dtype)
-                continue
+        inferred_types = dict(zip(df.columns, inferred_types))
+        self.remember_schema(fingerprint, inferred_types)
+        return inferred_types
 
-            # Infer all null value columns as 'object'
-            if series.isna().all():
-                inferred_types[column] = 'object'
-                continue
+    def _value_signature(self, series: pd.Series) -> tuple[str, ...]:
+        """
+        Describe the shape of the first values of a column, e.g. '9-9-9' for '2024-01-31'.
 
-            samples = series.dropna().head(100 if len(series) > 100 else len(series)).tolist()
+        Runs of letters become 'a' and runs of digits '9', other characters are kept.
+        """
+        values = series.head(SIGNATURE_ROWS).dropna().head(SIGNATURE_VALUES)
+        return tuple(re.sub(r'\d+', '9', re.sub(r'[^\W\d_]+', 'a', str(value))) for value in values)
 
-            # Check for the boolean columns
-            if self.check_if_boolean(samples):
-                inferred_types[column] = 'bool'
-                continue
+    def schema_fingerprint(self, df: pd.DataFrame) -> tuple:
+        """
+        Fingerprint the schema of a DataFrame from its columns and the shapes of their values.
 
-            # Check for numeric column
-            if self.check_if_integer(samples):
-                inferred_types[column] = 'int64'
-                continue
-            elif self.check_if_float(samples):
-                inferred_types[column] = 'float64'
-                continue
+        Args:
+            df: DataFrame, or the first chunk of a file
 
-            # Check for date values
-            if self.check_if_date(samples):
-                inferred_types[column] = 'datetime64[ns]'
-                continue
+        Returns:
+            Hashable fingerprint
+        """
+        return tuple((column, str(df[column].dtype), self._value_signature(df[column])) for column in df.columns)
 
-            # Check for categorical values
-            if self.check_if_categorical(series):
-                inferred_types[column] = 'category'
-                continue
+    def lookup_schema(self, df: pd.DataFrame) -> tuple | None:
+        """
+        Load the column types remembered for the schema of a DataFrame into schema_hint.
+
+        Args:
+            df: DataFrame, or the first chunk of a file
+
+        Returns:
+            Fingerprint to pass to remember_schema, or None without a schema cache
+        """
+        self.schema_hint = {}
+        if self.schema_cache is None:
+            return None
+        fingerprint = self.schema_fingerprint(df)
+        self.schema_hint = self.schema_cache.get(fingerprint, {})
+        return fingerprint
+
+    def remember_schema(self, fingerprint: tuple | None, inferred_types: dict[str, str],
+                        date_formats: dict[str, str] | None = None):
+        """
+        Store the inferred column types of a schema in the schema cache.
+
+        Args:
+            fingerprint: Output of lookup_schema
+            inferred_types: Dictionary mapping column names to inferred data types
+            date_formats: Dictionary mapping date columns to their formats.
+                Taken from column_details if not given.
+        """
+        # The hint only applies to the DataFrame it was looked up for
+        self.schema_hint = {}
+        if fingerprint is None:
+            return
+        if date_formats is None:
+            date_formats = {column: details.get('date_format') for column, details in self.column_details.items()}
+        self.schema_cache.set(fingerprint, {
+            column: {'type': inferred_type, 'date_format': date_formats.get(column)}
+            for column, inferred_type in inferred_types.items()
+        })
+
+    def check_cached_type(self, sample: pd.Series, inferred_type: str, date_format: str | None = None) -> bool:
+        """
+        Check that a type remembered for a column still fits a sample of its values.
+
+        Text types only check that no narrower type matches; whether text is
+        categorical is decided by the caller.
+
+        Args:
+            sample: Non-null values of the column
+            inferred_type: Remembered type
+            date_format: Remembered date format, for date columns
+
+        Returns:
+            True if the sample is consistent with the remembered type
+        """
+        ratios = self.compute_match_ratios(sample)
+        if inferred_type in ratios:
+            return ratios[inferred_type] >= MATCH_THRESHOLD
+        if max(ratios.values()) >= MATCH_THRESHOLD:
+            return False
+        if inferred_type == 'datetime64[ns]':
+            if date_format is None:
+                return self.check_if_date(sample.tolist())
+            text = self._string_values(sample)
+            return pd.to_datetime(text, format=date_format, errors='coerce').notna().mean() >= MATCH_THRESHOLD
+        return inferred_type in ('category', 'object')
+
+    def reuse_cached_type(self, series: pd.Series, values: pd.Series, hint: dict,
+                          statistics: dict | None = None) -> str | None:
+        """
+        Reuse the type remembered for a column if a small sample confirms it.
+
+        Args:
+            series: Column to analyze
+            values: Non-null values of the column
+            hint: Remembered 'type' and 'date_format' of the column
+            statistics: Output of column_statistics for the column, if already computed
+
+        Returns:
+            The column type, or None if the remembered type no longer fits
+        """
+        with metrics.detector(series.name, 'schema_cache'):
+            sample = self.sampler.sample(values, SCHEMA_CHECK_SAMPLE_SIZE)
+            if not self.check_cached_type(sample, hint['type'], hint['date_format']):
+                return None
+
+            inferred_type = hint['type']
+            if inferred_type in ('category', 'object'):
+                unique_count = statistics['unique_count'] if statistics else None
+                inferred_type = 'category' if self.check_if_categorical(series, unique_count) else 'object'
+
+        details = self.column_details[series.name] = {'sample_size': len(sample), 'cached': True}
+        if inferred_type == 'datetime64[ns]' and hint['date_format']:
+            details['date_format'] = hint['date_format']
+        return inferred_type
+
+    def _smallest_integer_dtype(self, low: int, high: int, nullable: bool = False) -> str:
+        """
+        Pick the narrowest integer dtype holding every value between low and high.
+
+        Args:
+            low: Smallest value
+            high: Largest value
+            nullable: Whether to return a pandas nullable integer dtype
+
+        Returns:
+            Name of the dtype
+        """
+        candidates = ['uint8', 'uint16', 'uint32', 'uint64'] if low >= 0 else ['int8', 'int16', 'int32', 'int64']
+        for dtype in candidates:
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                break
+        # Nullable dtypes are spelled with a capital, as in 'Int8' or 'UInt16'
+        return dtype.replace('u', 'U').replace('i', 'I') if nullable else dtype
+
+    def downcast_column(self, series: pd.Series, inferred_type: str | None = None) -> pd.Series:
+        """
+        Store a column in the smallest dtype that keeps all of its values.
+
+        Integers move to the narrowest (unsigned) integer dtype, whole-number
+        floats of integer columns become nullable integers, other floats become
+        float32 when every value survives the round trip, and low-cardinality
+        text is dictionary-encoded as a category.
+
+        Args:
+            series: Column to shrink
+            inferred_type: Inferred type of the column, if known
+
+        Returns:
+            The column in its smallest safe dtype
+        """
+        values = series.dropna()
+        if values.empty or isinstance(series.dtype, pd.CategoricalDtype):
+            return series
+
+        kind = series.dtype.kind
+        if kind in 'iu':
+            nullable = isinstance(series.dtype, pd.api.extensions.ExtensionDtype)
+            return series.astype(self._smallest_integer_dtype(values.min(), values.max(), nullable))
+
+        if kind == 'f':
+            if inferred_type == 'int64' and (values % 1 == 0).all() and np.iinfo('int64').min <= values.min() and values.max() <= np.iinfo('int64').max:
+                return series.astype(self._smallest_integer_dtype(int(values.min()), int(values.max()), nullable=True))
+            # float32 must print back to the same float64, not merely come close to it
+            narrowed = values.to_numpy(dtype='float64').astype('float32')
+            if np.array_equal(narrowed.astype(str).astype('float64'), values.to_numpy(dtype='float64')):
+                return series.astype('float32')
+            return series
+
+        if series.dtype == 'object' and values.nunique() < len(series) * CATEGORY_MAX_UNIQUE_RATIO:
+            return series.astype('category')
+
+        return series
+
+    def memory_report(self, before: dict, after: dict) -> dict:
+        """
+        Compare per-column memory usage before and after a conversion.
+
+        Args:
+            before: Output of get_dataframe_info before conversion
+            after: Output of get_dataframe_info after conversion
+
+        Returns:
+            Dictionary with total and per-column bytes before and after
+        """
+        after_columns = {col['name']: col for col in after['columns']}
+        return {
+            'bytes_before': before['memory_usage_bytes'],
+            'bytes_after': after['memory_usage_bytes'],
+            'bytes_saved': before['memory_usage_bytes'] - after['memory_usage_bytes'],
+            'columns': [
+                {
+                    'name': col['name'],
+                    'type_before': col['current_type'],
+                    'type_after': after_columns[col['name']]['current_type'],
+                    'bytes_before': col['memory_usage_bytes'],
+                    'bytes_after': after_columns[col['name']]['memory_usage_bytes'],
+                }
+                for col in before['columns']
+            ]
+        }
+
+    def _to_boolean(self, series: pd.Series) -> pd.Series:
+        """
+        Convert the spellings in BOOLEAN_MAP to a nullable boolean column.
+
+        Only the distinct values are normalized and looked up. Every row is
+        then mapped through its factorized code in a single take.
 
-        return inferred_types 
+        Args:
+            series: Column to convert
+
+        Returns:
+            Column of 'boolean' dtype, null where a value is not a boolean
+        """
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        lookup = pd.Series(uniques, dtype=object).astype(str).str.strip().str.lower().map(BOOLEAN_MAP)
+        known = np.append(lookup.notna().to_numpy(), False)
+        values = np.append(lookup.eq(True).to_numpy(), False)
+        # Nulls have code -1, which picks the trailing unknown entry
+        return pd.Series(pd.arrays.BooleanArray(values[codes], ~known[codes]), index=series.index, name=series.name)
+
+    def _to_integer(self, series: pd.Series) -> pd.Series:
+        """
+        Convert a column to int64, or to nullable Int64 when values are missing.
+
+        Args:
+            series: Column to convert
+
+        Text is cast straight from its digits, since parsing it as float64
+        first would round integers beyond 2**53. Values that are not written
+        as integers, or do not fit in int64, become null.
+
+        Returns:
+            Integer column, null where a value is not a whole number
+        """
+        if series.dtype != 'object':
+            numbers = pd.to_numeric(series, errors='coerce')
+            if numbers.dtype.kind in 'iu':
+                return numbers.astype('int64')
+            numbers = numbers.where(numbers % 1 == 0)
+            return numbers.astype('int64' if numbers.notna().all() else 'Int64')
+
+        # Missing values turn into 'nan' or 'None', which do not match
+        text = series.astype(str).str.strip()
+        magnitude = text.str.lstrip('+-').str.lstrip('0')
+        fits = (magnitude.str.len() < len(INT64_MAX_DIGITS)) | (
+            (magnitude.str.len() == len(INT64_MAX_DIGITS)) & (magnitude <= INT64_MAX_DIGITS))
+        numbers = text.where(text.str.fullmatch(INTEGER_PATTERN) & fits).astype('Int64')
+        return numbers.astype('int64') if numbers.notna().all() else numbers
+
+    def convert_column(self, series: pd.Series, dtype: str, date_format: str | None = None,
+                       optimize_memory: bool = False) -> pd.Series:
+        """
+        Convert a single column to a data type.
+
+        Values that cannot be converted become nulls. Types with no coercing
+        conversion are cast directly and raise if any value does not fit.
+
+        Args:
+            series: Column to convert
+            dtype: Target pandas dtype
+            date_format: Known strftime format of a date column. Inferred if not given.
+            optimize_memory: Store the column in its smallest safe dtype
+
+        Returns:
+            The converted column
+        """
+        if dtype == 'datetime64[ns]':
+            if date_format is None and series.dtype == 'object':
+                date_format = self.infer_date_format(series)
+            converted = pd.to_datetime(series, format=date_format, errors='coerce')
+        elif dtype == 'category':
+            converted = series.astype('category')
+        elif dtype in ('bool', 'boolean'):
+            converted = self._to_boolean(series)
+        elif dtype == 'int64' and not optimize_memory:
+            converted = self._to_integer(series)
+        elif dtype in ('int64', 'float64'):
+            # Whole floats of integer columns are narrowed to integers by downcast_column
+            converted = pd.to_numeric(series, errors='coerce')
+            if not optimize_memory:
+                converted = converted.astype('float64')
+        else:
+            converted = series.astype(dtype)
+
+        if optimize_memory:
+            converted = self.downcast_column(converted, dtype)
+        return converted
 
-    def convert_column_types(self, df: pd.DataFrame, inferred_types: dict[str, str]) -> pd.DataFrame:
+    def convert_column_types(self, df: pd.DataFrame, inferred_types: dict[str, str],
+                             date_formats: dict[str, str] | None = None,
+                             optimize_memory: bool = False) -> pd.DataFrame:
         """
         Convert column types to the inferred data type
 
+        The DataFrame is copied shallowly and converted columns are replaced
+        rather than modified, so the data of unconverted columns is shared
+        with the input, which itself is left unchanged. The number of values
+        each column failed to convert is recorded in column_details under
+        'conversion_failures'.
+
         Args:
             df: Dataframe to convert
             inferred_types: Disctionary mapping column names to the inferred types
+            date_formats: Dictionary mapping date columns to known strftime formats.
+                Formats are inferred for date columns that are not listed.
+            optimize_memory: Store converted columns in their smallest safe dtype.
+                Values that fail to convert become nulls.
 
         Return:
             Dataframe with converted data types
         """
 
-        df_copy = df.copy()
+        date_formats = date_formats or {}
+        df_copy = df.copy(deep=False)
         for column, dtype in inferred_types.items():
             if column not in df_copy.columns:
                 logger.warning(f"Column {column} not found in DataFrame")
                 continue
             
+            series = df_copy[column]
             try:
-                if dtype == 'datetime64[ns]':
-                    df_copy[column] = pd.to_datetime(df_copy[column], errors='coerce')
-                
-                elif dtype == 'category':
-                    df_copy[column] = df_copy[column].astype('category')
-                
-                elif dtype == 'bool':
-                    # Handle various boolean representations
-                    bool_map = {'true': True, 'false': False, 'yes': True, 'no': False, 
-                                't': True, 'f': False, 'y': True, 'n': False, '1': True, '0': False}
-                    df_copy[column] = df_copy[column].apply(
-                        lambda x: bool_map.get(str(x).strip().lower(), None) 
-                        if pd.notnull(x) 
-                        else None
-                    )
-                
-                else:
-                    df_copy[column] = df_copy[column].astype(dtype)
-                
-                logger.info(f"Successfully converted column {column} to {dtype}")
-            
-            except Exception as e:
+                converted = self.convert_column(series, dtype, date_formats.get(column), optimize_memory)
+            except (ValueError, TypeError) as e:
+                # The column is kept unchanged and all of its values count as failed
                 logger.error(f"Error converting column {column} to {dtype}: {str(e)}")
-                # Keep the original column unchanged
+                self.column_details.setdefault(column, {})['conversion_failures'] = int(series.notna().sum())
+                continue
+            
+            failures = int((series.notna() & converted.isna()).sum())
+            self.column_details.setdefault(column, {})['conversion_failures'] = failures
+            df_copy[column] = converted
+            if failures:
+                logger.warning(f"Converted column {column} to {converted.dtype}, {failures} values became null")
+            else:
+                logger.info(f"Successfully converted column {column} to {converted.dtype}")
         
         return df_copy
 
+    def build_column_info(self, name: str, current_type: str, inferred_type: str, non_null_count: int,
+                          null_count: int, unique_count: int, sample_values: list,
+                          date_format: str | None = None, memory_usage_bytes: int = 0,
+                          sample_size: int | None = None, confidence: float | None = None,
+                          unique_count_exact: bool = True) -> dict:
+        """
+        Build the information dictionary reported for a single column.
+
+        Args:
+            name: Column name
+            current_type: Current pandas dtype of the column
+            inferred_type: Inferred pandas dtype of the column
+            non_null_count: Number of non-null values
+            null_count: Number of null values
+            unique_count: Number of distinct non-null values
+            sample_values: A few non-null values from the column
+            date_format: strftime format of date columns, if known
+            memory_usage_bytes: Memory taken up by the column values
+            sample_size: Number of values the type was inferred from
+            confidence: Estimated probability that the inferred type holds for
+                the whole column
+            unique_count_exact: Whether unique_count is exact or estimated
+
+        Returns:
+            Dictionary containing column information
+        """
+        return {
+            'name': name,
+            'current_type': current_type,
+            'current_display_type': self.dtype_display_mapping.get(current_type, current_type),
+            'inferred_type': inferred_type,
+            'inferred_display_type': self.dtype_display_mapping.get(inferred_type, inferred_type),
+            'non_null_count': int(non_null_count),
+            'null_count': int(null_count),
+            'unique_count': int(unique_count),
+            'unique_count_exact': unique_count_exact,
+            'sample_values': sample_values,
+            'date_format': date_format,
+            'memory_usage_bytes': int(memory_usage_bytes),
+            'sample_size': sample_size,
+            'confidence': confidence,
+        }
+
+    def column_statistics(self, series: pd.Series) -> dict:
+        """
+        Collect the statistics reported for a column from a single dropna pass.
+
+        Args:
+            series: Column to analyze
+
+        Returns:
+            Dictionary with the non-null values and the column statistics
+        """
+        values = series.dropna()
+        unique_count, unique_count_exact = self.count_distinct(values)
+        return {
+            'values': values,
+            'non_null_count': len(values),
+            'null_count': len(series) - len(values),
+            'unique_count': unique_count,
+            'unique_count_exact': unique_count_exact,
+            # Get sample values (excluding nulls)
+            'sample_values': values.head(5).tolist(),
+            'memory_usage_bytes': series.memory_usage(deep=True, index=False),
+        }
+
+    def profile_column(self, series: pd.Series) -> dict:
+        """
+        Infer the type of a column and collect its statistics.
+
+        Args:
+            series: Column to analyze
+
+        Returns:
+            Dictionary containing column information
+        """
+        column = series.name
+        statistics = self.column_statistics(series)
+        inferred_type = self.infer_column_type(series, statistics)
+        details = self.column_details.get(column, {})
+
+        return self.build_column_info(
+            column, str(series.dtype), inferred_type, statistics['non_null_count'], statistics['null_count'],
+            statistics['unique_count'], statistics['sample_values'], details.get('date_format'),
+            statistics['memory_usage_bytes'], details.get('sample_size'), details.get('confidence'),
+            statistics['unique_count_exact']
+        )
+
     def get_dataframe_info(self, df: pd.DataFrame) -> dict:
         """
         Get detailed information about a DataFrame.
@@ -292,41 +1211,14 @@ class InferenceEngine:
             Dictionary containing DataFrame information
         """
         
-        # Get memory usage before optimization
-        original_memory = df.memory_usage(deep=True).sum()
-        
-        # Infer column types
-        inferred_types = self.infer_column_types(df)
-        
-        # Get column information
-        columns_info = []
-        for column in df.columns:
-            non_null_count = df[column].count()
-            null_count = df[column].isna().sum()
-            unique_count = df[column].nunique()
-            
-            # Get sample values (excluding nulls)
-            sample_values = df[column].dropna().head(5).tolist()
-            
-            # Get current and inferred types with user-friendly names
-            current_type = str(df[column].dtype)
-            inferred_type = inferred_types[column]
-            
-            # Map to display names
-            current_display_type = self.dtype_display_mapping.get(current_type, current_type)
-            inferred_display_type = self.dtype_display_mapping.get(inferred_type, inferred_type)
-            
-            columns_info.append({
-                'name': column,
-                'current_type': current_type,
-                'current_display_type': current_display_type,
-                'inferred_type': inferred_type,
-                'inferred_display_type': inferred_display_type,
-                'non_null_count': int(non_null_count),
-                'null_count': int(null_count),
-                'unique_count': int(unique_count),
-                'sample_values': sample_values
-            })
+        # Infer column types and collect column information
+        self.column_details = {}
+        fingerprint = self.lookup_schema(df)
+        if self.runs_in_parallel(df):
+            columns_info = map_columns(self, df, 'profile_column')
+        else:
+            columns_info = [self.profile_column(df[column]) for column in df.columns]
+        self.remember_schema(fingerprint, {col['name']: col['inferred_type'] for col in columns_info})
         
         # Get dataframe shape
         rows, cols = df.shape
@@ -334,29 +1226,135 @@ class InferenceEngine:
         return {
             'total_rows': rows,
             'total_columns': cols,
-            'memory_usage_bytes': int(original_memory),
+            'memory_usage_bytes': self._memory_usage(df, columns_info),
+            'columns': columns_info
+        }
+
+    def _memory_usage(self, df: pd.DataFrame, columns_info: list[dict]) -> int:
+        """Total memory of a DataFrame from the per-column figures and its index."""
+        return int(df.index.memory_usage(deep=True) + sum(col['memory_usage_bytes'] for col in columns_info))
+
+    def update_dataframe_info(self, info_dict: dict, df: pd.DataFrame, columns: list[str]) -> dict:
+        """
+        Refresh the information of the given columns after they were converted.
+
+        Inferred types and date formats are kept, the statistics of all other
+        columns are reused as they are. Converted columns report the number
+        of values that failed to convert as 'conversion_failures'.
+
+        Args:
+            info_dict: Output of get_dataframe_info for the DataFrame before conversion
+            df: Converted DataFrame
+            columns: Names of the columns that were converted
+
+        Returns:
+            Updated dictionary containing DataFrame information
+        """
+        columns_info = []
+        for col_info in info_dict['columns']:
+            column = col_info['name']
+            if column in columns:
+                series = df[column]
+                statistics = self.column_statistics(series)
+                col_info = self.build_column_info(
+                    column, str(series.dtype), col_info['inferred_type'], statistics['non_null_count'],
+                    statistics['null_count'], statistics['unique_count'], statistics['sample_values'],
+                    col_info['date_format'], statistics['memory_usage_bytes'],
+                    col_info['sample_size'], col_info['confidence'], statistics['unique_count_exact']
+                )
+                failures = self.column_details.get(column, {}).get('conversion_failures')
+                if failures is not None:
+                    col_info['conversion_failures'] = failures
+            columns_info.append(col_info)
+
+        return {
+            **info_dict,
+            'memory_usage_bytes': self._memory_usage(df, columns_info),
             'columns': columns_info
         }
 
-    def process_file(self, file_path:str, convert_to_inferred_type:bool = False) -> tuple[pd.DataFrame, dict]:
+    def process_file(self, file_path:str, convert_to_inferred_type:bool = False,
+                     optimize_memory:bool = False, sheet: int | str = 0) -> tuple[pd.DataFrame, dict]:
         """
         Process a data file to infer datatypes of the columns
         Attempt to convert them to the appropriate inferred type
 
         Args:
             file_path: Path to the data file
+            convert_to_inferred_type: Convert columns to their inferred types
+            optimize_memory: Convert every column to its smallest safe dtype and
+                report the memory saved under 'memory_optimization'
+            sheet: Sheet name or position processed from Excel workbooks
             
         Returns:
             Tuple containing the processed DataFrame and information dictionary
         """
 
-        df = self.read_file(file_path)
-        info_dict = self.get_dataframe_info(df)
+        with metrics.stage('read_file') as stage:
+            df = self.read_file(file_path, sheet)
+            stage.rows = len(df)
+            stage.bytes = os.path.getsize(file_path)
+        return self.process_dataframe(df, convert_to_inferred_type, optimize_memory)
+
+    def process_workbook(self, file_path: str, convert_to_inferred_type: bool = False,
+                         optimize_memory: bool = False) -> dict[str, tuple[pd.DataFrame, dict]]:
+        """
+        Process every worksheet of an Excel workbook separately.
+
+        Args:
+            file_path: Path to the workbook
+            convert_to_inferred_type: Convert columns to their inferred types
+            optimize_memory: Convert every column to its smallest safe dtype
+
+        Returns:
+            Dictionary mapping sheet names to the processed DataFrame and
+            information dictionary of the sheet
+        """
+        return {
+            sheet: self.process_dataframe(df, convert_to_inferred_type, optimize_memory)
+            for sheet, df in self.read_workbook(file_path).items()
+        }
+
+    def process_dataframe(self, df: pd.DataFrame, convert_to_inferred_type: bool = False,
+                          optimize_memory: bool = False, info_dict: dict | None = None) -> tuple[pd.DataFrame, dict]:
+        """
+        Infer the column types of a DataFrame that was already read.
+
+        Args:
+            df: DataFrame to process
+            convert_to_inferred_type: Convert columns to their inferred types
+            optimize_memory: Convert every column to its smallest safe dtype and
+                report the memory saved under 'memory_optimization'
+            info_dict: Information already collected for the DataFrame, for
+                example while it was parsed. Inference is skipped if given.
+
+        Returns:
+            Tuple containing the processed DataFrame and information dictionary
+        """
+        if info_dict is None:
+            with metrics.stage('profile') as stage:
+                info_dict = self.get_dataframe_info(df)
+                stage.rows = len(df)
 
         if convert_to_inferred_type:
-            inferred_types = {col['name']: col['inferred_type'] for col in info_dict['columns']}
-            df = self.convert_column_types(df, inferred_types)
-            # Update info after conversion
-            info_dict = self.get_dataframe_info(df)
+            with metrics.stage('convert') as stage:
+                # Columns that already have their inferred type are left alone
+                inferred_types = {col['name']: col['inferred_type'] for col in info_dict['columns']
+                                  if col['inferred_type'] != col['current_type']}
+                date_formats = {col['name']: col['date_format'] for col in info_dict['columns'] if col['date_format']}
+                df = self.convert_column_types(df, inferred_types, date_formats)
+                # Update info of the converted columns only
+                info_dict = self.update_dataframe_info(info_dict, df, list(inferred_types))
+                stage.rows = len(df)
+        
+        if optimize_memory:
+            with metrics.stage('optimize_memory') as stage:
+                inferred_types = {col['name']: col['inferred_type'] for col in info_dict['columns']}
+                date_formats = {col['name']: col['date_format'] for col in info_dict['columns'] if col['date_format']}
+                optimized_df = self.convert_column_types(df, inferred_types, date_formats, optimize_memory=True)
+                optimized_info = self.update_dataframe_info(info_dict, optimized_df, list(inferred_types))
+                optimized_info['memory_optimization'] = self.memory_report(info_dict, optimized_info)
+                df, info_dict = optimized_df, optimized_info
+                stage.rows = len(df)
         
         return df, info_dict
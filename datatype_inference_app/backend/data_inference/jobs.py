@@ -0,0 +1,215 @@
+# data_inference/jobs.py
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import OperationalError, close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import InferenceJob
+from .infer_data_type import ENGINE_VERSION
+from .services import create_engine, discard_upload, process_upload
+
+logger = logging.getLogger(__name__)
+
+# Local worker pool, so no broker is needed: job state lives in the database
+executor = ThreadPoolExecutor(max_workers=settings.INFERENCE_JOB_WORKERS, thread_name_prefix='inference-job')
+_submit_lock = threading.Lock()
+
+# Attempts at a job status write while the database reports being locked,
+# waiting twice as long before each new attempt
+STATUS_WRITE_ATTEMPTS = 5
+STATUS_WRITE_DELAY = 0.1
+# Status writes of this process's worker threads, made one at a time
+_status_lock = threading.Lock()
+
+# Jobs still to be run or finished
+PENDING_STATUSES = [InferenceJob.STATUS_QUEUED, InferenceJob.STATUS_RUNNING]
+
+# Tells this server's processes apart from those of earlier boots reusing a pid
+BOOT_ID = uuid.uuid4().hex[:8]
+
+# Jobs this process has submitted and not finished, whose heartbeat it writes
+_active_jobs = set()
+_heartbeat_lock = threading.Lock()
+_heartbeat_pid = None
+
+
+class QueueFull(Exception):
+    """Raised when too many jobs are already waiting to run."""
+
+
+def worker_id() -> str:
+    """Identify the process running jobs, which differs in each forked server worker."""
+    return f"{socket.gethostname()}:{os.getpid()}:{BOOT_ID}"
+
+
+def fail_orphaned_jobs() -> int:
+    """
+    Fail the jobs whose process went away while they were queued or running.
+
+    The process running a job writes a heartbeat on it, so jobs of live
+    processes, e.g. sibling server workers, are left alone. Jobs without a
+    recent heartbeat would otherwise never finish and keep counting toward
+    INFERENCE_JOB_MAX_QUEUE.
+
+    Returns:
+        Number of jobs marked as failed
+    """
+    stale = timezone.now() - timedelta(seconds=settings.INFERENCE_JOB_STALE_SECONDS)
+    # Jobs created before heartbeats were written count from their creation
+    return InferenceJob.objects.filter(
+        Q(heartbeat_date__lt=stale) | Q(heartbeat_date__isnull=True, created_date__lt=stale),
+        status__in=PENDING_STATUSES,
+    ).update(
+        status=InferenceJob.STATUS_FAILED, error="Interrupted: the server process running the job stopped",
+        finished_date=timezone.now()
+    )
+
+
+def _heartbeat():
+    """Keep the jobs of this process alive and fail those of processes that are gone."""
+    while True:
+        time.sleep(settings.INFERENCE_JOB_HEARTBEAT_SECONDS)
+        close_old_connections()
+        try:
+            with _heartbeat_lock:
+                job_ids = list(_active_jobs)
+            if job_ids:
+                _record_status(job_ids, heartbeat_date=timezone.now())
+            fail_orphaned_jobs()
+        except Exception:
+            logger.exception("Writing job heartbeats failed")
+        finally:
+            close_old_connections()
+
+
+def _start_heartbeat():
+    """Start the heartbeat thread of this process, once per forked worker."""
+    global _heartbeat_pid
+    with _heartbeat_lock:
+        if _heartbeat_pid != os.getpid():
+            _heartbeat_pid = os.getpid()
+            threading.Thread(target=_heartbeat, name='inference-job-heartbeat', daemon=True).start()
+
+
+def submit_job(file_path: str, file_name: str, file_size: int, apply_types: bool,
+               content_hash: str, output_format: str = 'csv', optimize_memory: bool = False,
+               sheet: str | None = None) -> InferenceJob:
+    """
+    Queue a saved upload for processing on the worker pool.
+
+    Args:
+        file_path: Path of the saved upload
+        file_name: Original name of the uploaded file
+        file_size: Size of the upload in bytes
+        apply_types: Whether to convert columns to their inferred types
+        content_hash: SHA-256 of the file content
+        output_format: Format the converted file is written in
+        optimize_memory: Whether to shrink columns to their smallest safe dtypes
+        sheet: Worksheet processed from Excel uploads
+
+    Returns:
+        The queued job
+    """
+    _start_heartbeat()
+    with _submit_lock:
+        fail_orphaned_jobs()
+        queued = InferenceJob.objects.filter(status=InferenceJob.STATUS_QUEUED).count()
+        if queued >= settings.INFERENCE_JOB_MAX_QUEUE:
+            raise QueueFull(f"{queued} jobs are already queued, try again later")
+        
+        job = InferenceJob.objects.create(
+            file_name=file_name,
+            file_path=file_path,
+            file_size=file_size,
+            content_hash=content_hash,
+            apply_types=apply_types,
+            output_format=output_format,
+            optimize_memory=optimize_memory,
+            sheet_name=sheet,
+            worker_id=worker_id(),
+            heartbeat_date=timezone.now()
+        )
+    
+    with _heartbeat_lock:
+        _active_jobs.add(job.id)
+    executor.submit(run_job, job.id)
+    return job
+
+
+def _record_status(job_ids: int | list[int], **fields) -> bool:
+    """
+    Write status fields of pending jobs, retrying while the database is locked.
+
+    SQLite lets one connection write at a time, so writes of concurrent jobs
+    can fail with "database is locked" and would otherwise leave the job in
+    its previous status. Jobs that finished, or were failed as orphaned, are
+    not written, so their outcome never changes once reported.
+
+    Args:
+        job_ids: Primary key of the job, or a list of them
+        **fields: Field values to write
+
+    Returns:
+        Whether any job was still pending and written
+    """
+    if isinstance(job_ids, int):
+        job_ids = [job_ids]
+    for attempt in range(STATUS_WRITE_ATTEMPTS):
+        try:
+            with _status_lock:
+                return InferenceJob.objects.filter(pk__in=job_ids, status__in=PENDING_STATUSES).update(**fields) > 0
+        except OperationalError as e:
+            if attempt == STATUS_WRITE_ATTEMPTS - 1:
+                raise
+            logger.warning(f"Writing the status of jobs {job_ids} failed, retrying: {e}")
+            time.sleep(STATUS_WRITE_DELAY * 2 ** attempt)
+
+
+def run_job(job_id: int):
+    """
+    Process a queued upload and record the outcome on the job.
+
+    Every failure, including one to load the job or mark it as running, is
+    recorded as the job's outcome, so a job never stays running.
+
+    Args:
+        job_id: Primary key of the job to run
+    """
+    close_old_connections()
+    job = None
+    try:
+        try:
+            job = InferenceJob.objects.get(pk=job_id)
+            if not _record_status(job_id, status=InferenceJob.STATUS_RUNNING, started_date=timezone.now()):
+                logger.warning(f"Job {job_id} was failed as orphaned before it started")
+                return
+            cache_key = (job.content_hash, ENGINE_VERSION, job.apply_types, job.output_format,
+                         job.optimize_memory, job.sheet_name)
+            result = process_upload(
+                create_engine(), job.file_path, job.file_name, job.file_size, job.apply_types,
+                cache_key, job.output_format, job.optimize_memory, sheet=job.sheet_name
+            )
+            outcome = {'status': InferenceJob.STATUS_DONE, 'result': result, 'processed_file_id': result['file_id']}
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            outcome = {'status': InferenceJob.STATUS_FAILED, 'error': str(e)}
+        
+        _record_status(job_id, **outcome, finished_date=timezone.now())
+        # An upload that failed is not read again
+        if outcome['status'] == InferenceJob.STATUS_FAILED and job is not None:
+            discard_upload(job.file_path)
+    except Exception:
+        logger.exception(f"Recording the outcome of job {job_id} failed")
+    finally:
+        with _heartbeat_lock:
+            _active_jobs.discard(job_id)
+        close_old_connections()
@@ -0,0 +1,216 @@
+# Timing and volume metrics of the processing stages
+
+import contextvars
+import threading
+import time
+
+from collections import defaultdict
+
+# Metrics recorded by the registry: name -> (label name, help text)
+METRICS = {
+    'inference_request_seconds': ('action', 'Time spent handling API requests'),
+    'inference_stage_seconds': ('stage', 'Time spent in each processing stage'),
+    'inference_detector_seconds': ('detector', 'Time spent in each type detector'),
+}
+
+# Timings of the current request, set by collect_timings
+_current_timings = contextvars.ContextVar('inference_timings', default=None)
+
+
+class _Timer:
+    """
+    Times a block and records it in the registry and the current timings.
+
+    Rows and bytes processed by the block can be set on the timer inside it.
+    """
+
+    __slots__ = ('registry', 'metric', 'label', 'timings', 'path', 'rows', 'bytes', 'start')
+
+    def __init__(self, registry: 'MetricsRegistry', metric: str, label: str,
+                 timings: dict | None, path: tuple[str, ...]):
+        self.registry = registry
+        self.metric = metric
+        self.label = label
+        self.timings = timings
+        self.path = path
+        self.rows = None
+        self.bytes = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.perf_counter() - self.start
+        if self.registry.enabled:
+            self.registry.observe(self.metric, self.label, seconds, self.rows, self.bytes)
+        if self.timings is not None:
+            entry = self.timings
+            for key in self.path:
+                entry = entry.setdefault(key, {})
+            entry['seconds'] = entry.get('seconds', 0.0) + seconds
+            if self.rows is not None:
+                entry['rows'] = entry.get('rows', 0) + self.rows
+            if self.bytes is not None:
+                entry['bytes'] = entry.get('bytes', 0) + self.bytes
+
+
+class _NoopTimer:
+    """Stands in for _Timer when nothing is being recorded."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def __setattr__(self, name, value):
+        # Rows and bytes set on a disabled timer are dropped
+        pass
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+class MetricsRegistry:
+    """
+    Process-wide durations, rows and bytes of the instrumented code.
+
+    When the registry is disabled and no request collects timings, the
+    timers are a shared no-op object, so instrumented code pays for little
+    more than a function call.
+    """
+
+    def __init__(self, enabled: bool = True):
+        """
+        Initialize an empty registry.
+
+        Args:
+            enabled: Whether observations are recorded
+        """
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        # metric -> label value -> [count, seconds, rows, bytes]
+        self._observations = defaultdict(dict)
+
+    def observe(self, metric: str, label: str, seconds: float, rows: int | None = None,
+                bytes_: int | None = None):
+        """
+        Record one timed block.
+
+        Args:
+            metric: One of METRICS
+            label: Value of the metric's label
+            seconds: Duration of the block
+            rows: Rows processed by the block, if known
+            bytes_: Bytes processed by the block, if known
+        """
+        with self._lock:
+            totals = self._observations[metric].setdefault(label, [0, 0.0, 0, 0])
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] += rows or 0
+            totals[3] += bytes_ or 0
+
+    def timer(self, metric: str, label: str, path: tuple[str, ...]):
+        """
+        Create a timer for a block, or a no-op one if nothing is recorded.
+
+        Args:
+            metric: One of METRICS
+            label: Value of the metric's label
+            path: Keys the duration is stored under in the request timings
+
+        Returns:
+            Context manager timing the block
+        """
+        timings = _current_timings.get()
+        if not self.enabled and timings is None:
+            return _NOOP_TIMER
+        return _Timer(self, metric, label, timings, path)
+
+    def reset(self):
+        """Drop all recorded observations."""
+        with self._lock:
+            self._observations.clear()
+
+    def render(self) -> str:
+        """
+        Render the observations in the Prometheus text exposition format.
+
+        Returns:
+            Metrics text
+        """
+        lines = []
+        with self._lock:
+            for metric, (label_name, help_text) in METRICS.items():
+                observations = self._observations.get(metric, {})
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} summary")
+                for label, (count, seconds, _, _) in sorted(observations.items()):
+                    lines.append(f'{metric}_count{{{label_name}="{label}"}} {count}')
+                    lines.append(f'{metric}_sum{{{label_name}="{label}"}} {seconds:.6f}')
+
+                for index, unit in ((2, 'rows'), (3, 'bytes')):
+                    totals = {label: values[index] for label, values in observations.items() if values[index]}
+                    if not totals:
+                        continue
+                    counter = metric.replace('_seconds', f'_{unit}_total')
+                    lines.append(f"# HELP {counter} {unit.capitalize()} processed, by {label_name}")
+                    lines.append(f"# TYPE {counter} counter")
+                    for label, total in sorted(totals.items()):
+                        lines.append(f'{counter}{{{label_name}="{label}"}} {total}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def request(action: str):
+    """Time an API request handled by the given action."""
+    return registry.timer('inference_request_seconds', action, ('request',))
+
+
+def stage(name: str):
+    """Time a processing stage, e.g. 'read_file' or 'convert'."""
+    return registry.timer('inference_stage_seconds', name, ('stages', name))
+
+
+def detector(column: str, name: str):
+    """Time a type detector running on a column."""
+    return registry.timer('inference_detector_seconds', name, ('columns', str(column), name))
+
+
+class collect_timings:
+    """
+    Collect the timings of the current request into a dictionary.
+
+    Timings are collected whether or not the registry is enabled. Columns
+    inferred in worker processes are not included.
+
+    Example:
+        with collect_timings() as timings:
+            ...
+        response['timings'] = timings
+    """
+
+    def __init__(self, enabled: bool = True):
+        """
+        Args:
+            enabled: Whether to collect anything; yields None when False
+        """
+        self.enabled = enabled
+        self.token = None
+
+    def __enter__(self) -> dict | None:
+        if not self.enabled:
+            return None
+        timings = {}
+        self.token = _current_timings.set(timings)
+        return timings
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.token is not None:
+            _current_timings.reset(self.token)
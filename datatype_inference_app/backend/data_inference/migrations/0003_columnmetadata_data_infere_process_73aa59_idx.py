@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-17 03:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_inference', '0002_inferencejob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='columnmetadata',
+            index=models.Index(fields=['processed_file', 'column_name'], name='data_infere_process_73aa59_idx'),
+        ),
+    ]
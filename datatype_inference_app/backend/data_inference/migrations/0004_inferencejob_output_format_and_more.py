@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-17 03:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_inference', '0003_columnmetadata_data_infere_process_73aa59_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inferencejob',
+            name='output_format',
+            field=models.CharField(choices=[('csv', 'CSV'), ('parquet', 'Parquet'), ('feather', 'Feather')], default='csv', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='processedfile',
+            name='output_format',
+            field=models.CharField(choices=[('csv', 'CSV'), ('parquet', 'Parquet'), ('feather', 'Feather')], default='csv', max_length=10),
+        ),
+    ]
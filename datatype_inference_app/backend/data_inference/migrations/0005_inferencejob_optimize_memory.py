@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 03:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_inference', '0004_inferencejob_output_format_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inferencejob',
+            name='optimize_memory',
+            field=models.BooleanField(default=False),
+        ),
+    ]
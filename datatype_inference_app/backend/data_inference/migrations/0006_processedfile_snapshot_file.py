@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 03:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_inference', '0005_inferencejob_optimize_memory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processedfile',
+            name='snapshot_file',
+            field=models.FileField(blank=True, null=True, upload_to='snapshots/'),
+        ),
+    ]
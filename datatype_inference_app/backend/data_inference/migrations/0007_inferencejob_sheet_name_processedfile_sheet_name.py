@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-17 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_inference', '0006_processedfile_snapshot_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inferencejob',
+            name='sheet_name',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='processedfile',
+            name='sheet_name',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+    ]
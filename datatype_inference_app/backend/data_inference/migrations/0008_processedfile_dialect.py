@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 04:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_inference', '0007_inferencejob_sheet_name_processedfile_sheet_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processedfile',
+            name='dialect',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 04:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_inference', '0008_processedfile_dialect'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processedfile',
+            name='profile_state',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 04:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_inference', '0009_processedfile_profile_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processedfile',
+            name='snapshot_segments',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
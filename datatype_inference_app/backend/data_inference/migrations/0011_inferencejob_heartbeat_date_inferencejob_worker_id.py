@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-17 04:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_inference', '0010_processedfile_snapshot_segments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inferencejob',
+            name='heartbeat_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='inferencejob',
+            name='worker_id',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 05:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_inference', '0011_inferencejob_heartbeat_date_inferencejob_worker_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='columnmetadata',
+            name='date_format',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+    ]
@@ -1,12 +1,28 @@
 # data_inference/models.py
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 class ProcessedFile(models.Model):
     """Model to store information about processed files."""
     
+    OUTPUT_FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('parquet', 'Parquet'),
+        ('feather', 'Feather'),
+    ]
+    
     file_name = models.CharField(max_length=255)
     original_file = models.FileField(upload_to='uploads/')
     processed_file = models.FileField(upload_to='processed/', null=True, blank=True)
+    output_format = models.CharField(max_length=10, choices=OUTPUT_FORMAT_CHOICES, default='csv')
+    snapshot_file = models.FileField(upload_to='snapshots/', null=True, blank=True)
+    # Snapshots of appended rows following snapshot_file, each with the file its rows were read from
+    snapshot_segments = models.JSONField(default=list, blank=True)
+    sheet_name = models.CharField(max_length=255, null=True, blank=True)
+    # CSV dialect sniffed from the upload, so it is never sniffed again
+    dialect = models.JSONField(null=True, blank=True)
+    # Per-column profile of all rows so far, which appended rows are folded into
+    profile_state = models.JSONField(null=True, blank=True)
     upload_date = models.DateTimeField(auto_now_add=True)
     file_size = models.IntegerField()
     row_count = models.IntegerField()
@@ -23,8 +39,51 @@ class ColumnMetadata(models.Model):
     original_type = models.CharField(max_length=100)
     inferred_type = models.CharField(max_length=100)
     applied_type = models.CharField(max_length=100, null=True, blank=True)
+    # strftime format inferred for date columns, so every page is parsed alike
+    date_format = models.CharField(max_length=100, null=True, blank=True)
     null_count = models.IntegerField()
     unique_count = models.IntegerField()
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['processed_file', 'column_name']),
+        ]
+    
+    def __str__(self):
+        return f"{self.processed_file.file_name} - {self.column_name}"
+
+class InferenceJob(models.Model):
+    """Model to track uploads processed in the background."""
+    
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    
+    file_name = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=1024)
+    file_size = models.IntegerField()
+    content_hash = models.CharField(max_length=64)
+    apply_types = models.BooleanField(default=False)
+    output_format = models.CharField(max_length=10, choices=ProcessedFile.OUTPUT_FORMAT_CHOICES, default='csv')
+    optimize_memory = models.BooleanField(default=False)
+    sheet_name = models.CharField(max_length=255, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(null=True, blank=True)
+    processed_file = models.ForeignKey(ProcessedFile, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_date = models.DateTimeField(auto_now_add=True)
+    started_date = models.DateTimeField(null=True, blank=True)
+    finished_date = models.DateTimeField(null=True, blank=True)
+    # Process running the job and the last time it reported the job as alive
+    worker_id = models.CharField(max_length=255, blank=True, default='')
+    heartbeat_date = models.DateTimeField(null=True, blank=True)
+    
     def __str__(self):
-        return f"{self.processed_file.file_name} - {self.column_name}"
\ No newline at end of file
+        return f"{self.file_name} - {self.status}"
\ No newline at end of file
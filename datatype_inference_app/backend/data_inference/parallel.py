@@ -0,0 +1,113 @@
+# Per-column inference on a process pool for wide DataFrames
+
+import logging
+import os
+import pandas as pd
+import pyarrow as pa
+
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Batches handed out per worker, so that slow columns even out across workers
+BATCHES_PER_WORKER = 4
+
+
+def encode_columns(df: pd.DataFrame) -> pa.Buffer | pd.DataFrame:
+    """
+    Serialize columns into an Arrow IPC buffer for a worker process.
+
+    Arrow buffers are copied to the worker as raw memory instead of being
+    pickled one Python object at a time. Object columns holding anything
+    but strings are sent as-is, since Arrow would either reject them or
+    convert them, e.g. integers with None to int64 that come back as float64.
+
+    Args:
+        df: Columns to send
+
+    Returns:
+        Arrow IPC buffer, or the DataFrame itself if Arrow cannot encode it
+    """
+    for column in df.columns:
+        if df[column].dtype == object and pd.api.types.infer_dtype(df[column], skipna=True) not in ('string', 'empty'):
+            return df
+
+    try:
+        batch = pa.RecordBatch.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return df
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue()
+
+
+def decode_columns(payload: pa.Buffer | pd.DataFrame) -> pd.DataFrame:
+    """
+    Rebuild the columns sent by encode_columns.
+
+    Args:
+        payload: Arrow IPC buffer or DataFrame
+
+    Returns:
+        DataFrame holding the columns
+    """
+    if isinstance(payload, pd.DataFrame):
+        return payload
+    return pa.ipc.open_stream(payload).read_all().to_pandas()
+
+
+def run_batch(engine, method: str, payload: pa.Buffer | pd.DataFrame) -> list[tuple]:
+    """
+    Apply a per-column engine method to a batch of columns in a worker.
+
+    Args:
+        engine: InferenceEngine copied into the worker
+        method: Name of the engine method taking a single Series
+        payload: Encoded batch of columns
+
+    Returns:
+        List of (result, column details) tuples in column order
+    """
+    df = decode_columns(payload)
+    results = []
+    for column in df.columns:
+        result = getattr(engine, method)(df[column])
+        results.append((result, engine.column_details.get(column)))
+    return results
+
+
+def map_columns(engine, df: pd.DataFrame, method: str) -> list:
+    """
+    Apply a per-column engine method to every column on a process pool.
+
+    Results are returned in column order whatever order the workers finish
+    in, and the column details recorded by the workers are merged back into
+    engine.column_details.
+
+    Args:
+        engine: InferenceEngine whose settings the workers use
+        df: DataFrame to analyze
+        method: Name of the engine method taking a single Series
+
+    Returns:
+        List of method results, one per column
+    """
+    n_jobs = engine.n_jobs or os.cpu_count() or 1
+    n_batches = min(len(df.columns), n_jobs * BATCHES_PER_WORKER)
+    bounds = [len(df.columns) * i // n_batches for i in range(n_batches + 1)]
+    payloads = [encode_columns(df.iloc[:, start:end]) for start, end in zip(bounds, bounds[1:])]
+
+    logger.info(f"Inferring {len(df.columns)} columns on {n_jobs} worker processes")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        batches = executor.map(run_batch, [engine] * len(payloads), [method] * len(payloads), payloads)
+        for batch in batches:
+            results.extend(batch)
+
+    for column, (_, details) in zip(df.columns, results):
+        if details is not None:
+            engine.column_details[column] = details
+    return [result for result, _ in results]
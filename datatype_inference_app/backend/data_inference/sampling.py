@@ -0,0 +1,166 @@
+# Sampling strategies for type detection and the confidence of sampled decisions
+
+import math
+import numpy as np
+import pandas as pd
+
+# Seed of the random strategies, so that repeated runs infer the same types
+DEFAULT_SEED = 0
+
+# Blocks the column is split into by the stratified strategy
+DEFAULT_STRATA = 10
+
+
+class Sampler:
+    """
+    Picks the values of a column that type detection looks at.
+
+    Subclasses implement positions(); the values are always returned in
+    their original order.
+    """
+
+    name = None
+
+    def positions(self, length: int, size: int) -> np.ndarray:
+        """
+        Choose which positions of a column are sampled.
+
+        Args:
+            length: Number of values in the column
+            size: Number of values to sample, smaller than length
+
+        Returns:
+            Sorted array of positions
+        """
+        raise NotImplementedError
+
+    def sample(self, values: pd.Series, size: int | None) -> pd.Series:
+        """
+        Sample values from a column.
+
+        Args:
+            values: Non-null column values
+            size: Number of values to sample. None returns every value.
+
+        Returns:
+            The sampled values
+        """
+        if size is None or size >= len(values):
+            return values
+        return values.iloc[self.positions(len(values), size)]
+
+
+class HeadSampler(Sampler):
+    """Takes the first values of the column."""
+
+    name = 'head'
+
+    def positions(self, length: int, size: int) -> np.ndarray:
+        return np.arange(size)
+
+
+class HeadTailSampler(Sampler):
+    """Takes half of the sample from the start of the column and half from its end."""
+
+    name = 'head_tail'
+
+    def positions(self, length: int, size: int) -> np.ndarray:
+        head = size - size // 2
+        return np.concatenate([np.arange(head), np.arange(length - size // 2, length)])
+
+
+class ReservoirSampler(Sampler):
+    """
+    Takes a uniform random sample of the column.
+
+    Every value is equally likely to be picked, as with reservoir sampling
+    over a stream, but the positions are drawn in one vectorized call since
+    the whole column is in memory.
+    """
+
+    name = 'reservoir'
+
+    def __init__(self, seed: int = DEFAULT_SEED):
+        self.seed = seed
+
+    def positions(self, length: int, size: int) -> np.ndarray:
+        rng = np.random.default_rng(self.seed)
+        return np.sort(rng.choice(length, size=size, replace=False))
+
+
+class StratifiedSampler(Sampler):
+    """
+    Splits the column into equal blocks by position and samples each block.
+
+    Every part of the file is represented, so values that only change late
+    in the file are still seen.
+    """
+
+    name = 'stratified'
+
+    def __init__(self, strata: int = DEFAULT_STRATA, seed: int = DEFAULT_SEED):
+        self.strata = strata
+        self.seed = seed
+
+    def positions(self, length: int, size: int) -> np.ndarray:
+        rng = np.random.default_rng(self.seed)
+        strata = min(self.strata, size)
+        bounds = [length * i // strata for i in range(strata + 1)]
+        room = np.diff(bounds)
+        counts = np.minimum([size * (i + 1) // strata - size * i // strata for i in range(strata)], room)
+        # Blocks smaller than their share of the sample pass the rest to the blocks with most room left
+        shortfall = size - counts.sum()
+        for i in np.argsort(counts - room, kind='stable'):
+            extra = min(shortfall, room[i] - counts[i])
+            counts[i] += extra
+            shortfall -= extra
+        return np.concatenate([
+            start + np.sort(rng.choice(end - start, size=count, replace=False))
+            for start, end, count in zip(bounds, bounds[1:], counts)
+        ])
+
+
+SAMPLERS = {sampler.name: sampler for sampler in [HeadSampler, HeadTailSampler, ReservoirSampler, StratifiedSampler]}
+
+
+def get_sampler(sampler: str | Sampler) -> Sampler:
+    """
+    Look up a sampling strategy by name.
+
+    Args:
+        sampler: Strategy name, or a Sampler instance which is returned as-is
+
+    Returns:
+        Sampler instance
+    """
+    if isinstance(sampler, Sampler):
+        return sampler
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Unknown sampler '{sampler}', expected one of {', '.join(SAMPLERS)}")
+    return SAMPLERS[sampler]()
+
+
+def decision_confidence(ratio: float, threshold: float, sample_size: int, population: int) -> float:
+    """
+    Estimate how likely a decision taken on a sample holds for the whole column.
+
+    The observed match ratio is compared against the threshold in units of
+    its standard error, with a finite population correction so that a sample
+    covering the whole column is fully confident.
+
+    Args:
+        ratio: Share of sampled values matching the type
+        threshold: Share the type is accepted from
+        sample_size: Number of sampled values
+        population: Number of values in the column
+
+    Returns:
+        Probability between 0.5 and 1 that the full column falls on the same
+        side of the threshold as the sample
+    """
+    if sample_size >= population:
+        return 1.0
+    correction = (population - sample_size) / (population - 1)
+    error = math.sqrt(threshold * (1 - threshold) / sample_size * correction)
+    z = abs(ratio - threshold) / error
+    return 0.5 * (1 + math.erf(z / math.sqrt(2)))
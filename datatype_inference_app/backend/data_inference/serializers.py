@@ -1,6 +1,6 @@
 # data_inference/serializers.py
 from rest_framework import serializers
-from .models import ProcessedFile, ColumnMetadata
+from .models import ProcessedFile, ColumnMetadata, InferenceJob
 
 class ColumnMetadataSerializer(serializers.ModelSerializer):
     """Serializer for column metadata."""
@@ -17,5 +17,13 @@ class ProcessedFileSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = ProcessedFile
-        fields = ['id', 'file_name', 'original_file', 'processed_file', 
-                  'upload_date', 'file_size', 'row_count', 'column_count', 'columns']
\ No newline at end of file
+        fields = ['id', 'file_name', 'sheet_name', 'dialect', 'original_file', 'processed_file', 'output_format',
+                  'upload_date', 'file_size', 'row_count', 'column_count', 'columns']
+
+class InferenceJobSerializer(serializers.ModelSerializer):
+    """Serializer for background upload jobs."""
+    
+    class Meta:
+        model = InferenceJob
+        fields = ['id', 'file_name', 'status', 'result', 'error', 'processed_file',
+                  'created_date', 'started_date', 'finished_date']
\ No newline at end of file
@@ -0,0 +1,742 @@
+# data_inference/services.py
+import os
+import uuid
+import pandas as pd
+import pyarrow as pa
+from django.conf import settings
+from django.db import transaction
+from django.utils.text import get_valid_filename
+from pyarrow import feather
+
+from .models import ProcessedFile, ColumnMetadata
+from . import excel, metrics
+from .cache import LRUCache
+from .infer_data_type import InferenceEngine
+from .streaming import StreamingProfiler
+
+# Rows per INSERT, keeping wide files under SQLite's bound-parameter limit
+COLUMN_METADATA_BATCH_SIZE = 500
+
+# Upload responses keyed on file content, engine version and options
+result_cache = LRUCache(settings.INFERENCE_RESULT_CACHE_SIZE)
+
+# Columns already converted by apply-types, keyed on file, snapshot segments, column
+# and dtype, bounded by the memory the converted columns take
+converted_column_cache = LRUCache(
+    max_entries=None, max_bytes=settings.INFERENCE_COLUMN_CACHE_BYTES,
+    sizeof=lambda series: int(series.memory_usage(deep=True, index=False))
+)
+
+# Column types of recurring schemas, keyed on their fingerprint
+schema_cache = LRUCache(settings.INFERENCE_SCHEMA_CACHE_SIZE)
+
+
+def create_engine() -> InferenceEngine:
+    """
+    Create an engine with the sampling and distinct counting configured in the settings.
+
+    Engines share the process-wide schema cache.
+
+    Returns:
+        InferenceEngine instance
+    """
+    return InferenceEngine(
+        sample_size=settings.INFERENCE_SAMPLE_SIZE,
+        sampler=settings.INFERENCE_SAMPLER,
+        max_sample_size=settings.INFERENCE_MAX_SAMPLE_SIZE,
+        exact_distinct_max_rows=settings.INFERENCE_EXACT_DISTINCT_MAX_ROWS,
+        distinct_error=settings.INFERENCE_DISTINCT_ERROR,
+        schema_cache=schema_cache,
+    )
+
+
+def upload_path(file_name: str, directory: str = 'uploads') -> str:
+    """
+    Reserve a path under MEDIA_ROOT for an uploaded file.
+
+    Each upload gets its own path, so uploads sharing a name never overwrite
+    each other while they are waiting to be processed.
+
+    Args:
+        file_name: Original name of the uploaded file
+        directory: Directory under MEDIA_ROOT the file is written to
+
+    Returns:
+        Absolute path the file can be written to
+    """
+    upload_dir = os.path.join(settings.MEDIA_ROOT, directory)
+    os.makedirs(upload_dir, exist_ok=True)
+    return os.path.join(upload_dir, f"{uuid.uuid4().hex}_{get_valid_filename(file_name)}")
+
+
+def discard_upload(file_path: str):
+    """
+    Delete a saved upload unless a processed file was created from it.
+
+    Uploads served from cache, rejected or failed are not needed again, and
+    would otherwise pile up under their own paths.
+
+    Args:
+        file_path: Path returned by upload_path
+    """
+    original_file = os.path.relpath(file_path, settings.MEDIA_ROOT)
+    if os.path.exists(file_path) and not ProcessedFile.objects.filter(original_file=original_file).exists():
+        os.remove(file_path)
+
+
+def select_sheets(file_path: str, sheet: str | None = None, all_sheets: bool = False) -> list[str]:
+    """
+    Resolve the worksheets of an Excel upload to process.
+
+    Args:
+        file_path: Path of the saved workbook
+        sheet: Sheet name, or its position as digits. Defaults to the first sheet.
+        all_sheets: Process every sheet instead of a single one
+
+    Returns:
+        Names of the sheets to process
+    """
+    names = excel.sheet_names(file_path)
+    if all_sheets:
+        return names
+    if sheet is None:
+        return names[:1]
+    if sheet in names:
+        return [sheet]
+    if sheet.isdigit() and int(sheet) < len(names):
+        return [names[int(sheet)]]
+    raise ValueError(f"Worksheet {sheet} not found")
+
+
+def save_snapshot(engine: InferenceEngine, df: pd.DataFrame) -> str:
+    """
+    Persist a parsed upload under MEDIA_ROOT/snapshots.
+
+    Args:
+        engine: Engine used to write the snapshot
+        df: DataFrame as parsed from the upload
+
+    Returns:
+        Path of the snapshot relative to MEDIA_ROOT
+    """
+    snapshot_file_name = _new_snapshot_name()
+    snapshot_path = os.path.join(settings.MEDIA_ROOT, snapshot_file_name)
+    with metrics.stage('write_snapshot') as stage:
+        engine.write_snapshot(df, snapshot_path)
+        stage.rows = len(df)
+        stage.bytes = os.path.getsize(snapshot_path)
+    return snapshot_file_name
+
+
+def _new_snapshot_name() -> str:
+    """Pick the path, relative to MEDIA_ROOT, of a new snapshot, creating its directory."""
+    os.makedirs(os.path.join(settings.MEDIA_ROOT, 'snapshots'), exist_ok=True)
+    return f"snapshots/{uuid.uuid4().hex}.feather"
+
+
+def snapshot_segments(processed_file: ProcessedFile) -> list[dict]:
+    """
+    List the segments of a processed file's snapshot in row order.
+
+    The snapshot written at upload comes first, followed by one segment per
+    append. Each segment has the paths, relative to MEDIA_ROOT, of its
+    snapshot and of the file its rows were read from.
+
+    Args:
+        processed_file: Processed file with a snapshot
+
+    Returns:
+        List of dictionaries with 'snapshot' and 'source'
+    """
+    upload = {'snapshot': processed_file.snapshot_file.name, 'source': processed_file.original_file.name}
+    return [upload] + processed_file.snapshot_segments
+
+
+def snapshot_paths(processed_file: ProcessedFile) -> list[str]:
+    """Paths of the snapshot segments of a processed file, in row order."""
+    return [os.path.join(settings.MEDIA_ROOT, segment['snapshot']) for segment in snapshot_segments(processed_file)]
+
+
+def load_parsed_file(engine: InferenceEngine, processed_file: ProcessedFile) -> pd.DataFrame:
+    """
+    Load the parsed upload, from its snapshot when one was saved.
+
+    The segments of rows appended since the upload are merged here.
+
+    Args:
+        engine: Engine used to read the file
+        processed_file: Processed file to load
+
+    Returns:
+        DataFrame as parsed from the upload
+    """
+    if processed_file.snapshot_file:
+        with metrics.stage('read_snapshot') as stage:
+            df = engine.read_snapshot(snapshot_paths(processed_file))
+            stage.rows = len(df)
+        return df
+    with metrics.stage('read_file') as stage:
+        df = engine.read_file(os.path.join(settings.MEDIA_ROOT, processed_file.original_file.name),
+                              processed_file.sheet_name or 0, dialect=processed_file.dialect)
+        stage.rows = len(df)
+    return df
+
+
+def preview_rows(engine: InferenceEngine, processed_file: ProcessedFile, page: int,
+                 page_size: int) -> tuple[pd.DataFrame, int]:
+    """
+    Load one page of a processed file's rows, converted to their column types.
+
+    Pages are sliced out of the memory-mapped snapshot, so serving a page
+    costs the same wherever it lies in the file. Columns are converted to
+    their applied type, or their inferred type if none was applied. Dates
+    are parsed in the format inferred from the whole column, which the few
+    rows of a page could not tell apart, e.g. day-first from month-first.
+
+    Args:
+        engine: Engine used to read and convert the rows
+        processed_file: Processed file to preview
+        page: Page number, starting at 1
+        page_size: Rows per page
+
+    Returns:
+        Tuple of the typed rows of the page and the total number of rows
+    """
+    offset = (page - 1) * page_size
+    with metrics.stage('read_snapshot') as stage:
+        if processed_file.snapshot_file:
+            rows, total_rows = engine.read_snapshot_rows(snapshot_paths(processed_file), offset, page_size)
+        else:
+            # Files processed before snapshots were kept are read in full
+            df = load_parsed_file(engine, processed_file)
+            rows, total_rows = df.iloc[offset:offset + page_size], len(df)
+        stage.rows = len(rows)
+    
+    column_types = {}
+    date_formats = {}
+    for column_name, applied_type, inferred_type, date_format in processed_file.columns.values_list(
+            'column_name', 'applied_type', 'inferred_type', 'date_format'):
+        column_types[column_name] = applied_type or inferred_type
+        if date_format:
+            date_formats[column_name] = date_format
+    with metrics.stage('convert') as stage:
+        rows = engine.convert_column_types(rows, column_types, date_formats)
+        stage.rows = len(rows)
+    return rows, total_rows
+
+
+def convert_columns(engine: InferenceEngine, processed_file: ProcessedFile, df: pd.DataFrame,
+                    pandas_types: dict[str, str]) -> pd.DataFrame:
+    """
+    Convert columns of a parsed upload, reusing earlier conversions.
+
+    Only columns whose requested type has not been converted before are
+    converted again.
+
+    Args:
+        engine: Engine used for conversion
+        processed_file: Processed file the DataFrame was loaded for
+        df: DataFrame as parsed from the upload
+        pandas_types: Dictionary mapping column names to pandas dtypes
+
+    Returns:
+        Converted DataFrame
+    """
+    snapshot = tuple(segment['snapshot'] for segment in snapshot_segments(processed_file))
+    
+    def cache_key(column, dtype):
+        return (processed_file.id, snapshot, column, dtype)
+    
+    cached_columns = {}
+    to_convert = {}
+    for column, dtype in pandas_types.items():
+        cached = converted_column_cache.get(cache_key(column, dtype))
+        if cached is None:
+            to_convert[column] = dtype
+        else:
+            cached_columns[column] = cached
+    
+    with metrics.stage('convert') as stage:
+        date_formats = dict(processed_file.columns.filter(date_format__isnull=False).values_list(
+            'column_name', 'date_format'))
+        converted_df = engine.convert_column_types(df, to_convert, date_formats)
+        stage.rows = len(df)
+    for column, dtype in to_convert.items():
+        if column in converted_df.columns:
+            converted_column_cache.set(cache_key(column, dtype), converted_df[column])
+    for column, series in cached_columns.items():
+        converted_df[column] = series
+    
+    return converted_df
+
+
+def save_processed_file(engine: InferenceEngine, df: pd.DataFrame, file_name: str,
+                        output_format: str = 'csv', sheet: str | None = None) -> str:
+    """
+    Write a processed DataFrame under MEDIA_ROOT/processed.
+
+    Each file is written to a directory of its own, so files processed from
+    uploads with the same name never overwrite each other, while the file
+    itself keeps a name derived from the upload for downloads.
+
+    Args:
+        engine: Engine used to write the file
+        df: Processed DataFrame
+        file_name: Original name of the uploaded file
+        output_format: One of OUTPUT_FORMATS
+        sheet: Worksheet the data was read from, for Excel uploads
+
+    Returns:
+        Path of the written file relative to MEDIA_ROOT
+    """
+    processed_id = uuid.uuid4().hex
+    processed_dir = os.path.join(settings.MEDIA_ROOT, 'processed', processed_id)
+    os.makedirs(processed_dir, exist_ok=True)
+    
+    # Each sheet of a workbook gets its own file
+    if sheet is not None:
+        processed_name = f"processed_{os.path.splitext(file_name)[0]}_{get_valid_filename(sheet)}.{output_format}"
+    # CSV output keeps the original file name for existing download links
+    elif output_format == 'csv':
+        processed_name = f"processed_{file_name}"
+    else:
+        processed_name = f"processed_{os.path.splitext(file_name)[0]}.{output_format}"
+    
+    processed_path = os.path.join(processed_dir, processed_name)
+    with metrics.stage('write_output') as stage:
+        engine.write_file(df, processed_path, output_format)
+        stage.rows = len(df)
+        stage.bytes = os.path.getsize(processed_path)
+    return f"processed/{processed_id}/{processed_name}"
+
+
+def remove_processed_file(name: str | None):
+    """
+    Delete a processed file written by save_processed_file, with its directory.
+
+    Args:
+        name: Path of the file relative to MEDIA_ROOT, or None
+    """
+    if not name:
+        return
+    file_path = os.path.join(settings.MEDIA_ROOT, name)
+    if os.path.exists(file_path):
+        os.remove(file_path)
+    # Only the directory save_processed_file created for the file is removed
+    processed_dir = os.path.dirname(file_path)
+    processed_root = os.path.join(settings.MEDIA_ROOT, 'processed')
+    if os.path.dirname(processed_dir) == processed_root and not os.listdir(processed_dir):
+        os.rmdir(processed_dir)
+
+
+def analyze_upload(engine: InferenceEngine, file_path: str, file_name: str, file_size: int,
+                   apply_types: bool, output_format: str = 'csv', optimize_memory: bool = False,
+                   parsed: tuple[pd.DataFrame, dict] | None = None, sheet: str | None = None,
+                   dialect: dict | None = None, profile_state: dict | None = None) -> dict:
+    """
+    Run inference on an uploaded file and write its snapshot and processed file.
+
+    Nothing is written to the database, so uploads can be analyzed in worker
+    processes and their records saved together afterwards.
+
+    Args:
+        engine: Engine used for inference
+        file_path: Path of the saved upload
+        file_name: Original name of the uploaded file
+        file_size: Size of the upload in bytes
+        apply_types: Whether to convert columns to their inferred types
+        output_format: Format the converted file is written in
+        optimize_memory: Whether to shrink columns to their smallest safe dtypes
+        parsed: DataFrame and information already produced while the upload
+            streamed in. The saved file is read if not given.
+        sheet: Worksheet processed from Excel uploads
+        dialect: Dialect of CSV uploads, if already sniffed
+        profile_state: Per-column profile state of the parsed rows, kept
+            for appending rows later
+
+    Returns:
+        Analysis to pass to save_upload_records
+    """
+    if dialect is None and file_name.split('.')[-1].lower() == 'csv':
+        dialect = engine.sniff_dialect(file_path)
+    
+    # Process the file, keeping a snapshot of the parsed data for later type changes
+    if parsed is not None:
+        df, info_dict = parsed
+    else:
+        with metrics.stage('read_file') as stage:
+            df, info_dict = engine.read_file(file_path, sheet if sheet is not None else 0, dialect=dialect), None
+            stage.rows = len(df)
+            stage.bytes = file_size
+    snapshot_file_name = save_snapshot(engine, df)
+    df, info_dict = engine.process_dataframe(
+        df, convert_to_inferred_type=apply_types, optimize_memory=optimize_memory, info_dict=info_dict
+    )
+    
+    # Save the processed file
+    processed_file_name = None
+    if apply_types or optimize_memory:
+        processed_file_name = save_processed_file(engine, df, file_name, output_format, sheet)
+    
+    return {
+        'file_name': file_name,
+        'file_path': file_path,
+        'file_size': file_size,
+        'apply_types': apply_types,
+        'optimize_memory': optimize_memory,
+        'output_format': output_format,
+        'sheet': sheet,
+        'dialect': dialect,
+        'profile_state': profile_state,
+        'snapshot_file': snapshot_file_name,
+        'processed_file': processed_file_name,
+        'info': info_dict,
+    }
+
+
+def save_upload_records(analysis: dict) -> ProcessedFile:
+    """
+    Create the database records of an analyzed upload.
+
+    Callers run this inside transaction.atomic(), together with the records
+    of any other uploads saved alongside.
+
+    Args:
+        analysis: Output of analyze_upload
+
+    Returns:
+        The created ProcessedFile
+    """
+    info_dict = analysis['info']
+    processed_file = ProcessedFile.objects.create(
+        file_name=analysis['file_name'],
+        original_file=os.path.relpath(analysis['file_path'], settings.MEDIA_ROOT),
+        processed_file=analysis['processed_file'],
+        snapshot_file=analysis['snapshot_file'],
+        output_format=analysis['output_format'],
+        sheet_name=analysis['sheet'],
+        dialect=analysis['dialect'],
+        profile_state=analysis['profile_state'],
+        file_size=analysis['file_size'],
+        row_count=info_dict['total_rows'],
+        column_count=info_dict['total_columns']
+    )
+    
+    ColumnMetadata.objects.bulk_create([
+        ColumnMetadata(
+            processed_file=processed_file,
+            column_name=col_info['name'],
+            original_type=col_info['current_type'],
+            inferred_type=col_info['inferred_type'],
+            applied_type=(col_info['current_type'] if analysis['optimize_memory']
+                          else col_info['inferred_type'] if analysis['apply_types'] else None),
+            date_format=col_info['date_format'],
+            null_count=col_info['null_count'],
+            unique_count=col_info['unique_count']
+        )
+        for col_info in info_dict['columns']
+    ], batch_size=COLUMN_METADATA_BATCH_SIZE)
+    return processed_file
+
+
+def upload_response(processed_file: ProcessedFile, analysis: dict) -> dict:
+    """
+    Build the response data of a processed upload.
+
+    Args:
+        processed_file: Record created by save_upload_records
+        analysis: Output of analyze_upload
+
+    Returns:
+        Response data describing the processed file
+    """
+    info_dict = analysis['info']
+    response_data = {
+        'file_id': processed_file.id,
+        'file_name': processed_file.file_name,
+        'sheet_name': processed_file.sheet_name,
+        'dialect': processed_file.dialect,
+        'total_rows': info_dict['total_rows'],
+        'total_columns': info_dict['total_columns'],
+        'memory_usage_bytes': info_dict['memory_usage_bytes'],
+        'columns': info_dict['columns']
+    }
+    if analysis['optimize_memory']:
+        response_data['memory_optimization'] = info_dict['memory_optimization']
+    return response_data
+
+
+def process_upload(engine: InferenceEngine, file_path: str, file_name: str, file_size: int,
+                   apply_types: bool, cache_key: tuple | None = None, output_format: str = 'csv',
+                   optimize_memory: bool = False, parsed: tuple[pd.DataFrame, dict] | None = None,
+                   sheet: str | None = None, dialect: dict | None = None,
+                   profile_state: dict | None = None) -> dict:
+    """
+    Run inference on an uploaded file and store the results.
+
+    Args:
+        engine: Engine used for inference
+        file_path: Path of the saved upload
+        file_name: Original name of the uploaded file
+        file_size: Size of the upload in bytes
+        apply_types: Whether to convert columns to their inferred types
+        cache_key: Key the response is stored under in the result cache
+        output_format: Format the converted file is written in
+        optimize_memory: Whether to shrink columns to their smallest safe dtypes
+        parsed: DataFrame and information already produced while the upload
+            streamed in. The saved file is read if not given.
+        sheet: Worksheet processed from Excel uploads
+        dialect: Dialect of CSV uploads, if already sniffed
+        profile_state: Per-column profile state of the parsed rows, kept
+            for appending rows later
+
+    Returns:
+        Response data describing the processed file
+    """
+    analysis = analyze_upload(
+        engine, file_path, file_name, file_size, apply_types, output_format, optimize_memory, parsed, sheet,
+        dialect, profile_state
+    )
+    
+    # Save processed file metadata and its columns atomically
+    with metrics.stage('save_records') as stage, transaction.atomic():
+        # Database rows written: the file and one per column
+        stage.rows = analysis['info']['total_columns'] + 1
+        processed_file = save_upload_records(analysis)
+    
+    response_data = upload_response(processed_file, analysis)
+    if cache_key is not None:
+        result_cache.set(cache_key, response_data)
+    
+    return response_data
+
+
+def _text_segments(engine: InferenceEngine, processed_file: ProcessedFile,
+                   segments: list[dict]) -> tuple[list[dict], list[str]]:
+    """
+    Rewrite snapshot segments holding parsed values of columns that are text overall.
+
+    A column can parse as numbers in some segments and as text in others.
+    Reading all rows at once would have kept every value as written in the
+    files, which numbers no longer tell, e.g. for leading zeros. Such
+    columns are read again as text from the source of each segment that
+    parsed them otherwise, so they are rewritten once and stay text.
+
+    Args:
+        engine: Engine used to read the sources
+        processed_file: Processed file the segments belong to
+        segments: Segments as listed by snapshot_segments
+
+    Returns:
+        Tuple of the segments, pointing at their rewritten snapshots, and the
+        paths of the snapshots these replace
+    """
+    tables = [feather.read_table(os.path.join(settings.MEDIA_ROOT, segment['snapshot']), memory_map=True)
+              for segment in segments]
+    text_positions = [
+        position for position, column_type in enumerate(engine.snapshot_column_types([t.schema for t in tables]))
+        if pa.types.is_string(column_type)
+    ]
+    
+    def parsed(column_type):
+        return not (pa.types.is_string(column_type) or pa.types.is_large_string(column_type)
+                    or pa.types.is_null(column_type))
+    
+    segments = list(segments)
+    replaced = []
+    for index, table in enumerate(tables):
+        positions = [position for position in text_positions if parsed(table.schema.field(position).type)]
+        if not positions:
+            continue
+        source = os.path.join(settings.MEDIA_ROOT, segments[index]['source'])
+        with metrics.stage('read_file') as stage:
+            text = engine.read_text_columns(source, positions, processed_file.sheet_name or 0,
+                                            processed_file.dialect)
+            stage.rows = len(text)
+        if len(text) != table.num_rows:
+            raise ValueError(f"Read {len(text)} rows from {segments[index]['source']}, "
+                             f"its snapshot has {table.num_rows}")
+        for position, values in zip(positions, text.columns):
+            table = table.set_column(position, table.field(position).name,
+                                     pa.array(text[values].to_numpy(dtype=object), type=pa.string(), from_pandas=True))
+        
+        snapshot_file_name = _new_snapshot_name()
+        snapshot_path = os.path.join(settings.MEDIA_ROOT, snapshot_file_name)
+        with metrics.stage('write_snapshot') as stage:
+            feather.write_feather(table, snapshot_path, compression='uncompressed')
+            stage.rows = table.num_rows
+            stage.bytes = os.path.getsize(snapshot_path)
+        replaced.append(os.path.join(settings.MEDIA_ROOT, segments[index]['snapshot']))
+        segments[index] = {**segments[index], 'snapshot': snapshot_file_name}
+    return segments, replaced
+
+
+def append_rows(engine: InferenceEngine, processed_file: ProcessedFile, file_path: str, file_size: int) -> dict:
+    """
+    Fold new rows of a growing dataset into an existing processed file.
+
+    The rows are read in the dialect of the original upload and profiled on
+    their own. Their profile is merged into the stored per-column state, so
+    types only widen where the new rows require it and the cost follows the
+    size of the new rows. Files without a stored state are profiled from
+    their snapshot once first. The file's row is locked for the whole
+    append, so concurrent appends to it queue instead of overwriting each
+    other's state and segments.
+
+    The new rows are added to the snapshot as a segment of their own, so the
+    rows already stored are not written again, except for columns they
+    parsed as numbers that the new rows make text. A previously written
+    processed file and types applied to widened columns are dropped, since
+    they no longer describe every row.
+
+    Args:
+        engine: Engine used for inference
+        processed_file: Processed file to append to
+        file_path: Path of the saved new rows under MEDIA_ROOT, kept as the
+            source of their snapshot segment
+        file_size: Size of the new rows in bytes
+
+    Returns:
+        Response data describing the updated file and the widened columns
+    """
+    # Appends to the same file run one at a time, each on the rows the last one stored
+    with transaction.atomic():
+        processed_file = ProcessedFile.objects.select_for_update().get(pk=processed_file.pk)
+        with metrics.stage('read_file') as stage:
+            rows = engine.read_file(file_path, processed_file.sheet_name or 0, dialect=processed_file.dialect)
+            stage.rows = len(rows)
+            stage.bytes = file_size
+    
+        column_metadata = {meta.column_name: meta for meta in processed_file.columns.all()}
+        if [str(column) for column in rows.columns] != list(column_metadata):
+            raise ValueError(f"Appended rows must have the columns {', '.join(column_metadata)}")
+    
+        profiler = StreamingProfiler(engine)
+        if processed_file.profile_state is not None:
+            profiler.load_state(processed_file.profile_state)
+        else:
+            with metrics.stage('profile') as stage:
+                df = load_parsed_file(engine, processed_file)
+                profiler.update(df)
+                stage.rows = len(df)
+        types_before = {name: profile.inferred_type() for name, profile in profiler.profiles.items()}
+    
+        with metrics.stage('profile') as stage:
+            profiler.update(rows)
+            stage.rows = len(rows)
+        info_dict = profiler.result()
+    
+        segments, replaced = [], []
+        if processed_file.snapshot_file:
+            segment = {'snapshot': save_snapshot(engine, rows),
+                       'source': os.path.relpath(file_path, settings.MEDIA_ROOT)}
+            segments, replaced = _text_segments(engine, processed_file, snapshot_segments(processed_file) + [segment])
+    
+        widened = []
+        for col_info in info_dict['columns']:
+            meta = column_metadata[col_info['name']]
+            if col_info['inferred_type'] != types_before[col_info['name']]:
+                widened.append({'name': meta.column_name, 'from': meta.inferred_type, 'to': col_info['inferred_type']})
+                meta.inferred_type = col_info['inferred_type']
+                meta.applied_type = None
+            meta.original_type = col_info['current_type']
+            meta.date_format = col_info['date_format']
+            meta.null_count = col_info['null_count']
+            meta.unique_count = col_info['unique_count']
+    
+        previous_file_name = processed_file.processed_file.name
+        with metrics.stage('save_records') as stage:
+            # Database rows written: the file and one per column
+            stage.rows = len(column_metadata) + 1
+            processed_file.profile_state = profiler.state()
+            processed_file.row_count = info_dict['total_rows']
+            processed_file.file_size += file_size
+            processed_file.processed_file = None
+            update_fields = ['profile_state', 'row_count', 'file_size', 'processed_file']
+            if segments:
+                processed_file.snapshot_file = segments[0]['snapshot']
+                processed_file.snapshot_segments = segments[1:]
+                update_fields += ['snapshot_file', 'snapshot_segments']
+            processed_file.save(update_fields=update_fields)
+            ColumnMetadata.objects.bulk_update(
+                list(column_metadata.values()),
+                ['inferred_type', 'applied_type', 'original_type', 'date_format', 'null_count', 'unique_count'],
+                batch_size=COLUMN_METADATA_BATCH_SIZE
+            )
+    for snapshot_path in replaced:
+        os.remove(snapshot_path)
+    if not segments:
+        # Files processed before snapshots were kept only hold their original rows
+        os.remove(file_path)
+    remove_processed_file(previous_file_name)
+    
+    # Cached upload responses and converted columns describe the rows before the append
+    result_cache.discard_if(lambda key, response: response.get('file_id') == processed_file.id)
+    converted_column_cache.discard_if(lambda key, series: key[0] == processed_file.id)
+    
+    return {
+        'file_id': processed_file.id,
+        'file_name': processed_file.file_name,
+        'appended_rows': len(rows),
+        'total_rows': processed_file.row_count,
+        'total_columns': info_dict['total_columns'],
+        'widened_columns': widened,
+        'columns': info_dict['columns'],
+    }
+
+
+def apply_column_types(engine: InferenceEngine, processed_file: ProcessedFile, column_types: dict,
+                       output_format: str) -> dict:
+    """
+    Convert a processed file to the given column types and store the result.
+
+    Args:
+        engine: Engine used for the conversion
+        processed_file: File whose parsed data is converted
+        column_types: Display type name per column
+        output_format: Format the converted file is written in
+
+    Returns:
+        Response data describing the converted file
+    """
+    # Load the parsed data without parsing the original upload again
+    df = load_parsed_file(engine, processed_file)
+    
+    # Convert display type names to pandas dtype names
+    pandas_types = {}
+    for col, display_type in column_types.items():
+        pandas_type = engine.display_dtype_mapping.get(display_type)
+        if pandas_type:
+            pandas_types[col] = pandas_type
+    
+    # Apply the types, reusing columns converted by earlier requests
+    converted_df = convert_columns(engine, processed_file, df, pandas_types)
+    
+    # Save the processed file
+    processed_file_name = save_processed_file(
+        engine, converted_df, processed_file.file_name, output_format, processed_file.sheet_name
+    )
+    
+    # Update the file record and its column metadata together
+    column_metadata = list(ColumnMetadata.objects.filter(
+        processed_file=processed_file, column_name__in=list(pandas_types)
+    ))
+    for col_meta in column_metadata:
+        col_meta.applied_type = pandas_types[col_meta.column_name]
+    
+    previous_file_name = processed_file.processed_file.name
+    with metrics.stage('save_records') as stage, transaction.atomic():
+        # Database rows written: the file and one per updated column
+        stage.rows = len(column_metadata) + 1
+        processed_file.processed_file = processed_file_name
+        processed_file.output_format = output_format
+        processed_file.save(update_fields=['processed_file', 'output_format'])
+        ColumnMetadata.objects.bulk_update(column_metadata, ['applied_type'])
+    # The file written for the previous types is replaced
+    remove_processed_file(previous_file_name)
+    
+    return {
+        "message": "Types applied successfully",
+        "file_id": processed_file.id,
+        "processed_file_url": processed_file.processed_file.url
+    }
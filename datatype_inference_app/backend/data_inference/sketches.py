@@ -0,0 +1,141 @@
+# Approximate distinct counting in bounded memory
+
+import base64
+import math
+import numpy as np
+import pandas as pd
+import zlib
+
+# Standard error of the estimate used when none is given
+DEFAULT_DISTINCT_ERROR = 0.01
+
+# Register counts are 2 ** precision; 4 to 18 keeps the bias correction valid
+# and the registers under 256 KiB
+MIN_PRECISION = 4
+MAX_PRECISION = 18
+
+# Values hashed at a time, bounding the temporary arrays of add()
+HASH_BLOCK_ROWS = 1_000_000
+
+
+class HyperLogLog:
+    """
+    HyperLogLog sketch estimating the number of distinct values.
+
+    Each value is hashed to 64 bits; the first `precision` bits pick a
+    register, which keeps the longest run of leading zeros seen in the rest.
+    Memory is one byte per register whatever the number of values, and the
+    standard error of the estimate is about 1.04 / sqrt(2 ** precision).
+    Sketches with the same precision can be merged, so chunks of a column
+    can be counted separately.
+    """
+
+    def __init__(self, precision: int = 14):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            precision: Number of hash bits used to pick a register
+        """
+        if not MIN_PRECISION <= precision <= MAX_PRECISION:
+            raise ValueError(f"Precision must be between {MIN_PRECISION} and {MAX_PRECISION}")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @classmethod
+    def for_error(cls, error: float = DEFAULT_DISTINCT_ERROR) -> 'HyperLogLog':
+        """
+        Create a sketch with the fewest registers reaching a standard error.
+
+        Args:
+            error: Target relative standard error, e.g. 0.01 for 1%
+
+        Returns:
+            Empty sketch
+        """
+        precision = math.ceil(2 * math.log2(1.04 / error))
+        return cls(min(max(precision, MIN_PRECISION), MAX_PRECISION))
+
+    def add(self, values: pd.Series):
+        """
+        Add the values of a Series to the sketch.
+
+        Args:
+            values: Non-null values
+        """
+        for start in range(0, len(values), HASH_BLOCK_ROWS):
+            # Hashing the values directly avoids building the hash table nunique() needs
+            block = values.iloc[start:start + HASH_BLOCK_ROWS]
+            self._add_hashes(pd.util.hash_pandas_object(block, index=False, categorize=False).to_numpy())
+
+    def _add_hashes(self, hashes: np.ndarray):
+        """Update the registers from an array of 64-bit hashes."""
+        suffix_bits = 64 - self.precision
+        index = (hashes >> np.uint64(suffix_bits)).astype(np.intp)
+        suffix = hashes & np.uint64((1 << suffix_bits) - 1)
+
+        # Bit length computed on 32-bit halves, which float64 represents exactly
+        high = (suffix >> np.uint64(32)).astype(np.float64)
+        low = (suffix & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        with np.errstate(divide='ignore'):
+            bit_length = np.where(high > 0, 33 + np.floor(np.log2(high)),
+                                  np.where(low > 0, 1 + np.floor(np.log2(low)), 0))
+        rank = (suffix_bits + 1 - bit_length).astype(np.uint8)
+
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: 'HyperLogLog'):
+        """
+        Fold another sketch into this one.
+
+        Args:
+            other: Sketch with the same precision
+        """
+        if other.precision != self.precision:
+            raise ValueError("Only sketches with the same precision can be merged")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def to_dict(self) -> dict:
+        """
+        Serialize the sketch into a JSON-compatible dictionary.
+
+        Returns:
+            Dictionary with the precision and the compressed registers
+        """
+        return {
+            'precision': self.precision,
+            'registers': base64.b64encode(zlib.compress(self.registers.tobytes())).decode('ascii'),
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> 'HyperLogLog':
+        """
+        Restore a sketch serialized by to_dict.
+
+        Args:
+            state: Output of to_dict
+
+        Returns:
+            The sketch
+        """
+        sketch = cls(state['precision'])
+        registers = np.frombuffer(zlib.decompress(base64.b64decode(state['registers'])), dtype=np.uint8)
+        sketch.registers = registers.copy()
+        return sketch
+
+    def count(self) -> int:
+        """
+        Estimate the number of distinct values added so far.
+
+        Returns:
+            Estimated distinct count
+        """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+
+        # Linear counting is more accurate while many registers are still empty
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
@@ -0,0 +1,849 @@
+# Chunked inference for files that do not fit in memory
+
+import codecs
+import csv
+import io
+import logging
+import numpy as np
+import pandas as pd
+
+from . import dialect as csv_dialect, metrics
+from .detectors import ColumnContext
+from .infer_data_type import InferenceEngine, MATCH_THRESHOLD, SCHEMA_CHECK_SAMPLE_SIZE
+from .sketches import HyperLogLog
+
+logger = logging.getLogger(__name__)
+
+# Type lattice, ordered from narrowest to widest
+TYPE_LATTICE = ['bool', 'int64', 'float64', 'datetime64[ns]', 'object']
+NUMERIC_TYPES = {'bool', 'int64', 'float64'}
+
+# Types decided from the match counts of all chunks, in the order the
+# engine's detectors prefer them
+MATCHED_TYPES = ['bool', 'int64', 'float64', 'datetime64[ns]']
+
+# Default peak memory budget for chunked reads
+DEFAULT_MEMORY_BUDGET_BYTES = 256 * 1024 * 1024
+
+# Parsed chunks plus the temporaries created by the detectors take a few
+# times the in-memory size of the rows themselves
+CHUNK_MEMORY_OVERHEAD = 4
+
+# Rows read up front to estimate the in-memory size of a row
+ROW_SIZE_SAMPLE_ROWS = 1000
+
+# Bytes of an upload collected before they are parsed as one chunk
+DEFAULT_INGEST_CHUNK_BYTES = 4 * 1024 * 1024
+
+# Distinct values a column profile keeps exactly, whatever the engine's
+# limit, before switching to a sketch, so memory stays bounded
+STREAMING_EXACT_DISTINCT_MAX_VALUES = 100_000
+
+# Distinct values a saved profile keeps exactly, beyond which they are
+# saved as a sketch to keep the state small
+STATE_EXACT_DISTINCT_MAX_VALUES = 1000
+
+
+def join_types(left: str | None, right: str | None) -> str | None:
+    """
+    Return the narrowest type in the lattice that covers both types.
+
+    Numeric types widen along bool -> int64 -> float64. Dates only join with
+    dates, so combining them with anything else widens to text.
+
+    Args:
+        left: Type seen so far, or None if no values have been seen
+        right: Type of the new values, or None if they were all null
+
+    Returns:
+        The joined type
+    """
+    if left is None or left == right:
+        return right if left is None else left
+    if right is None:
+        return left
+    if left in NUMERIC_TYPES and right in NUMERIC_TYPES:
+        return max(left, right, key=TYPE_LATTICE.index)
+    return 'object'
+
+
+def join_dtypes(left: str | None, right: str) -> str:
+    """
+    Return the pandas dtype a full read would have given two chunk dtypes.
+
+    Args:
+        left: dtype of the chunks seen so far, or None for the first chunk
+        right: dtype of the new chunk
+
+    Returns:
+        The joined dtype
+    """
+    if left is None or left == right:
+        return right
+    if np.dtype(left).kind in 'iuf' and np.dtype(right).kind in 'iuf':
+        return str(np.result_type(left, right))
+    return 'object'
+
+
+def as_json_value(value):
+    """
+    Turn a value into one JSON can encode.
+
+    Returns:
+        The equivalent Python value, or None if there is none, e.g. for dates
+    """
+    if isinstance(value, np.generic):
+        value = value.item()
+    return value if isinstance(value, (str, int, float, bool)) else None
+
+
+def as_text(value):
+    """
+    Render a value parsed from a numeric chunk as text.
+
+    A column whose chunks parse to different dtypes is read as text overall,
+    so its numeric values have to be compared with the text values. The
+    rendering is canonical rather than the original text, e.g. leading zeros
+    are lost, so it only serves distinct counts and sample values.
+
+    Args:
+        value: Value from a chunk of the column
+
+    Returns:
+        The value as text
+    """
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class ColumnProfile:
+    """
+    Running inference state for one column of a chunked file.
+    """
+
+    def __init__(self, name: str, hint: dict | None = None):
+        """
+        Initialize an empty column profile.
+
+        Args:
+            name: Column name
+            hint: Type and date format remembered for the column by the
+                engine's schema cache
+        """
+        self.name = name
+        self.hint = hint
+        self.type = None
+        self.dtype = None
+        self.date_format = None
+        self.row_count = 0
+        self.null_count = 0
+        self.memory_bytes = 0
+        self.sampled_count = 0
+        # Estimated number of values matching each type, over matched_count values.
+        # None for profiles restored from states saved before they were counted.
+        self.matches = {}
+        self.matched_count = 0
+        self.sample_values = []
+        self.unique_values = set()
+        # Replaces unique_values once it grows past the exact limit
+        self.distinct_sketch = None
+
+    def _chunk_type(self, engine: InferenceEngine, series: pd.Series, values: pd.Series) -> str:
+        """
+        Infer the lattice type of the non-null values of one chunk.
+
+        Text chunks are typed by the engine's detector registry, as columns
+        are in memory, and the types of the chunks are joined by the caller.
+
+        Args:
+            engine: Engine providing the detectors
+            series: Chunk of the column
+            values: Non-null values of the chunk
+
+        Returns:
+            Type of the chunk
+        """
+        # Numeric chunks get the type their text would be detected as, which
+        # only matters when other chunks of the column are read as text
+        if series.dtype.kind in 'biuf':
+            sample = engine.sampler.sample(values, engine.sample_size)
+            self._add_matches(engine.compute_match_ratios(sample.map(as_text)), len(values))
+        if series.dtype.kind == 'b':
+            return 'bool'
+        if series.dtype.kind in 'iuf':
+            if values.isin([0, 1]).all():
+                return 'bool'
+            if series.dtype.kind in 'iu' or (values % 1 == 0).all():
+                return 'int64'
+            return 'float64'
+        if series.dtype.kind == 'M':
+            self._add_matches({'datetime64[ns]': 1.0}, len(values))
+            return 'datetime64[ns]'
+        if series.dtype != 'object':
+            return 'object'
+
+        # Chunks confirming the remembered type skip detection
+        if self.hint is not None:
+            with metrics.detector(self.name, 'schema_cache'):
+                sample = engine.sampler.sample(values, SCHEMA_CHECK_SAMPLE_SIZE)
+                confirmed = engine.check_cached_type(sample, self.hint['type'], self.hint['date_format'])
+            if confirmed:
+                self.sampled_count += len(sample)
+                # Integers also parse as floats
+                self._add_matches({self.hint['type']: 1.0, 'float64': float(self.hint['type'] == 'int64')},
+                                  len(values))
+                if self.hint['type'] == 'datetime64[ns]':
+                    self.date_format = self.hint['date_format']
+                    return 'datetime64[ns]'
+                return 'object' if self.hint['type'] in ('category', 'object') else self.hint['type']
+            self.hint = None
+
+        with metrics.detector(self.name, 'match_ratios'):
+            sample, ratios = engine.sample_column(values)
+        self.sampled_count += len(sample)
+
+        # The same detectors as in-memory inference decide the type of the chunk
+        context = ColumnContext(engine, series, values, sample, ratios, MATCH_THRESHOLD)
+        detector, result = engine.detectors.detect(context)
+        matches = dict(ratios)
+        if detector is not None and detector.dtype not in ratios:
+            # Detectors that report no ratio, e.g. for dates in mixed formats, match every value
+            matches[detector.dtype] = result.get('ratio', 1.0)
+        if detector is not None and detector.dtype == 'datetime64[ns]':
+            self._merge_date_format(context, result.get('date_format'))
+        elif self.date_format is not None:
+            # Dates of other chunks may still make up most of the column
+            matches['datetime64[ns]'] = pd.to_datetime(context.text, format=self.date_format,
+                                                       errors='coerce').notna().mean()
+        self._add_matches(matches, len(values))
+
+        if detector is None or detector.dtype == 'category':
+            # Whether text is categorical depends on the distinct values of the whole column
+            return 'object'
+        return detector.dtype
+
+    def _add_matches(self, ratios: dict[str, float], count: int):
+        """
+        Count the values of a chunk matching each type.
+
+        Args:
+            ratios: Share of the chunk's sample matching each type
+            count: Non-null values in the chunk
+        """
+        if self.matches is None:
+            return
+        for dtype, ratio in ratios.items():
+            self.matches[dtype] = self.matches.get(dtype, 0.0) + float(ratio) * count
+        self.matched_count += count
+
+    def matched_type(self) -> str | None:
+        """
+        Decide the type from the match counts of all chunks.
+
+        The values of each chunk count toward the share of the whole column
+        matching a type, so the column passes MATCH_THRESHOLD exactly when a
+        full read would, however the rows were split into chunks.
+
+        Returns:
+            The first type of MATCHED_TYPES that most values match, or None
+            if no type does
+        """
+        for dtype in MATCHED_TYPES:
+            if self.matches.get(dtype, 0.0) >= MATCH_THRESHOLD * self.matched_count:
+                return dtype
+        return None
+
+    def _merge_date_format(self, context: ColumnContext, date_format: str | None):
+        """
+        Combine the date format detected in a chunk with earlier chunks.
+
+        A format found in earlier chunks is kept while it still parses the
+        chunk, since a chunk whose days are all below 13 can be read either
+        way round. A column written in several formats has no single format
+        to report.
+        """
+        if self.type is None:
+            self.date_format = date_format
+        elif self.date_format is not None and date_format != self.date_format:
+            parsed = pd.to_datetime(context.text, format=self.date_format, errors='coerce')
+            if parsed.notna().mean() < MATCH_THRESHOLD:
+                self.date_format = None
+
+    def update(self, engine: InferenceEngine, series: pd.Series):
+        """
+        Fold a new chunk of the column into the profile.
+
+        Args:
+            engine: Engine providing the detectors
+            series: Chunk of the column
+        """
+        values = series.dropna()
+
+        self.row_count += len(series)
+        self.null_count += len(series) - len(values)
+        self.memory_bytes += int(series.memory_usage(deep=True, index=False))
+        self.dtype = join_dtypes(self.dtype, str(series.dtype))
+        self._count_distinct(engine, values)
+
+        if len(self.sample_values) < 5:
+            self.sample_values.extend(values.head(5 - len(self.sample_values)).tolist())
+
+        if not values.empty:
+            self.type = join_types(self.type, self._chunk_type(engine, series, values))
+
+    def _count_distinct(self, engine: InferenceEngine, values: pd.Series):
+        """
+        Track the distinct values of a chunk.
+
+        Values are kept in a set until there are more than the engine counts
+        exactly, or more than STREAMING_EXACT_DISTINCT_MAX_VALUES, then folded
+        into a HyperLogLog sketch. The sketch hashes the text of each value so
+        that chunks of different dtypes agree.
+
+        Args:
+            engine: Engine providing the distinct counting options
+            values: Non-null values of the chunk
+        """
+        if self.distinct_sketch is None:
+            self.unique_values.update(values.unique())
+            limit = STREAMING_EXACT_DISTINCT_MAX_VALUES
+            if engine.exact_distinct_max_rows is not None:
+                limit = min(limit, engine.exact_distinct_max_rows)
+            if len(self.unique_values) <= limit:
+                return
+            self.distinct_sketch = HyperLogLog.for_error(engine.distinct_error)
+            self.distinct_sketch.add(pd.Series([as_text(value) for value in self.unique_values], dtype=object))
+            self.unique_values = set()
+            return
+
+        if values.dtype != 'object':
+            values = values.map(as_text)
+        self.distinct_sketch.add(values)
+
+    def unique_count(self) -> int:
+        """
+        Count the distinct non-null values seen so far.
+
+        Returns:
+            Number of distinct values, estimated once a sketch is in use
+        """
+        if self.distinct_sketch is not None:
+            return self.distinct_sketch.count()
+        if self.dtype == 'object':
+            return len({as_text(value) for value in self.unique_values})
+        return len(self.unique_values)
+
+    def inferred_type(self) -> str:
+        """
+        Resolve the final inferred type of the column.
+
+        Returns:
+            Inferred pandas dtype
+        """
+        if self.dtype != 'object':
+            return self.dtype
+        if self.type is None:
+            return 'object'
+        inferred_type = self.type
+        # Types of registered detectors outside the lattice are kept as detected
+        if self.matches is not None and self.matched_count and inferred_type in TYPE_LATTICE:
+            inferred_type = self.matched_type() or 'object'
+            if inferred_type == 'datetime64[ns]' and self.type != 'datetime64[ns]' and self.date_format is None:
+                inferred_type = 'object'
+        if inferred_type == 'object':
+            # Same rule as InferenceEngine.check_if_categorical
+            unique_count = self.unique_count()
+            if unique_count / self.row_count < 0.05 or unique_count < 20:
+                return 'category'
+        return inferred_type
+
+    def to_state(self, engine: InferenceEngine) -> dict:
+        """
+        Serialize the profile into a JSON-compatible dictionary.
+
+        More than STATE_EXACT_DISTINCT_MAX_VALUES distinct values, or values
+        JSON cannot hold, are saved as a sketch, so their count is estimated
+        from then on.
+
+        Args:
+            engine: Engine providing the distinct counting options
+
+        Returns:
+            Dictionary that from_state restores the profile from
+        """
+        sketch = self.distinct_sketch
+        unique_values = None
+        if sketch is None:
+            unique_values = [as_json_value(value) for value in self.unique_values]
+            if len(unique_values) > STATE_EXACT_DISTINCT_MAX_VALUES or None in unique_values:
+                sketch = HyperLogLog.for_error(engine.distinct_error)
+                sketch.add(pd.Series([as_text(value) for value in self.unique_values], dtype=object))
+                unique_values = None
+        return {
+            'name': self.name,
+            'type': self.type,
+            'dtype': self.dtype,
+            'date_format': self.date_format,
+            'row_count': self.row_count,
+            'null_count': self.null_count,
+            'memory_bytes': self.memory_bytes,
+            'sampled_count': self.sampled_count,
+            'matches': self.matches,
+            'matched_count': self.matched_count,
+            'sample_values': [as_text(value) if as_json_value(value) is None else as_json_value(value)
+                              for value in self.sample_values],
+            'unique_values': unique_values,
+            'distinct_sketch': sketch.to_dict() if sketch is not None else None,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> 'ColumnProfile':
+        """
+        Restore a profile serialized by to_state.
+
+        Args:
+            state: Output of to_state
+
+        Returns:
+            The column profile
+        """
+        profile = cls(state['name'])
+        for attribute in ('type', 'dtype', 'date_format', 'row_count', 'null_count', 'memory_bytes',
+                          'sampled_count', 'sample_values'):
+            setattr(profile, attribute, state[attribute])
+        profile.matches = state.get('matches')
+        profile.matched_count = state.get('matched_count', 0)
+        if state['distinct_sketch'] is not None:
+            profile.distinct_sketch = HyperLogLog.from_dict(state['distinct_sketch'])
+        else:
+            profile.unique_values = set(state['unique_values'])
+        return profile
+
+    def column_info(self, engine: InferenceEngine) -> dict:
+        """
+        Build the column information dictionary for the profile.
+
+        Args:
+            engine: Engine used to format the column information
+
+        Returns:
+            Dictionary containing column information
+        """
+        inferred_type = self.inferred_type()
+        date_format = self.date_format if inferred_type == 'datetime64[ns]' else None
+        sample_values = self.sample_values
+        if self.dtype == 'object':
+            sample_values = [as_text(value) for value in sample_values]
+        return engine.build_column_info(
+            self.name, self.dtype, inferred_type, self.row_count - self.null_count,
+            self.null_count, self.unique_count(), sample_values, date_format, self.memory_bytes,
+            self.sampled_count or None, None, self.distinct_sketch is None
+        )
+
+
+class StreamingProfiler:
+    """
+    Infer column types of a CSV file chunk by chunk.
+
+    Only one chunk is held in memory at a time. The values of each chunk
+    matching each type are counted and merged, so a column gets the type a
+    full read would give under the same MATCH_THRESHOLD rule, rather than the
+    join of the types of its chunks.
+    Distinct values are counted exactly up to a fixed number per column and
+    estimated beyond it, so memory does not grow with the file.
+    """
+
+    def __init__(self, engine: InferenceEngine | None = None,
+                 memory_budget_bytes: int = DEFAULT_MEMORY_BUDGET_BYTES):
+        """
+        Initialize the StreamingProfiler.
+
+        Args:
+            engine: Engine providing the detectors
+            memory_budget_bytes: Peak memory the chunks may take up
+        """
+        self.engine = engine or InferenceEngine()
+        self.memory_budget_bytes = memory_budget_bytes
+        self.reset()
+
+    def reset(self):
+        """Discard all state collected so far."""
+        self.profiles = {}
+        self.fingerprint = None
+
+    def update(self, chunk: pd.DataFrame):
+        """
+        Fold a chunk of rows into the per-column state.
+
+        Args:
+            chunk: DataFrame holding the next rows of the file
+        """
+        # The schema is fingerprinted from the first chunk
+        if not self.profiles:
+            self.fingerprint = self.engine.lookup_schema(chunk)
+        for column in chunk.columns:
+            if column not in self.profiles:
+                self.profiles[column] = ColumnProfile(column, self.engine.schema_hint.get(column))
+            self.profiles[column].update(self.engine, chunk[column])
+
+    def state(self) -> dict:
+        """
+        Serialize the per-column state, so that later rows can be folded in.
+
+        Returns:
+            JSON-compatible dictionary that load_state restores
+        """
+        return {'columns': [profile.to_state(self.engine) for profile in self.profiles.values()]}
+
+    def load_state(self, state: dict):
+        """
+        Replace the per-column state with one saved by state().
+
+        Args:
+            state: Output of state()
+        """
+        self.profiles = {column['name']: ColumnProfile.from_state(column) for column in state['columns']}
+
+    def result(self) -> dict:
+        """
+        Build the DataFrame information for everything seen so far.
+
+        Returns:
+            Dictionary shaped like InferenceEngine.get_dataframe_info
+        """
+        profiles = list(self.profiles.values())
+        self.engine.remember_schema(
+            self.fingerprint,
+            {profile.name: profile.inferred_type() for profile in profiles},
+            {profile.name: profile.date_format for profile in profiles},
+        )
+        return {
+            'total_rows': profiles[0].row_count if profiles else 0,
+            'total_columns': len(profiles),
+            'memory_usage_bytes': sum(profile.memory_bytes for profile in profiles),
+            'columns': [profile.column_info(self.engine) for profile in profiles]
+        }
+
+    def estimate_chunksize(self, file_path: str, dialect: dict | None = None) -> int:
+        """
+        Pick the number of rows per chunk that keeps within the memory budget.
+
+        Args:
+            file_path: Path to the CSV file
+            dialect: Output of InferenceEngine.sniff_dialect. Sniffed if not given.
+
+        Returns:
+            Number of rows per chunk
+        """
+        head = self.engine.read_file(file_path, max_rows=ROW_SIZE_SAMPLE_ROWS, dialect=dialect)
+        if head.empty:
+            return ROW_SIZE_SAMPLE_ROWS
+        row_bytes = head.memory_usage(deep=True, index=False).sum() / len(head)
+        return max(1, int(self.memory_budget_bytes // (row_bytes * CHUNK_MEMORY_OVERHEAD)))
+
+    def profile_file(self, file_path: str, chunksize: int | None = None, dialect: dict | None = None) -> dict:
+        """
+        Infer the column types of a CSV file without loading it whole.
+
+        Args:
+            file_path: Path to the CSV file
+            chunksize: Rows per chunk. Derived from the memory budget if not set.
+            dialect: Output of InferenceEngine.sniff_dialect. Sniffed if not given.
+
+        Returns:
+            Dictionary shaped like InferenceEngine.get_dataframe_info
+        """
+        self.reset()
+        dialect = dialect or self.engine.sniff_dialect(file_path)
+        chunksize = chunksize or self.estimate_chunksize(file_path, dialect)
+        logger.info(f"Profiling {file_path} in chunks of {chunksize} rows")
+
+        for chunk in self.engine.read_file_in_chunks(file_path, chunksize, dialect):
+            self.update(chunk)
+        return self.result()
+
+
+class IncrementalCSVParser:
+    """
+    Parse CSV bytes into DataFrame chunks as they arrive.
+
+    The dialect is sniffed from the first bytes. Bytes are then buffered
+    until at least min_chunk_bytes are available. Records end at newlines
+    outside quoted fields, so quoted values spanning lines are never split
+    between chunks.
+    """
+
+    def __init__(self, min_chunk_bytes: int = DEFAULT_INGEST_CHUNK_BYTES):
+        """
+        Initialize the IncrementalCSVParser.
+
+        Args:
+            min_chunk_bytes: Bytes collected before the complete records are parsed
+        """
+        self.min_chunk_bytes = min_chunk_bytes
+        self.sniff_bytes = min(csv_dialect.SNIFF_BYTES, min_chunk_bytes)
+        self.dialect = None
+        self._encoding = None
+        self._quote = b'"'
+        self._header = None
+        self._parts = []
+        self._size = 0
+
+    def _take_buffer(self) -> bytes:
+        """Join and clear the buffered bytes."""
+        data = b''.join(self._parts)
+        self._parts, self._size = [], 0
+        return data
+
+    def _keep(self, data: bytes):
+        """Put bytes back at the start of the buffer."""
+        if data:
+            self._parts.insert(0, data)
+            self._size += len(data)
+
+    def _first_record_end(self, data: bytes) -> int:
+        """Position just past the first newline outside a quoted field, or 0."""
+        end = data.find(b'\n')
+        while end != -1 and data.count(self._quote, 0, end) % 2:
+            end = data.find(b'\n', end + 1)
+        return end + 1
+
+    def _last_record_end(self, data: bytes) -> int:
+        """Position just past the last newline outside a quoted field, or 0."""
+        end = data.rfind(b'\n')
+        while end != -1 and data.count(self._quote, 0, end) % 2:
+            end = data.rfind(b'\n', 0, end)
+        return end + 1
+
+    def _start(self, buffer: bytes, complete: bool) -> bytes:
+        """
+        Sniff the dialect and set up the header line from the first bytes.
+
+        Args:
+            buffer: Every byte received so far
+            complete: Whether the buffer is the whole file
+
+        Returns:
+            The bytes left to parse below the header
+        """
+        self.dialect = csv_dialect.sniff_bytes(buffer[:self.sniff_bytes], complete)
+        encoding = self.dialect['encoding']
+        if encoding == 'utf-16':
+            # Newlines cannot be found byte by byte in UTF-16 text
+            raise ValueError("UTF-16 files cannot be parsed incrementally")
+        if encoding == 'utf-8-sig':
+            buffer, encoding = buffer[len(codecs.BOM_UTF8):], 'utf-8'
+        self._encoding = encoding
+        self._quote = self.dialect['quotechar'].encode(encoding)
+
+        if complete and not buffer.endswith(b'\n'):
+            buffer += b'\n'
+        header_end = self._first_record_end(buffer)
+        if self.dialect['header']:
+            self._header = buffer[:header_end]
+            return buffer[header_end:]
+
+        # Files without a header get generated column names
+        first_record = buffer[:header_end].decode(encoding)
+        fields = next(csv.reader([first_record], delimiter=self.dialect['delimiter'],
+                                 quotechar=self.dialect['quotechar']), [])
+        names = csv_dialect.column_names(len(fields))
+        self._header = (self.dialect['delimiter'].join(names) + '\n').encode(encoding)
+        return buffer
+
+    def _parse(self, records: bytes) -> pd.DataFrame:
+        """Parse complete records below the header line."""
+        return pd.read_csv(io.BytesIO(self._header + records), sep=self.dialect['delimiter'],
+                           quotechar=self.dialect['quotechar'], encoding=self._encoding)
+
+    def feed(self, data: bytes) -> list[pd.DataFrame]:
+        """
+        Add the next bytes of the file.
+
+        Args:
+            data: Next bytes of the file
+
+        Returns:
+            DataFrames parsed from the records completed so far
+        """
+        self._parts.append(data)
+        self._size += len(data)
+
+        if self._header is None:
+            if self._size < self.sniff_bytes:
+                return []
+            buffer = self._take_buffer()
+            if self._first_record_end(buffer) == 0:
+                self._keep(buffer)
+                return []
+            self._keep(self._start(buffer, complete=False))
+
+        if self._size < self.min_chunk_bytes:
+            return []
+        buffer = self._take_buffer()
+        end = self._last_record_end(buffer)
+        self._keep(buffer[end:])
+        if end == 0:
+            return []
+        return [self._parse(buffer[:end])]
+
+    def close(self) -> list[pd.DataFrame]:
+        """
+        Parse whatever is left once the last bytes have arrived.
+
+        Returns:
+            DataFrames parsed from the remaining records
+        """
+        buffer = self._take_buffer()
+        if self._header is None:
+            if not buffer.strip():
+                return []
+            buffer = self._start(buffer, complete=True)
+        if not self._header.strip():
+            return []
+        return [self._parse(buffer)]
+
+
+class StreamingIngest:
+    """
+    Parse an uploaded CSV while its chunks are being received.
+
+    By the time the last chunk has been written to disk, the parsed DataFrame
+    is ready, so the file never has to be read back. The chunks are only
+    profiled on close(), so uploads the caller serves from its result cache
+    are never profiled. Parse errors are recorded instead of raised, letting
+    the caller fall back to reading the saved file.
+    """
+
+    def __init__(self, engine: InferenceEngine | None = None,
+                 min_chunk_bytes: int = DEFAULT_INGEST_CHUNK_BYTES):
+        """
+        Initialize the StreamingIngest.
+
+        Args:
+            engine: Engine providing the detectors
+            min_chunk_bytes: Bytes of complete records collected before parsing
+        """
+        self.profiler = StreamingProfiler(engine)
+        self.parser = IncrementalCSVParser(min_chunk_bytes)
+        self.chunks = []
+        self.error = None
+
+    def _add(self, chunks: list[pd.DataFrame]):
+        """Keep newly parsed chunks."""
+        for chunk in chunks:
+            # Trailing empty chunks would otherwise widen every column to text
+            if chunk.empty and self.chunks:
+                continue
+            self.chunks.append(chunk)
+
+    def feed(self, data: bytes):
+        """
+        Add the next bytes of the upload.
+
+        Args:
+            data: Next bytes of the upload
+        """
+        if self.error is not None:
+            return
+        try:
+            self._add(self.parser.feed(data))
+        except Exception as e:
+            logger.warning(f"Streaming parse failed, falling back to reading the file: {e}")
+            self.error = e
+
+    def close(self, file_path: str | None = None) -> tuple[pd.DataFrame, dict] | None:
+        """
+        Finish parsing, profile the chunks and build the DataFrame and its information.
+
+        Args:
+            file_path: Path the upload was saved to. Columns whose chunks were
+                parsed to different dtypes are read again from it as text.
+
+        Returns:
+            Tuple containing the parsed DataFrame and information dictionary,
+            or None if the upload could not be parsed incrementally
+        """
+        if self.error is None:
+            try:
+                self._add(self.parser.close())
+            except Exception as e:
+                logger.warning(f"Streaming parse failed, falling back to reading the file: {e}")
+                self.error = e
+        if self.error is not None or not self.chunks:
+            return None
+
+        with metrics.stage('profile') as stage:
+            self.profiler.reset()
+            for chunk in self.chunks:
+                self.profiler.update(chunk)
+            stage.rows = sum(len(chunk) for chunk in self.chunks)
+        info_dict = self.profiler.result()
+        chunks, mixed = self._text_chunks(info_dict)
+        df = pd.concat(chunks, ignore_index=True)
+        if mixed:
+            if file_path is None:
+                logger.info("Chunks of the upload disagree on column dtypes, falling back to reading the file")
+                return None
+            self._read_text_columns(df, info_dict, mixed, file_path)
+        return df, info_dict
+
+    def _text_chunks(self, info_dict: dict) -> tuple[list[pd.DataFrame], list[str]]:
+        """
+        Give columns read as text overall the object dtype in every chunk.
+
+        A column can parse as numbers in one chunk and as text in another. A
+        full read would have kept every value as it is written in the file,
+        which the numbers parsed from a chunk no longer tell, e.g. for
+        leading zeros.
+
+        Returns:
+            Tuple of the chunks and the names of the columns that have values
+            parsed as something other than text
+        """
+        text_columns = [col['name'] for col in info_dict['columns'] if col['current_type'] == 'object']
+        chunks = []
+        mixed = set()
+        for chunk in self.chunks:
+            mismatched = [column for column in text_columns if chunk[column].dtype != 'object']
+            if mismatched:
+                # Chunks where the column is entirely null lose nothing
+                mixed.update(column for column in mismatched if chunk[column].notna().any())
+                chunk = chunk.astype({column: 'object' for column in mismatched})
+            chunks.append(chunk)
+        return chunks, [column for column in text_columns if column in mixed]
+
+    def _read_text_columns(self, df: pd.DataFrame, info_dict: dict, columns: list[str], file_path: str):
+        """
+        Replace columns of mixed chunks with their text as read from the saved upload.
+
+        Only these columns are parsed again. Their information is updated to
+        the values read.
+
+        Args:
+            df: DataFrame built from the chunks, updated in place
+            info_dict: Information of the DataFrame, updated in place
+            columns: Names of the columns to read again
+            file_path: Path of the saved upload
+        """
+        positions = sorted(df.columns.get_loc(column) for column in columns)
+        with metrics.stage('read_file') as stage:
+            text = self.profiler.engine.read_text_columns(file_path, positions, dialect=self.parser.dialect)
+            stage.rows = len(text)
+        if len(text) != len(df):
+            raise ValueError(f"Read {len(text)} rows from {file_path}, parsed {len(df)} while streaming")
+        for position, values in zip(positions, text.columns):
+            df.isetitem(position, text[values].to_numpy(dtype=object))
+
+        for col_info in info_dict['columns']:
+            if col_info['name'] in columns:
+                values = df[col_info['name']].dropna()
+                col_info['sample_values'] = values.head(5).tolist()
+                col_info['unique_count'], col_info['unique_count_exact'] = self.profiler.engine.count_distinct(values)
+                col_info['memory_usage_bytes'] = int(df[col_info['name']].memory_usage(deep=True, index=False))
+        info_dict['memory_usage_bytes'] = int(
+            df.index.memory_usage(deep=True) + sum(col['memory_usage_bytes'] for col in info_dict['columns'])
+        )
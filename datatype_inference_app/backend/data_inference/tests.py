@@ -1,3 +1,582 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import pandas as pd
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import jobs
+from .models import ProcessedFile, ColumnMetadata, InferenceJob
+from .infer_data_type import InferenceEngine
+from .streaming import StreamingIngest, StreamingProfiler
+from .services import append_rows, converted_column_cache, result_cache, schema_cache
+
+SAMPLE_CSV = (
+    b"id,name,age,hire_date,is_manager\n"
+    b"1,John,25,2020-01-15,Yes\n"
+    b"2,Jane,30,2019-05-20,No\n"
+    b"3,Bob,22,2021-03-10,No\n"
+)
+
+
+class UploadTestMixin:
+    """Uploads files into a temporary MEDIA_ROOT."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.client = APIClient()
+        result_cache.clear()
+        converted_column_cache.clear()
+        schema_cache.clear()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def upload(self, content=SAMPLE_CSV, name='sample.csv', **data):
+        return self.client.post('/api/data_inference/upload_file/', {
+            'file': SimpleUploadedFile(name, content, content_type='text/csv'),
+            **data,
+        }, format='multipart')
+
+
+class UploadFileTests(UploadTestMixin, TestCase):
+    """Tests for the upload endpoint."""
+
+    def test_repeated_upload_is_served_from_cache(self):
+        first = self.upload()
+        second = self.upload(name='renamed.csv')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertFalse(first.data['cached'])
+        self.assertTrue(second.data['cached'])
+        self.assertEqual(second.data['file_id'], first.data['file_id'])
+        self.assertEqual(ProcessedFile.objects.count(), 1)
+
+        # Streamed uploads served from cache are not profiled again
+        with mock.patch('data_inference.views.StreamingIngest',
+                        lambda engine: StreamingIngest(engine, min_chunk_bytes=64)), \
+                mock.patch.object(StreamingProfiler, 'update') as update:
+            self.assertTrue(self.upload().data['cached'])
+        update.assert_not_called()
+
+        # Different options are cached separately
+        converted = self.upload(apply_inferred_types='true')
+        self.assertFalse(converted.data['cached'])
+
+        stats = self.client.get('/api/data_inference/cache-stats/').data
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (2, 2, 2))
+
+    def test_recurring_schema_skips_detection(self):
+        self.upload()
+        next_hour = SAMPLE_CSV.replace(b'John', b'Maria').replace(b'2020-01-15', b'2020-02-16')
+        with mock.patch.object(InferenceEngine, 'sample_column', side_effect=AssertionError):
+            response = self.upload(next_hour, name='next_hour.csv', include_timings='true')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['cached'])
+        self.assertEqual({col['name']: col['inferred_type'] for col in response.data['columns']}['hire_date'],
+                         'datetime64[ns]')
+        self.assertEqual(set(response.data['timings']['columns']['is_manager']), {'schema_cache'})
+
+        stats = self.client.get('/api/data_inference/cache-stats/').data['schema_cache']
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+
+    def test_csv_upload_is_parsed_while_streaming(self):
+        with mock.patch.object(InferenceEngine, 'read_file', side_effect=AssertionError):
+            response = self.upload()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_rows'], 3)
+
+    def test_sniffed_dialect_is_stored(self):
+        content = SAMPLE_CSV.replace(b',', b';')
+        response = self.upload(content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_columns'], 5)
+        self.assertEqual(response.data['dialect']['delimiter'], ';')
+
+        # Reading the original upload again reuses the stored dialect
+        processed_file = ProcessedFile.objects.get(pk=response.data['file_id'])
+        processed_file.snapshot_file = None
+        processed_file.save()
+        with mock.patch.object(InferenceEngine, 'sniff_dialect', side_effect=AssertionError):
+            apply_response = self.client.post(f'/api/data_inference/{processed_file.id}/apply-types/', {
+                'column_types': {'age': 'Decimal'},
+            }, format='json')
+        self.assertEqual(apply_response.status_code, 200)
+
+    def test_upload_writes_selected_output_format(self):
+        response = self.upload(apply_inferred_types='true', output_format='parquet')
+        self.assertEqual(response.status_code, 200)
+
+        processed_file = ProcessedFile.objects.get(pk=response.data['file_id'])
+        self.assertEqual(processed_file.output_format, 'parquet')
+        self.assertEqual(os.path.basename(processed_file.processed_file.name), 'processed_sample.parquet')
+
+        self.assertEqual(self.upload(output_format='xml').status_code, 400)
+
+    def test_upload_reports_memory_optimization(self):
+        response = self.upload(optimize_memory='true')
+        self.assertEqual(response.status_code, 200)
+
+        report = response.data['memory_optimization']
+        self.assertLess(report['bytes_after'], report['bytes_before'])
+        self.assertEqual(len(report['columns']), 5)
+        self.assertIsNotNone(ProcessedFile.objects.get(pk=response.data['file_id']).processed_file.name)
+
+    def test_upload_reports_timings_and_metrics(self):
+        response = self.upload(apply_inferred_types='true', include_timings='true')
+        self.assertEqual(response.status_code, 200)
+
+        timings = response.data['timings']
+        for stage in ('receive_upload', 'write_snapshot', 'convert', 'write_output', 'save_records'):
+            self.assertIn(stage, timings['stages'])
+        self.assertEqual(timings['stages']['write_output']['rows'], 3)
+        self.assertIn('match_ratios', timings['columns']['hire_date'])
+        self.assertNotIn('timings', self.upload().data)
+
+        metrics_text = self.client.get('/api/data_inference/metrics/').content.decode()
+        self.assertIn('inference_request_seconds_count{action="upload_file"}', metrics_text)
+        self.assertIn('inference_stage_bytes_total{stage="receive_upload"}', metrics_text)
+
+    def test_workbook_sheets_are_processed_separately(self):
+        workbook = io.BytesIO()
+        with pd.ExcelWriter(workbook) as writer:
+            pd.DataFrame({'id': [1, 2], 'price': ['1.5', '2']}).to_excel(writer, sheet_name='items', index=False)
+            pd.DataFrame({'day': ['2024-01-01', '2024-01-02']}).to_excel(writer, sheet_name='dates', index=False)
+        content = workbook.getvalue()
+
+        response = self.upload(content, name='book.xlsx', all_sheets='true', apply_inferred_types='true')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([sheet['sheet_name'] for sheet in response.data['sheets']], ['items', 'dates'])
+        self.assertEqual(response.data['sheets'][1]['columns'][0]['inferred_type'], 'datetime64[ns]')
+        self.assertEqual(
+            sorted(os.path.basename(name) for name in ProcessedFile.objects.values_list('processed_file', flat=True)),
+            ['processed_book_dates.csv', 'processed_book_items.csv'])
+
+        # A single sheet by position is served from the per-sheet cache
+        single = self.upload(content, name='book.xlsx', sheet='1', apply_inferred_types='true')
+        self.assertTrue(single.data['cached'])
+        self.assertEqual(single.data['sheet_name'], 'dates')
+
+        self.assertEqual(self.upload(content, name='book.xlsx', sheet='missing').status_code, 400)
+
+    def test_weekday_names_stay_text(self):
+        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'] * 30
+        content = pd.DataFrame({'id': range(210), 'day': days}).to_csv(index=False).encode()
+
+        response = self.upload(content, 'days.csv', apply_inferred_types='true')
+        self.assertEqual(response.status_code, 200)
+        day = next(column for column in response.data['columns'] if column['name'] == 'day')
+        self.assertEqual(day['inferred_type'], 'category')
+        self.assertEqual(day['conversion_failures'], 0)
+
+        # Streamed uploads agree with inference on the whole DataFrame
+        self.assertEqual(InferenceEngine().infer_column_type(pd.Series(days, name='day')), 'category')
+        processed = pd.read_csv(ProcessedFile.objects.get().processed_file.path)
+        self.assertEqual(processed['day'].tolist(), days)
+
+    def test_uploads_without_records_are_deleted(self):
+        def saved_uploads():
+            return sorted(os.listdir(os.path.join(self.media_root, 'uploads')))
+
+        self.upload()
+        kept = saved_uploads()
+        self.assertEqual(len(kept), 1)
+        self.assertEqual(ProcessedFile.objects.get().original_file.name, f'uploads/{kept[0]}')
+
+        # Uploads served from cache, rejected or failed are not kept
+        self.assertTrue(self.upload().data['cached'])
+        workbook = io.BytesIO()
+        pd.DataFrame({'id': [1, 2]}).to_excel(workbook, index=False)
+        self.assertEqual(self.upload(workbook.getvalue(), name='book.xlsx', sheet='missing').status_code, 400)
+        self.assertEqual(self.upload(b'notes', name='notes.txt').status_code, 500)
+        self.assertEqual(self.client.post('/api/data_inference/upload-batch/', {
+            'files': [SimpleUploadedFile('sample.csv', SAMPLE_CSV), SimpleUploadedFile('notes.txt', b'text')],
+        }, format='multipart').status_code, 400)
+        self.assertEqual(saved_uploads(), kept)
+
+
+class UploadBatchTests(UploadTestMixin, TestCase):
+    """Tests for the batch upload endpoint."""
+
+    def upload_batch(self, *files, **data):
+        return self.client.post('/api/data_inference/upload-batch/', {
+            'files': [SimpleUploadedFile(name, content) for name, content in files],
+            **data,
+        }, format='multipart')
+
+    @override_settings(INFERENCE_BATCH_WORKERS=2)
+    def test_batch_files_and_archives_are_processed_together(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zip_file:
+            zip_file.writestr('exports/semicolons.csv', SAMPLE_CSV.replace(b',', b';'))
+            zip_file.writestr('exports/broken.parquet', b'not parquet')
+            zip_file.writestr('__MACOSX/exports/._semicolons.csv', b'')
+            zip_file.writestr('exports/readme.txt', b'skipped')
+
+        response = self.upload_batch(('sample.csv', SAMPLE_CSV), ('exports.zip', archive.getvalue()),
+                                     apply_inferred_types='true')
+        self.assertEqual(response.status_code, 200)
+        files = response.data['files']
+        self.assertEqual([file['file_name'] for file in files], ['sample.csv', 'semicolons.csv', 'broken.parquet'])
+        self.assertEqual((response.data['total_files'], response.data['failed_files']), (3, 1))
+        self.assertEqual(files[1]['dialect']['delimiter'], ';')
+        self.assertIn('error', files[2])
+        self.assertEqual(ProcessedFile.objects.count(), 2)
+        self.assertEqual(ColumnMetadata.objects.count(), 10)
+
+        # Files processed by a batch are served from the upload cache
+        self.assertTrue(self.upload(apply_inferred_types='true').data['cached'])
+
+    def test_files_with_the_same_name_are_kept_apart(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zip_file:
+            zip_file.writestr('a/data.csv', SAMPLE_CSV)
+            zip_file.writestr('b/data.csv', SAMPLE_CSV.replace(b'John', b'Joan'))
+
+        response = self.upload_batch(('data.zip', archive.getvalue()),
+                                     ('data.csv', SAMPLE_CSV.replace(b'John', b'Jack')),
+                                     ('data.csv', SAMPLE_CSV.replace(b'John', b'Jill')),
+                                     apply_inferred_types='true')
+        self.assertEqual(response.status_code, 200)
+        names = [next(column['sample_values'][0] for column in file['columns'] if column['name'] == 'name')
+                 for file in response.data['files']]
+        self.assertEqual(names, ['John', 'Joan', 'Jack', 'Jill'])
+
+        processed_files = ProcessedFile.objects.order_by('id')
+        self.assertEqual(len({file.original_file.name for file in processed_files}), 4)
+        self.assertEqual(len({file.processed_file.name for file in processed_files}), 4)
+        written = [pd.read_csv(file.processed_file.path)['name'][0] for file in processed_files]
+        self.assertEqual(written, names)
+
+    def test_batch_is_rejected_as_a_whole(self):
+        self.assertEqual(self.upload_batch().status_code, 400)
+        self.assertEqual(self.upload_batch(('notes.txt', b'text')).status_code, 400)
+        self.assertEqual(self.upload_batch(('exports.zip', b'not a zip')).status_code, 400)
+        with override_settings(INFERENCE_BATCH_MAX_FILES=1):
+            response = self.upload_batch(('a.csv', SAMPLE_CSV), ('b.csv', SAMPLE_CSV))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ProcessedFile.objects.count(), 0)
+
+
+class ApplyTypesTests(UploadTestMixin, TestCase):
+    """Tests for the apply-types endpoint."""
+
+    def test_apply_types_updates_column_metadata(self):
+        file_id = self.upload().data['file_id']
+        self.assertEqual(ColumnMetadata.objects.filter(processed_file_id=file_id).count(), 5)
+
+        response = self.client.post(f'/api/data_inference/{file_id}/apply-types/', {
+            'column_types': {'age': 'Decimal', 'hire_date': 'Date/Time', 'missing': 'Integer'},
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        applied = dict(ColumnMetadata.objects.filter(processed_file_id=file_id)
+                       .values_list('column_name', 'applied_type'))
+        self.assertEqual(applied['age'], 'float64')
+        self.assertEqual(applied['hire_date'], 'datetime64[ns]')
+        self.assertIsNone(applied['name'])
+        self.assertTrue(ProcessedFile.objects.get(pk=file_id).processed_file.name.startswith('processed/'))
+
+    def test_apply_types_reuses_snapshot_and_converted_columns(self):
+        file_id = self.upload().data['file_id']
+        self.assertTrue(ProcessedFile.objects.get(pk=file_id).snapshot_file.name.startswith('snapshots/'))
+
+        url = f'/api/data_inference/{file_id}/apply-types/'
+        self.client.post(url, {'column_types': {'age': 'Decimal'}}, format='json')
+        first_output = ProcessedFile.objects.get(pk=file_id).processed_file.path
+
+        # The original upload is never parsed again and 'age' is not reconverted
+        with mock.patch.object(InferenceEngine, 'read_file', side_effect=AssertionError):
+            response = self.client.post(url, {
+                'column_types': {'age': 'Decimal', 'hire_date': 'Date/Time'},
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((converted_column_cache.hits, converted_column_cache.misses), (1, 2))
+        # The output written for the earlier types is replaced
+        self.assertFalse(os.path.exists(first_output))
+        self.assertTrue(os.path.exists(ProcessedFile.objects.get(pk=file_id).processed_file.path))
+
+    def test_preview_pages_are_typed(self):
+        rows = b"".join(f"{i},2020-01-{i % 28 + 1:02d},{'Yes' if i % 2 else 'No'}\n".encode() for i in range(120))
+        file_id = self.upload(b"id,day,flag\n" + rows, name='long.csv').data['file_id']
+        url = f'/api/data_inference/{file_id}/preview/'
+
+        response = self.client.get(url, {'page': 3, 'page_size': 50})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['total_rows'], response.data['total_pages']), (120, 3))
+        self.assertEqual(response.data['columns'], ['id', 'day', 'flag'])
+        self.assertEqual(response.data['dtypes']['day'], 'datetime64[ns]')
+        self.assertEqual(len(response.data['rows']), 20)
+        self.assertEqual(response.data['rows'][0], [100, '2020-01-17T00:00:00.000', False])
+
+        # Only the requested rows are read from the snapshot
+        with mock.patch.object(InferenceEngine, 'read_snapshot', side_effect=AssertionError):
+            self.assertEqual(self.client.get(url).data['rows'][0][0], 0)
+        self.assertEqual(self.client.get(url, {'page': 4}).data['rows'], [])
+        self.assertEqual(self.client.get(url, {'page_size': 0}).status_code, 400)
+        self.assertEqual(self.client.get('/api/data_inference/999/preview/').status_code, 404)
+
+    def test_preview_pages_share_the_date_format_of_the_column(self):
+        # Only the last rows have days that tell day-first dates apart from month-first ones
+        days = [f"{day % 12 + 1:02d}/03/2020" for day in range(50)] + [f"{day}/03/2020" for day in range(13, 29)]
+        content = pd.DataFrame({'id': range(len(days)), 'day': days}).to_csv(index=False).encode()
+        file_id = self.upload(content, name='days.csv').data['file_id']
+        self.assertEqual(ColumnMetadata.objects.get(processed_file_id=file_id, column_name='day').date_format,
+                         '%d/%m/%Y')
+
+        rows = self.client.get(f'/api/data_inference/{file_id}/preview/', {'page_size': 50}).data['rows']
+        self.assertEqual(rows[0], [0, '2020-03-01T00:00:00.000'])
+
+    def test_append_widens_types_from_new_rows_only(self):
+        file_id = self.upload().data['file_id']
+        self.assertIsNotNone(ProcessedFile.objects.get(pk=file_id).profile_state)
+        url = f'/api/data_inference/{file_id}/append/'
+
+        def append(content):
+            return self.client.post(url, {'file': SimpleUploadedFile('delta.csv', content)}, format='multipart')
+
+        snapshot_file = ProcessedFile.objects.get(pk=file_id).snapshot_file.name
+        response = append(b"id,name,age,hire_date,is_manager\n4,Ann,31.5,2022-07-01,Yes\n")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['appended_rows'], response.data['total_rows']), (1, 4))
+        self.assertEqual(response.data['widened_columns'], [{'name': 'age', 'from': 'int64', 'to': 'float64'}])
+        inferred = dict(ColumnMetadata.objects.filter(processed_file_id=file_id)
+                        .values_list('column_name', 'inferred_type'))
+        self.assertEqual(inferred['age'], 'float64')
+        self.assertEqual(inferred['hire_date'], 'datetime64[ns]')
+
+        # The original upload is not read again, its profile is restored from the state
+        with mock.patch.object(InferenceEngine, 'read_snapshot', side_effect=AssertionError):
+            response = append(b"id,name,age,hire_date,is_manager\n5,Ann,40,2023-01-09,No\n")
+        self.assertEqual(response.data['total_rows'], 5)
+        self.assertEqual(response.data['widened_columns'], [])
+        preview = self.client.get(f'/api/data_inference/{file_id}/preview/').data
+        self.assertEqual([row[2] for row in preview['rows']], [25.0, 30.0, 22.0, 31.5, 40.0])
+        page = self.client.get(f'/api/data_inference/{file_id}/preview/', {'page': 2, 'page_size': 2}).data
+        self.assertEqual([row[0] for row in page['rows']], [3, 4])
+
+        # The stored rows are not written again, each append adds a snapshot segment
+        processed_file = ProcessedFile.objects.get(pk=file_id)
+        self.assertEqual(processed_file.snapshot_file.name, snapshot_file)
+        self.assertEqual(len(processed_file.snapshot_segments), 2)
+
+        # Cached responses of the original upload are out of date
+        self.assertFalse(self.upload().data['cached'])
+        self.assertEqual(append(b"id,name\n6,Ann\n").status_code, 400)
+
+    def test_append_keeps_text_written_in_files(self):
+        file_id = self.upload(b"code,qty\n02100,1\n00042,2\n", name='codes.csv').data['file_id']
+        url = f'/api/data_inference/{file_id}/'
+        self.client.post(url + 'apply-types/', {'column_types': {'code': 'Integer'}}, format='json')
+        processed_file = ProcessedFile.objects.get(pk=file_id)
+        first_snapshot, first_output = processed_file.snapshot_file.path, processed_file.processed_file.path
+
+        response = self.client.post(url + 'append/', {
+            'file': SimpleUploadedFile('delta.csv', b"code,qty\nA100,3\n"),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([column['name'] for column in response.data['widened_columns']], ['code'])
+
+        # Types applied before the append no longer hold, nor does their output
+        processed_file = ProcessedFile.objects.get(pk=file_id)
+        self.assertIsNone(processed_file.columns.get(column_name='code').applied_type)
+        self.assertFalse(processed_file.processed_file)
+        self.assertFalse(os.path.exists(first_output))
+        # Codes parsed as numbers are read again as written, once
+        self.assertFalse(os.path.exists(first_snapshot))
+
+        response = self.client.post(url + 'append/', {
+            'file': SimpleUploadedFile('delta.csv', b"code,qty\n007,4\n"),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        rows = self.client.get(url + 'preview/').data['rows']
+        self.assertEqual([row[0] for row in rows], ['02100', '00042', 'A100', '007'])
+
+    def test_append_profiles_files_without_state_once(self):
+        file_id = self.upload(run_async='false').data['file_id']
+        ProcessedFile.objects.filter(pk=file_id).update(profile_state=None)
+
+        response = self.client.post(f'/api/data_inference/{file_id}/append/', {
+            'file': SimpleUploadedFile('delta.csv', b"id,name,age,hire_date,is_manager\n4,Ann,28,2022-07-01,maybe\n"),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_rows'], 4)
+        self.assertEqual(response.data['widened_columns'],
+                         [{'name': 'is_manager', 'from': 'bool', 'to': 'category'}])
+        self.assertEqual(ProcessedFile.objects.get(pk=file_id).profile_state['columns'][0]['row_count'], 4)
+
+    def test_append_builds_on_rows_stored_by_other_appends(self):
+        file_id = self.upload().data['file_id']
+        stale = ProcessedFile.objects.get(pk=file_id)
+        response = self.client.post(f'/api/data_inference/{file_id}/append/', {
+            'file': SimpleUploadedFile('delta.csv', b"id,name,age,hire_date,is_manager\n4,Ann,31,2022-07-01,Yes\n"),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 200)
+
+        # An append that read the file before the other one stored its rows
+        file_path = os.path.join(self.media_root, 'delta.csv')
+        with open(file_path, 'wb') as destination:
+            destination.write(b"id,name,age,hire_date,is_manager\n5,Bea,40,2023-01-09,No\n")
+        result = append_rows(InferenceEngine(), stale, file_path, os.path.getsize(file_path))
+        self.assertEqual(result['total_rows'], 5)
+
+        processed_file = ProcessedFile.objects.get(pk=file_id)
+        self.assertEqual(len(processed_file.snapshot_segments), 2)
+        self.assertEqual(processed_file.profile_state['columns'][0]['row_count'], 5)
+        rows = self.client.get(f'/api/data_inference/{file_id}/preview/').data['rows']
+        self.assertEqual([row[0] for row in rows], [1, 2, 3, 4, 5])
+
+    def test_apply_types_unknown_file(self):
+        response = self.client.post('/api/data_inference/999/apply-types/', {
+            'column_types': {'age': 'Decimal'},
+        }, format='json')
+        self.assertEqual(response.status_code, 404)
+
+
+class UploadJobTests(UploadTestMixin, TransactionTestCase):
+    """Tests for background upload jobs, which run on their own connections."""
+
+    def setUp(self):
+        super().setUp()
+        # One worker runs the jobs in submission order, as INFERENCE_JOB_WORKERS=1 would
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        patcher = mock.patch.object(jobs, 'executor', executor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def wait_for_job(self, job_id, timeout=10):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            response = self.client.get(f'/api/data_inference/jobs/{job_id}/')
+            if response.data['status'] in (InferenceJob.STATUS_DONE, InferenceJob.STATUS_FAILED):
+                return response
+            time.sleep(0.05)
+        self.fail(f"Job {job_id} did not finish")
+
+    def test_async_upload_reports_result_when_done(self):
+        response = self.upload(run_async='true')
+        self.assertEqual(response.status_code, 202)
+
+        job = self.wait_for_job(response.data['job_id']).data
+        self.assertEqual(job['status'], InferenceJob.STATUS_DONE)
+        self.assertEqual(job['result']['total_rows'], 3)
+        self.assertEqual(job['processed_file'], job['result']['file_id'])
+
+        # The finished job fills the result cache for later uploads
+        self.assertTrue(self.upload(run_async='true').data['cached'])
+
+    def test_jobs_of_stopped_processes_fail(self):
+        def running_job(heartbeat):
+            return InferenceJob.objects.create(file_name='old.csv', file_path='/missing/old.csv', file_size=1,
+                                               content_hash='0' * 64, status=InferenceJob.STATUS_RUNNING,
+                                               worker_id='host:1:boot', heartbeat_date=heartbeat)
+        stale = running_job(timezone.now() - timedelta(hours=1))
+        sibling = running_job(timezone.now())
+
+        # Reporting a status writes nothing
+        self.assertEqual(self.client.get(f'/api/data_inference/jobs/{stale.id}/').data['status'],
+                         InferenceJob.STATUS_RUNNING)
+
+        self.assertEqual(jobs.fail_orphaned_jobs(), 1)
+        response = self.client.get(f'/api/data_inference/jobs/{stale.id}/')
+        self.assertEqual(response.data['status'], InferenceJob.STATUS_FAILED)
+        self.assertIn('stopped', response.data['error'])
+        # A live sibling worker's job is left alone, and a failed job's outcome stays
+        self.assertEqual(InferenceJob.objects.get(pk=sibling.pk).status, InferenceJob.STATUS_RUNNING)
+        self.assertFalse(jobs._record_status(stale.id, status=InferenceJob.STATUS_DONE))
+        self.assertEqual(InferenceJob.objects.get(pk=stale.pk).status, InferenceJob.STATUS_FAILED)
+
+    def test_same_name_uploads_keep_their_own_content(self):
+        with mock.patch('data_inference.views.submit_job', wraps=jobs.submit_job) as submit:
+            first = self.upload(run_async='true')
+            second = self.upload(SAMPLE_CSV.replace(b'John', b'Joan'), run_async='true')
+        first_path, second_path = (call.args[0] for call in submit.call_args_list)
+        self.assertNotEqual(first_path, second_path)
+        with open(first_path, 'rb') as f:
+            self.assertEqual(f.read(), SAMPLE_CSV)
+
+        for response in (first, second):
+            self.assertEqual(self.wait_for_job(response.data['job_id']).data['status'], InferenceJob.STATUS_DONE)
+        names = {column['sample_values'][0] for job in InferenceJob.objects.all()
+                 for column in job.result['columns'] if column['name'] == 'name'}
+        self.assertEqual(names, {'John', 'Joan'})
+
+    def test_job_records_status_write_failures(self):
+        job = InferenceJob.objects.create(file_name='sample.csv', file_path='/missing/sample.csv', file_size=1,
+                                          content_hash='0' * 64)
+        locked = OperationalError("database is locked")
+        # A job that cannot even be loaded still records its failure
+        with mock.patch.object(InferenceJob.objects, 'get', side_effect=locked):
+            jobs.run_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (InferenceJob.STATUS_FAILED, str(locked)))
+        self.assertIsNotNone(job.finished_date)
+
+        # Locked status writes are retried
+        with mock.patch.object(jobs, 'STATUS_WRITE_DELAY', 0), \
+                mock.patch('django.db.models.query.QuerySet.update',
+                           side_effect=[locked, locked, 1]) as update:
+            jobs._record_status(job.id, status=InferenceJob.STATUS_DONE)
+        self.assertEqual(update.call_count, 3)
+
+    def test_unknown_job(self):
+        self.assertEqual(self.client.get('/api/data_inference/jobs/999/').status_code, 404)
+
+
+class AsyncViewTests(UploadTestMixin, TransactionTestCase):
+    """Tests for the async views, whose pandas work runs on executor threads."""
+
+    async def async_upload(self, content=SAMPLE_CSV, name='sample.csv', **data):
+        return await self.async_client.post('/api/async/data_inference/upload_file/', {
+            'file': SimpleUploadedFile(name, content, content_type='text/csv'),
+            **data,
+        })
+
+    async def test_async_upload_and_apply_types(self):
+        response = await self.async_upload(include_timings='true')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertFalse(data['cached'])
+        self.assertEqual(data['total_rows'], 3)
+        self.assertIn('read_file', data['timings']['stages'])
+
+        # The async and WSGI endpoints share the upload cache
+        self.assertTrue((await self.async_upload(name='renamed.csv')).json()['cached'])
+        self.assertEqual(await ProcessedFile.objects.acount(), 1)
+
+        response = await self.async_client.post(
+            f"/api/async/data_inference/{data['file_id']}/apply-types/",
+            {'column_types': {'age': 'Decimal'}}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        column = await ColumnMetadata.objects.aget(processed_file_id=data['file_id'], column_name='age')
+        self.assertEqual(column.applied_type, 'float64')
+
+    async def test_async_errors(self):
+        self.assertEqual((await self.async_client.post('/api/async/data_inference/upload_file/')).status_code, 400)
+        self.assertEqual((await self.async_client.get('/api/async/data_inference/upload_file/')).status_code, 405)
+        response = await self.async_client.post(
+            '/api/async/data_inference/999/apply-types/',
+            {'column_types': {'age': 'Decimal'}}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 404)
+
+        # Uploads beyond the pending limit are rejected before they are saved
+        with override_settings(INFERENCE_ASYNC_MAX_PENDING=0):
+            self.assertEqual((await self.async_upload()).status_code, 503)
+        self.assertEqual(await ProcessedFile.objects.acount(), 0)
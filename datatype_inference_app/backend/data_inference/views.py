@@ -1,96 +1,292 @@
 # data_inference/views.py
+import hashlib
+import json
 import os
-import pandas as pd
 from django.conf import settings
+from django.http import HttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.parsers import MultiPartParser, FormParser
 
-from .models import ProcessedFile, ColumnMetadata
-from .serializers import ProcessedFileSerializer, ColumnMetadataSerializer
-from .infer_data_type import InferenceEngine
+from . import metrics
+from .batch import BatchError, collect_files, process_batch
+from .models import ProcessedFile, InferenceJob
+from .serializers import InferenceJobSerializer
+from .excel import EXCEL_EXTENSIONS
+from .infer_data_type import ENGINE_VERSION, OUTPUT_FORMATS
+from .jobs import QueueFull, submit_job
+from .streaming import StreamingIngest
+from .services import append_rows, apply_column_types, create_engine, discard_upload, preview_rows, select_sheets, process_upload, result_cache, schema_cache, upload_path
 
 class DataInferenceViewSet(viewsets.ViewSet):
     """ViewSet for data processing operations."""
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.engine = InferenceEngine()
+        self.engine = create_engine()
+    
+    def timed(self, action_name, handler, request, *args, **kwargs):
+        """
+        Run an action under a request timer.
+
+        The stage timings of the request are added to the response as
+        'timings' when the include_timings parameter is 'true'.
+        """
+        include_timings = str(request.query_params.get(
+            'include_timings', request.data.get('include_timings', 'false'))).lower() == 'true'
+        
+        with metrics.collect_timings(include_timings) as timings, metrics.request(action_name):
+            response = handler(request, *args, **kwargs)
+        
+        if timings is not None and isinstance(response.data, dict):
+            response.data['timings'] = timings
+        return response
     
     # @action(detail=False, methods=['post'], url_path='upload')
     @action(detail=False, methods=['post'])
     def upload_file(self, request):
         """Upload and process a data file."""
-        
+        return self.timed('upload_file', self._upload_file, request)
+    
+    def _upload_file(self, request):
         if 'file' not in request.FILES:
             return Response({"error": "No file provided"}, status=status.HTTP_400_BAD_REQUEST)
         
         file_obj = request.FILES.get('file')
         apply_types = request.data.get('apply_inferred_types', 'false').lower() == 'true'
+        run_async = request.data.get('run_async', 'false').lower() == 'true'
+        optimize_memory = request.data.get('optimize_memory', 'false').lower() == 'true'
+        output_format = request.data.get('output_format', 'csv').lower()
+        if output_format not in OUTPUT_FORMATS:
+            return Response({"error": f"Unsupported output format: {output_format}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        all_sheets = request.data.get('all_sheets', 'false').lower() == 'true'
+        if all_sheets and run_async:
+            return Response({"error": "all_sheets cannot be combined with run_async"},
+                            status=status.HTTP_400_BAD_REQUEST)
         
-        # Save the uploaded file
-        upload_dir = os.path.join(settings.MEDIA_ROOT, 'uploads')
-        os.makedirs(upload_dir, exist_ok=True)
-        file_path = os.path.join(upload_dir, file_obj.name)
-        
-        with open(file_path, 'wb+') as destination:
-            for chunk in file_obj.chunks():
-                destination.write(chunk)
-        
+        # Save the uploaded file, under a path of its own since jobs read it later
+        file_path = upload_path(file_obj.name)
+        queued = False
         try:
-            # Process the file
-            df, info_dict = self.engine.process_file(file_path, apply_inferred_types=apply_types)
+            # CSV uploads handled in this request are parsed as they arrive, and profiled unless cached
+            ingest = None
+            if not run_async and file_obj.name.split('.')[-1].lower() == 'csv':
+                ingest = StreamingIngest(self.engine)
             
-            # Save processed file metadata
-            processed_file = ProcessedFile.objects.create(
-                file_name=file_obj.name,
-                original_file=f"uploads/{file_obj.name}",
-                file_size=file_obj.size,
-                row_count=info_dict['total_rows'],
-                column_count=info_dict['total_columns']
-            )
+            # Hash the content while it is written so repeated uploads can be served from cache
+            content_hash = hashlib.sha256()
+            with metrics.stage('receive_upload') as stage, open(file_path, 'wb+') as destination:
+                for chunk in file_obj.chunks():
+                    content_hash.update(chunk)
+                    destination.write(chunk)
+                    if ingest is not None:
+                        ingest.feed(chunk)
+                stage.bytes = file_obj.size
             
-            # Save the processed file
-            if apply_types:
-                processed_dir = os.path.join(settings.MEDIA_ROOT, 'processed')
-                os.makedirs(processed_dir, exist_ok=True)
-                processed_path = os.path.join(processed_dir, f"processed_{file_obj.name}")
-                df.to_csv(processed_path, index=False)
-                processed_file.processed_file = f"processed/processed_{file_obj.name}"
-                processed_file.save()
+            # Excel uploads are processed one worksheet at a time
+            sheets = [None]
+            if file_obj.name.split('.')[-1].lower() in EXCEL_EXTENSIONS:
+                try:
+                    sheets = select_sheets(file_path, request.data.get('sheet'), all_sheets)
+                except ValueError as e:
+                    return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
-            # Save column metadata
-            for col_info in info_dict['columns']:
-                ColumnMetadata.objects.create(
-                    processed_file=processed_file,
-                    column_name=col_info['name'],
-                    original_type=col_info['current_type'],
-                    inferred_type=col_info['inferred_type'],
-                    applied_type=col_info['inferred_type'] if apply_types else None,
-                    null_count=col_info['null_count'],
-                    unique_count=col_info['unique_count']
-                )
+            cache_keys = [(content_hash.hexdigest(), ENGINE_VERSION, apply_types, output_format, optimize_memory, sheet)
+                          for sheet in sheets]
+            cached_responses = [result_cache.get(cache_key) for cache_key in cache_keys]
+            if all(cached_response is not None for cached_response in cached_responses):
+                return Response(self.sheets_response(file_obj.name, cached_responses, all_sheets, cached=True),
+                                status=status.HTTP_200_OK)
             
-            # Prepare response data
-            response_data = {
-                'file_id': processed_file.id,
-                'file_name': processed_file.file_name,
-                'total_rows': info_dict['total_rows'],
-                'total_columns': info_dict['total_columns'],
-                'memory_usage_bytes': info_dict['memory_usage_bytes'],
-                'columns': info_dict['columns']
-            }
+            if run_async:
+                try:
+                    job = submit_job(
+                        file_path, file_obj.name, file_obj.size, apply_types, content_hash.hexdigest(),
+                        output_format, optimize_memory, sheets[0]
+                    )
+                except QueueFull as e:
+                    return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+                queued = True
+                return Response({'job_id': job.id, 'status': job.status}, status=status.HTTP_202_ACCEPTED)
             
-            return Response(response_data, status=status.HTTP_200_OK)
+            try:
+                parsed = ingest.close(file_path) if ingest is not None else None
+                responses = [
+                    process_upload(
+                        self.engine, file_path, file_obj.name, file_obj.size, apply_types, cache_key,
+                        output_format, optimize_memory, parsed, sheet, ingest.parser.dialect if parsed else None,
+                        ingest.profiler.state() if parsed else None
+                    )
+                    for sheet, cache_key in zip(sheets, cache_keys)
+                ]
+                return Response(self.sheets_response(file_obj.name, responses, all_sheets, cached=False),
+                                status=status.HTTP_200_OK)
+            
+            except Exception as e:
+                return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        finally:
+            # The job reads a queued upload, otherwise it is only kept for the processed files made from it
+            if not queued:
+                discard_upload(file_path)
+    
+    @action(detail=False, methods=['post'], url_path='upload-batch')
+    def upload_batch(self, request):
+        """Upload and process several data files, or zip archives of them, at once."""
+        return self.timed('upload_batch', self._upload_batch, request)
+    
+    def _upload_batch(self, request):
+        file_objs = request.FILES.getlist('files')
+        if not file_objs:
+            return Response({"error": "No files provided"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        apply_types = request.data.get('apply_inferred_types', 'false').lower() == 'true'
+        run_async = request.data.get('run_async', 'false').lower() == 'true'
+        optimize_memory = request.data.get('optimize_memory', 'false').lower() == 'true'
+        output_format = request.data.get('output_format', 'csv').lower()
+        if output_format not in OUTPUT_FORMATS:
+            return Response({"error": f"Unsupported output format: {output_format}"},
+                            status=status.HTTP_400_BAD_REQUEST)
         
+        try:
+            with metrics.stage('receive_upload') as stage:
+                files = collect_files(file_objs)
+                stage.bytes = sum(file['file_size'] for file in files)
+        except BatchError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if run_async:
+            jobs = []
+            for file in files:
+                try:
+                    job = submit_job(
+                        file['file_path'], file['file_name'], file['file_size'], apply_types,
+                        file['content_hash'], output_format, optimize_memory
+                    )
+                    jobs.append({'file_name': file['file_name'], 'job_id': job.id, 'status': job.status})
+                except QueueFull as e:
+                    discard_upload(file['file_path'])
+                    jobs.append({'file_name': file['file_name'], 'error': str(e)})
+            return Response({'files': jobs}, status=status.HTTP_202_ACCEPTED)
+        
+        try:
+            results = process_batch(self.engine, files, apply_types, output_format, optimize_memory,
+                                    settings.INFERENCE_BATCH_WORKERS)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        finally:
+            # Files served from cache or failed are not kept
+            for file in files:
+                discard_upload(file['file_path'])
+        return Response({
+            'files': results,
+            'total_files': len(results),
+            'failed_files': sum('error' in result for result in results),
+        }, status=status.HTTP_200_OK)
+    
+    @staticmethod
+    def sheets_response(file_name, responses, all_sheets, cached):
+        """Combine the responses of the processed sheets of an upload."""
+        if all_sheets:
+            return {'file_name': file_name, 'sheets': responses, 'cached': cached}
+        return {**responses[0], 'cached': cached}
+    
+    @action(detail=False, methods=['get'], url_path='metrics')
+    def prometheus_metrics(self, request):
+        """Expose the timing metrics in the Prometheus text format."""
+        return HttpResponse(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    
+    @action(detail=False, methods=['get'], url_path='cache-stats')
+    def cache_stats(self, request):
+        """Report hit and miss counters of the upload result cache and the schema cache."""
+        return Response({**result_cache.stats(), 'schema_cache': schema_cache.stats()}, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['get'], url_path=r'jobs/(?P<job_id>[0-9]+)')
+    def job_status(self, request, job_id=None):
+        """Report the status of an upload job and its result once done."""
+        try:
+            job = InferenceJob.objects.get(pk=job_id)
+        except InferenceJob.DoesNotExist:
+            return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response(InferenceJobSerializer(job).data, status=status.HTTP_200_OK)
+    
+    @action(detail=True, methods=['post'])
+    def append(self, request, pk=None):
+        """Fold new rows of a growing dataset into a processed file."""
+        return self.timed('append', self._append, request, pk)
+    
+    def _append(self, request, pk):
+        try:
+            processed_file = ProcessedFile.objects.get(pk=pk)
+        except ProcessedFile.DoesNotExist:
+            return Response({"error": "File not found"}, status=status.HTTP_404_NOT_FOUND)
+        
+        if 'file' not in request.FILES:
+            return Response({"error": "No file provided"}, status=status.HTTP_400_BAD_REQUEST)
+        file_obj = request.FILES.get('file')
+        
+        # The new rows are kept as the source of their snapshot segment
+        file_path = upload_path(file_obj.name, 'appends')
+        with metrics.stage('receive_upload') as stage, open(file_path, 'wb+') as destination:
+            for chunk in file_obj.chunks():
+                destination.write(chunk)
+            stage.bytes = file_obj.size
+        
+        try:
+            return Response(append_rows(self.engine, processed_file, file_path, file_obj.size),
+                            status=status.HTTP_200_OK)
+        except ValueError as e:
+            os.remove(file_path)
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            os.remove(file_path)
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=True, methods=['get'])
+    def preview(self, request, pk=None):
+        """Return a page of a processed file's rows, converted to their column types."""
+        return self.timed('preview', self._preview, request, pk)
+    
+    def _preview(self, request, pk):
+        try:
+            processed_file = ProcessedFile.objects.get(pk=pk)
+        except ProcessedFile.DoesNotExist:
+            return Response({"error": "File not found"}, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            page = int(request.query_params.get('page', 1))
+            page_size = int(request.query_params.get('page_size', settings.INFERENCE_PREVIEW_PAGE_SIZE))
+        except ValueError:
+            return Response({"error": "page and page_size must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        if page < 1 or not 1 <= page_size <= settings.INFERENCE_PREVIEW_MAX_PAGE_SIZE:
+            return Response({"error": f"page must be positive and page_size between 1 and "
+                                      f"{settings.INFERENCE_PREVIEW_MAX_PAGE_SIZE}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            rows, total_rows = preview_rows(self.engine, processed_file, page, page_size)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        return Response({
+            'file_id': processed_file.id,
+            'page': page,
+            'page_size': page_size,
+            'total_rows': total_rows,
+            'total_pages': -(-total_rows // page_size),
+            'columns': [str(column) for column in rows.columns],
+            'dtypes': {str(column): str(dtype) for column, dtype in rows.dtypes.items()},
+            # pandas renders nulls as null and dates in ISO format
+            'rows': json.loads(rows.to_json(orient='values', date_format='iso')),
+        }, status=status.HTTP_200_OK)
     
     @action(detail=True, methods=['post'], url_path='apply-types')
     def apply_types(self, request, pk=None):
         """Apply custom data types to a processed file."""
-        
+        return self.timed('apply_types', self._apply_types, request, pk)
+    
+    def _apply_types(self, request, pk):
         try:
             processed_file = ProcessedFile.objects.get(pk=pk)
         except ProcessedFile.DoesNotExist:
@@ -100,49 +296,14 @@ class DataInferenceViewSet(viewsets.ViewSet):
         if not column_types:
             return Response({"error": "No column types provided"}, status=status.HTTP_400_BAD_REQUEST)
         
+        output_format = request.data.get('output_format', processed_file.output_format).lower()
+        if output_format not in OUTPUT_FORMATS:
+            return Response({"error": f"Unsupported output format: {output_format}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
         try:
-            # Get the original file path
-            file_path = os.path.join(settings.MEDIA_ROOT, processed_file.original_file.name)
-            
-            # Read the file
-            df = self.engine.read_file(file_path)
-            
-            # Convert display type names to pandas dtype names
-            pandas_types = {}
-            for col, display_type in column_types.items():
-                pandas_type = self.engine.display_dtype_mapping.get(display_type)
-                if pandas_type:
-                    pandas_types[col] = pandas_type
-            
-            # Apply the types
-            converted_df = self.engine.convert_column_types(df, pandas_types)
-            
-            # Save the processed file
-            processed_dir = os.path.join(settings.MEDIA_ROOT, 'processed')
-            os.makedirs(processed_dir, exist_ok=True)
-            processed_path = os.path.join(processed_dir, f"processed_{processed_file.file_name}")
-            converted_df.to_csv(processed_path, index=False)
-            
-            # Update the database record
-            processed_file.processed_file = f"processed/processed_{processed_file.file_name}"
-            processed_file.save()
-            
-            # Update column metadata
-            for col, display_type in column_types.items():
-                pandas_type = self.engine.display_dtype_mapping.get(display_type)
-                try:
-                    col_meta = ColumnMetadata.objects.get(processed_file=processed_file, column_name=col)
-                    col_meta.applied_type = pandas_type
-                    col_meta.save()
-                except ColumnMetadata.DoesNotExist:
-                    pass
-            
-            # Return success response
-            return Response({
-                "message": "Types applied successfully",
-                "file_id": processed_file.id,
-                "processed_file_url": processed_file.processed_file.url
-            }, status=status.HTTP_200_OK)
+            response_data = apply_column_types(self.engine, processed_file, column_types, output_format)
+            return Response(response_data, status=status.HTTP_200_OK)
         
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
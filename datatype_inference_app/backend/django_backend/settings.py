@@ -139,4 +139,54 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
\ No newline at end of file
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Number of upload results kept in the in-process content-hash cache
+INFERENCE_RESULT_CACHE_SIZE = 128
+
+# Memory, in bytes, that the converted columns apply-types keeps for reuse may take
+INFERENCE_COLUMN_CACHE_BYTES = 256 * 1024 * 1024
+
+# Worker threads running background upload jobs, and the number of jobs
+# that may wait in the queue before new ones are rejected
+INFERENCE_JOB_WORKERS = 2
+INFERENCE_JOB_MAX_QUEUE = 100
+# Seconds between the heartbeats a process writes on the jobs it runs, and
+# after which a job without a heartbeat is failed, its process being gone
+INFERENCE_JOB_HEARTBEAT_SECONDS = 30
+INFERENCE_JOB_STALE_SECONDS = 120
+
+# Values per column that type detection samples, the strategy picking them
+# ('head', 'head_tail', 'reservoir' or 'stratified') and the size that columns
+# close to the match threshold may be resampled up to
+INFERENCE_SAMPLE_SIZE = 100
+INFERENCE_SAMPLER = 'stratified'
+INFERENCE_MAX_SAMPLE_SIZE = 10_000
+
+# Columns with more non-null values than this get their distinct values
+# estimated (None always counts exactly), with this relative standard error
+INFERENCE_EXACT_DISTINCT_MAX_ROWS = 1_000_000
+INFERENCE_DISTINCT_ERROR = 0.01
+
+# Record stage timings for the metrics endpoint. Timings requested with
+# include_timings are reported either way.
+INFERENCE_METRICS_ENABLED = True
+
+# Worker processes analyzing the files of a batch upload (None uses every
+# CPU), and the most files and uncompressed bytes a batch may hold
+INFERENCE_BATCH_WORKERS = None
+INFERENCE_BATCH_MAX_FILES = 100
+INFERENCE_BATCH_MAX_BYTES = 1024 * 1024 * 1024
+
+# Rows per page of the preview endpoint, by default and at most
+INFERENCE_PREVIEW_PAGE_SIZE = 50
+INFERENCE_PREVIEW_MAX_PAGE_SIZE = 1000
+
+# Number of schema fingerprints whose column types are remembered, so that
+# recurring feeds only confirm their types on a small sample
+INFERENCE_SCHEMA_CACHE_SIZE = 256
+
+# Worker threads running the pandas work of the async views, and the number
+# of requests that may wait for or run on them before new ones are rejected
+INFERENCE_ASYNC_WORKERS = 4
+INFERENCE_ASYNC_MAX_PENDING = 64
@@ -20,6 +20,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework.routers import DefaultRouter
 from data_inference.views import DataInferenceViewSet
+from data_inference import async_views
 
 from rest_framework import routers
 
@@ -28,7 +29,10 @@ router.register(r'data_inference', DataInferenceViewSet, basename='data_inferenc
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/', include(router.urls))
+    path('api/', include(router.urls)),
+    # Async views, served without blocking a worker when run under ASGI
+    path('api/async/data_inference/upload_file/', async_views.upload_file, name='async-upload-file'),
+    path('api/async/data_inference/<int:pk>/apply-types/', async_views.apply_types, name='async-apply-types'),
 ]
 
 if settings.DEBUG:
@@ -1,4 +1,6 @@
 # tests/test_inference.py
+import json
+import numpy as np
 import pandas as pd
 import os
 import sys
@@ -6,7 +8,14 @@ import logging
 
 # Add the parent directory to the path to import the module
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from unittest import mock
+
+from data_inference import excel, metrics, streaming
+from data_inference.cache import LRUCache
+from data_inference.detectors import Detector, DetectorRegistry, default_registry
 from data_inference.infer_data_type import InferenceEngine
+from data_inference.sampling import StratifiedSampler
+from data_inference.streaming import StreamingIngest, StreamingProfiler
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -70,5 +79,581 @@ def test_type_inference():
         if os.path.exists(test_file):
             os.remove(test_file)
 
+def test_vectorized_match_ratios():
+    """Test that whole-column detectors report a ratio for every candidate type."""
+    engine = InferenceEngine(sample_size=None)
+
+    ratios = engine.compute_match_ratios(pd.Series(['1', '2', ' 3 ', 'x', None] * 1000))
+    assert ratios['int64'] == 0.75
+    assert ratios['float64'] == 0.75
+    assert ratios['bool'] == 0.25
+
+    # Mixed object columns only count their string values
+    assert engine.check_if_integer(['10', 20, '-30', None])
+    assert engine.check_if_float(['1.5', '2e3', '-0.25'])
+    assert engine.check_if_boolean(['Yes', 'no', 'T', 'f'])
+    assert not engine.check_if_integer(['1.5', '2.5', '3'])
+
+    df = pd.DataFrame({
+        'flag': ['y', 'n'] * 500,
+        'count': [str(i) for i in range(1000)],
+        'price': [f"{i}.5" for i in range(1000)],
+    })
+    assert engine.infer_column_types(df) == {'flag': 'bool', 'count': 'int64', 'price': 'float64'}
+
+def test_date_format_inference():
+    """Test that a single date format is inferred and carried into conversion."""
+    engine = InferenceEngine(sample_size=None)
+
+    assert engine.infer_date_format(['2020-01-15', '2019-05-20', '2021-03-10']) == '%Y-%m-%d'
+    assert engine.infer_date_format(['15/01/2020', '20/05/2019', '10/03/2021']) == '%d/%m/%Y'
+    assert engine.infer_date_format(['Mar 5, 2020', 'Jan 12, 2021']) == '%b %d, %Y'
+    assert engine.infer_date_format(['apple', 'banana']) is None
+
+    df = pd.DataFrame({'when': ['2020-01-15 10:30:00', '2019-05-20 08:00:00', '2021-03-10 23:59:59',
+                                '2018-11-05 00:00:00', None, 'oops'] * 200})
+    inferred_types = engine.infer_column_types(df)
+    assert inferred_types == {'when': 'datetime64[ns]'}
+    assert engine.column_details['when']['date_format'] == '%Y-%m-%d %H:%M:%S'
+
+    converted = engine.convert_column_types(df, inferred_types, {'when': '%Y-%m-%d %H:%M:%S'})
+    assert str(converted['when'].dtype) == 'datetime64[ns]'
+    assert converted['when'].notna().sum() == 800
+
+def test_streaming_matches_in_memory_inference():
+    """Test that chunked profiling agrees with the in-memory result."""
+    test_data = {
+        'id': range(1000),
+        'flag': ['0', '1'] * 400 + ['2', '3'] * 99 + ['unknown', '3'],
+        'score': [str(i) for i in range(998)] + ['1.5', 'n/a'],
+        'hire_date': ['2020-01-15', '2019-05-20'] * 500,
+        'department': ['IT', 'HR', None, 'Finance'] * 250,
+    }
+    test_file = 'test_streaming.csv'
+    pd.DataFrame(test_data).to_csv(test_file, index=False)
+
+    engine = InferenceEngine()
+    try:
+        expected = engine.get_dataframe_info(engine.read_file(test_file))
+        result = StreamingProfiler(engine).profile_file(test_file, chunksize=100)
+
+        assert result['total_rows'] == expected['total_rows']
+        assert result['total_columns'] == expected['total_columns']
+        for streamed, full in zip(result['columns'], expected['columns']):
+            for key in ('name', 'current_type', 'null_count', 'unique_count', 'sample_values', 'date_format'):
+                assert streamed[key] == full[key], key
+
+        inferred = {col['name']: col['inferred_type'] for col in result['columns']}
+        # Late chunks holding other values count toward the same 80% rule as a full read
+        assert inferred == {col['name']: col['inferred_type'] for col in expected['columns']}
+        assert inferred == {'id': 'int64', 'flag': 'bool', 'score': 'float64',
+                            'hire_date': 'datetime64[ns]', 'department': 'category'}
+
+        # Text in the last chunk of a mostly integer column does not make it text
+        codes = pd.DataFrame({'code': [str(i) for i in range(2500)] + [f"x{i}" for i in range(500)]})
+        codes.to_csv(test_file, index=False)
+        assert engine.get_dataframe_info(engine.read_file(test_file))['columns'][0]['inferred_type'] == 'int64'
+        for chunksize in (100, 500, 1000, 3000):
+            assert StreamingProfiler(engine).profile_file(
+                test_file, chunksize=chunksize)['columns'][0]['inferred_type'] == 'int64', chunksize
+    finally:
+        if os.path.exists(test_file):
+            os.remove(test_file)
+
+def test_parallel_inference_matches_serial():
+    """Test that the process pool returns the serial result in column order."""
+    df = pd.DataFrame({
+        f"col_{i}": (['2020-01-15', '2019-05-20'] if i % 3 == 0 else [str(i), 'x'] if i % 3 == 1 else [10, None]) * 50
+        for i in range(12)
+    })
+    # Mixed object columns cannot go through Arrow and are pickled instead
+    df['mixed'] = ['a', 1] * 50
+    # Arrow would turn integers with None into int64 and hand back float64
+    df.insert(0, 'sparse_ints', pd.Series([10, None] * 50, dtype=object))
+
+    serial = InferenceEngine()
+    parallel = InferenceEngine(n_jobs=2, parallel_min_columns=4)
+
+    assert parallel.runs_in_parallel(df)
+    assert list(parallel.infer_column_types(df).items()) == list(serial.infer_column_types(df).items())
+    assert parallel.column_details == serial.column_details
+    assert parallel.get_dataframe_info(df) == serial.get_dataframe_info(df)
+
+def test_convert_path_updates_only_converted_columns():
+    """Test that refreshing converted columns matches a full re-profile."""
+    engine = InferenceEngine()
+    df = pd.DataFrame({
+        'id': range(100),
+        'age': [str(i % 60) for i in range(100)],
+        'hire_date': ['2020-01-15', 'not a date', '2019-05-20', '2021-03-10', '2018-11-05'] * 20,
+        'department': ['IT', 'HR', None, 'Finance'] * 25,
+    })
+
+    info_dict = engine.get_dataframe_info(df)
+    converted_columns = [col['name'] for col in info_dict['columns'] if col['inferred_type'] != col['current_type']]
+    assert converted_columns == ['age', 'hire_date', 'department']
+
+    inferred_types = {col['name']: col['inferred_type'] for col in info_dict['columns']}
+    converted = engine.convert_column_types(df, inferred_types)
+    updated = engine.update_dataframe_info(info_dict, converted, converted_columns)
+    expected = engine.get_dataframe_info(converted)
+
+    assert updated['memory_usage_bytes'] == expected['memory_usage_bytes']
+    for col_info, expected_info in zip(updated['columns'], expected['columns']):
+        for key in ('current_type', 'inferred_type', 'non_null_count', 'null_count', 'unique_count',
+                    'sample_values', 'memory_usage_bytes'):
+            assert col_info[key] == expected_info[key], (col_info['name'], key)
+    # Coercing the unparseable date shows up in the refreshed null count
+    assert updated['columns'][2]['null_count'] == 20
+
+def test_columnar_output_preserves_types():
+    """Test that Parquet and Feather output reloads with the converted dtypes."""
+    engine = InferenceEngine()
+    df = pd.DataFrame({
+        'count': pd.array([1, None, 3], dtype='Int64'),
+        'when': pd.to_datetime(['2020-01-15', None, '2021-03-10']),
+        'flag': pd.array([True, None, False], dtype='boolean'),
+        'department': pd.Categorical(['IT', 'HR', 'IT']),
+        'mixed': ['a', 1, None],
+    })
+
+    for output_format in ('parquet', 'feather'):
+        test_file = f"test_output.{output_format}"
+        try:
+            engine.write_file(df, test_file, output_format)
+            reloaded = engine.read_file(test_file)
+            for column in ('count', 'when', 'flag', 'department'):
+                assert reloaded[column].dtype == df[column].dtype, (output_format, column)
+            assert reloaded['mixed'].tolist() == ['a', '1', None]
+        finally:
+            if os.path.exists(test_file):
+                os.remove(test_file)
+
+def test_memory_optimization_downcasts_safely():
+    """Test that optimize_memory picks the smallest dtype that keeps every value."""
+    test_data = {
+        'small': range(100),
+        'negative': [-5, 5] * 50,
+        'with_nulls': ['1', None] * 50,
+        'codes': [str(i % 10) if i % 10 else 'x' for i in range(100)],
+        'price': ['1.5', '2.25'] * 50,
+        'whole_price': ['10.0', '20.0'] * 50,
+        'precise': ['1234567.891', '2.5'] * 50,
+        'flag': ['yes', 'no'] * 50,
+        'city': ['Perth', 'Sydney', 'Hobart', 'Darwin'] * 25,
+        'user': [f"user{i}" for i in range(100)],
+    }
+    test_file = 'test_memory.csv'
+    pd.DataFrame(test_data).to_csv(test_file, index=False)
+
+    engine = InferenceEngine()
+    try:
+        df, info_dict = engine.process_file(test_file, optimize_memory=True)
+    finally:
+        if os.path.exists(test_file):
+            os.remove(test_file)
+
+    assert df.dtypes.astype(str).to_dict() == {
+        'small': 'uint8', 'negative': 'int8', 'with_nulls': 'float32', 'codes': 'UInt8', 'price': 'float32', 'whole_price': 'float32',
+        'precise': 'float64', 'flag': 'boolean', 'city': 'category', 'user': 'object',
+    }
+    assert df['with_nulls'].isna().sum() == 50 and df['codes'].isna().sum() == 10
+
+    report = info_dict['memory_optimization']
+    assert report['bytes_after'] == info_dict['memory_usage_bytes']
+    assert report['bytes_saved'] == report['bytes_before'] - report['bytes_after'] > 0
+    assert sum(col['bytes_before'] - col['bytes_after'] for col in report['columns']) == report['bytes_saved']
+
+def test_streaming_ingest_matches_file_read():
+    """Test that parsing upload chunks as they arrive gives the same DataFrame as reading the file."""
+    test_data = {
+        'id': range(2000),
+        'note': ['say "hi"\nthen leave', None, 'plain', '2'] * 500,
+        'code': ['1', '0'] * 800 + ['5', 'x'] * 200,
+        'score': [1.5, None] * 1000,
+    }
+    test_file = 'test_ingest.csv'
+    pd.DataFrame(test_data).to_csv(test_file, index=False)
+
+    engine = InferenceEngine()
+    try:
+        with open(test_file, 'rb') as f:
+            content = f.read()
+        expected = engine.read_file(test_file)
+
+        ingest = StreamingIngest(engine, min_chunk_bytes=2000)
+        # Odd-sized pieces split records and quoted fields at arbitrary points
+        for start in range(0, len(content), 777):
+            ingest.feed(content[start:start + 777])
+        df, info_dict = ingest.close(test_file)
+    finally:
+        if os.path.exists(test_file):
+            os.remove(test_file)
+
+    assert len(ingest.chunks) > 1
+    pd.testing.assert_frame_equal(df, expected)
+    assert info_dict['memory_usage_bytes'] == int(expected.memory_usage(deep=True).sum())
+    assert [col['current_type'] for col in info_dict['columns']] == [str(dtype) for dtype in expected.dtypes]
+
+def test_streaming_ingest_keeps_text_of_mixed_columns():
+    """Test that codes parsed as numbers in one chunk keep their text when later chunks hold text."""
+    test_data = {
+        'code': ['02100', '0.50'] * 300 + ['A100', '00042'] * 300,
+        'count': range(1200),
+    }
+    test_file = 'test_ingest_codes.csv'
+    pd.DataFrame(test_data).to_csv(test_file, index=False)
+
+    engine = InferenceEngine()
+    try:
+        with open(test_file, 'rb') as f:
+            content = f.read()
+        expected = engine.read_file(test_file)
+
+        ingest = StreamingIngest(engine, min_chunk_bytes=2000)
+        for start in range(0, len(content), 1000):
+            ingest.feed(content[start:start + 1000])
+        # Without the saved file the text is gone, so the upload has to be read again
+        assert ingest.close() is None
+
+        ingest = StreamingIngest(engine, min_chunk_bytes=2000)
+        for start in range(0, len(content), 1000):
+            ingest.feed(content[start:start + 1000])
+        df, info_dict = ingest.close(test_file)
+    finally:
+        if os.path.exists(test_file):
+            os.remove(test_file)
+
+    assert ingest.chunks[0]['code'].dtype == 'float64' and ingest.chunks[-1]['code'].dtype == 'object'
+    assert df['code'].head(2).tolist() == ['02100', '0.50']
+    pd.testing.assert_frame_equal(df, expected)
+    code = info_dict['columns'][0]
+    assert code['sample_values'][:2] == ['02100', '0.50'] and code['unique_count'] == 4
+
+def test_sampling_escalates_near_threshold():
+    """Test that sampled inference sees the whole column and escalates borderline columns."""
+    df = pd.DataFrame({
+        'clean': [str(i) for i in range(20000)],
+        # Clean for the first rows, text for the rest of the file
+        'late': [str(i) for i in range(10000)] + ['n/a'] * 10000,
+        # 78% integers, just under the match threshold
+        'borderline': ([str(i) for i in range(39)] + ['x'] * 11) * 400,
+    })
+
+    head = InferenceEngine(sampler='head')
+    assert head.infer_column_types(df)['late'] == 'int64'
+
+    engine = InferenceEngine()
+    info = {col['name']: col for col in engine.get_dataframe_info(df)['columns']}
+    assert info['late']['inferred_type'] == 'object'
+    assert info['clean']['inferred_type'] == 'int64'
+    assert info['clean']['sample_size'] == 100 and info['clean']['confidence'] > 0.99
+    assert info['borderline']['inferred_type'] == 'category'
+    assert info['borderline']['sample_size'] == 10000 and info['borderline']['confidence'] > 0.99
+
+    for sampler in ('head_tail', 'reservoir'):
+        assert InferenceEngine(sampler=sampler).infer_column_types(df)['late'] == 'object'
+
+    # Sizes that do not split evenly over the blocks still sample distinct positions
+    stratified = StratifiedSampler()
+    for length, size in [(27, 25), (13, 12), (11, 10), (101, 99), (1003, 997), (20, 19)]:
+        positions = stratified.positions(length, size)
+        assert len(positions) == size and len(set(positions)) == size
+        assert positions.min() >= 0 and positions.max() < length and (np.diff(positions) > 0).all()
+    assert InferenceEngine(sample_size=25).infer_column_type(pd.Series([str(i) for i in range(27)])) == 'int64'
+
+def test_distinct_counts_are_estimated_for_long_columns():
+    """Test the HyperLogLog distinct counts used beyond the exact limit."""
+    df = pd.DataFrame({
+        'id': [f'user-{i}' for i in range(50000)],
+        'color': ['red', 'green', 'blue', 'grey'] * 12500,
+    })
+    test_file = 'test_distinct.csv'
+    df.to_csv(test_file, index=False)
+
+    engine = InferenceEngine(exact_distinct_max_rows=1000)
+    try:
+        info = {col['name']: col for col in engine.get_dataframe_info(df)['columns']}
+        streamed = {col['name']: col for col in
+                    StreamingProfiler(engine).profile_file(test_file, chunksize=5000)['columns']}
+    finally:
+        if os.path.exists(test_file):
+            os.remove(test_file)
+
+    for columns in (info, streamed):
+        assert not columns['id']['unique_count_exact']
+        assert abs(columns['id']['unique_count'] - 50000) < 50000 * 0.03
+        assert columns['id']['inferred_type'] == 'object'
+        assert columns['color']['unique_count'] == 4
+        assert columns['color']['inferred_type'] == 'category'
+    assert streamed['color']['unique_count_exact']
+    assert InferenceEngine().get_dataframe_info(df)['columns'][0]['unique_count'] == 50000
+
+def test_streaming_distinct_values_are_bounded():
+    """Test that chunked profiles stop keeping distinct values past a fixed cap."""
+    ids = pd.Series([f'user-{i}' for i in range(5000)])
+    profiler = StreamingProfiler(InferenceEngine(exact_distinct_max_rows=None))
+    with mock.patch.object(streaming, 'STREAMING_EXACT_DISTINCT_MAX_VALUES', 1000):
+        for start in range(0, len(ids), 500):
+            profiler.update(pd.DataFrame({'id': ids[start:start + 500]}))
+
+    profile = profiler.profiles['id']
+    assert not profile.unique_values and profile.distinct_sketch is not None
+    column = profiler.result()['columns'][0]
+    assert not column['unique_count_exact']
+    assert abs(column['unique_count'] - 5000) < 5000 * 0.03
+
+def test_timings_cover_stages_and_detectors():
+    """Test the stage and detector timings collected while processing a file."""
+    test_file = 'test_timings.csv'
+    pd.DataFrame({
+        'id': range(50),
+        'joined': ['2021-03-04'] * 50,
+        'team': ['red', 'blue'] * 25,
+    }).to_csv(test_file, index=False)
+
+    registry = metrics.registry
+    try:
+        with metrics.collect_timings() as timings:
+            InferenceEngine().process_file(test_file, convert_to_inferred_type=True)
+    finally:
+        if os.path.exists(test_file):
+            os.remove(test_file)
+
+    assert set(timings['stages']) == {'read_file', 'profile', 'convert'}
+    assert timings['stages']['read_file']['rows'] == 50
+    # Detectors run cheapest first; the date detectors are prefiltered out of text columns
+    assert set(timings['columns']['joined']) == {'match_ratios', 'bool', 'integer', 'float', 'categorical', 'date_format'}
+    assert set(timings['columns']['team']) == {'match_ratios', 'bool', 'integer', 'float', 'categorical'}
+    assert 'inference_detector_seconds_count{detector="date_format"}' in registry.render()
+
+    # Nothing is recorded while disabled and no timings are collected
+    registry.enabled = False
+    try:
+        registry.reset()
+        with metrics.stage('read_file') as stage:
+            stage.rows = 1
+        assert 'read_file' not in registry.render()
+    finally:
+        registry.enabled = True
+
+def test_excel_sheets_and_row_ranges():
+    """Test reading worksheets and row ranges with and without calamine."""
+    test_file = 'test_workbook.xlsx'
+    orders = pd.DataFrame({
+        'order_id': range(1, 201),
+        'amount': [f'{i}.5' for i in range(200)],
+        'shipped': ['2023-01-02'] * 200,
+    })
+    customers = pd.DataFrame({'name': ['Ann', 'Bo', None], 'active': ['yes', 'no', 'yes']})
+    with pd.ExcelWriter(test_file) as writer:
+        orders.to_excel(writer, sheet_name='orders', index=False)
+        customers.to_excel(writer, sheet_name='customers', index=False)
+
+    engine = InferenceEngine()
+    try:
+        for engine_name in ('calamine', None):
+            with mock.patch.object(excel, 'excel_engine', return_value=engine_name):
+                expected = pd.read_excel(test_file, sheet_name='orders')
+                pd.testing.assert_frame_equal(engine.read_file(test_file), expected)
+
+                subset = engine.read_file(test_file, 'orders', skip_rows=50, max_rows=10)
+                assert subset['order_id'].tolist() == list(range(51, 61))
+
+                workbook = engine.read_workbook(test_file)
+                assert list(workbook) == ['orders', 'customers']
+                pd.testing.assert_frame_equal(workbook['customers'], engine.read_file(test_file, 1))
+
+        results = engine.process_workbook(test_file)
+        assert {col['name']: col['inferred_type'] for col in results['customers'][1]['columns']} == {
+            'name': 'category', 'active': 'bool'}
+        assert results['orders'][1]['columns'][1]['inferred_type'] == 'float64'
+    finally:
+        if os.path.exists(test_file):
+            os.remove(test_file)
+
+def test_csv_dialects_are_sniffed():
+    """Test that delimiter, quoting, encoding and header are detected before a single parse."""
+    files = {
+        'test_semicolon.csv': 'id;price;city\n1;2.5;"Lyon; FR"\n2;3.0;Paris\n'.encode('utf-8'),
+        'test_tab.csv': b'id\tprice\tcity\n1\t2.5\tLyon\n2\t3.0\tParis\n',
+        'test_pipe.csv': b'id|price|city\n1|2.5|Lyon\n2|3.0|Paris\n',
+        'test_cp1252.csv': 'id,price,city\n1,2.5,Montr\xe9al\n2,3.0,Z\xfcrich\n'.encode('cp1252'),
+        'test_no_header.csv': b'1,2.5,Lyon\n2,3.0,Paris\n',
+    }
+    engine = InferenceEngine()
+    try:
+        for name, content in files.items():
+            with open(name, 'wb') as f:
+                f.write(content)
+            dialect = engine.sniff_dialect(name)
+            df = engine.read_file(name, dialect=dialect)
+            assert df.shape == (2, 3), name
+            assert str(df.iloc[:, 1].dtype) == 'float64', name
+
+            ingest = StreamingIngest(engine, min_chunk_bytes=32)
+            for start in range(0, len(content), 7):
+                ingest.feed(content[start:start + 7])
+            streamed, _ = ingest.close()
+            pd.testing.assert_frame_equal(streamed, df)
+            assert ingest.parser.dialect == dialect, name
+    finally:
+        for name in files:
+            if os.path.exists(name):
+                os.remove(name)
+
+    assert dialect['header'] is False and list(df.columns) == ['column_1', 'column_2', 'column_3']
+
+def test_conversion_counts_failures_and_leaves_input_unchanged():
+    """Test boolean and integer conversion to nullable dtypes and the failure counts."""
+    df = pd.DataFrame({
+        'flag': [' Yes', 'no', 'TRUE', None, 'maybe', 'f'],
+        'count': ['1', '2', 'x', None, '4', '2.5'],
+        'id': range(6),
+    })
+    engine = InferenceEngine()
+    converted = engine.convert_column_types(df, {'flag': 'bool', 'count': 'int64'})
+
+    assert str(converted['flag'].dtype) == 'boolean'
+    assert converted['flag'].tolist() == [True, False, True, pd.NA, pd.NA, False]
+    assert str(converted['count'].dtype) == 'Int64'
+    assert converted['count'].tolist() == [1, 2, pd.NA, pd.NA, 4, pd.NA]
+    assert engine.column_details['flag']['conversion_failures'] == 1
+    assert engine.column_details['count']['conversion_failures'] == 2
+
+    # Large IDs are cast from their digits without a detour through float64
+    ids = pd.DataFrame({'id': ['9007199254740993', '9223372036854775807', '99999999999999999999', None]})
+    converted_ids = engine.convert_column_types(ids, {'id': 'int64'})['id']
+    assert converted_ids.tolist() == [9007199254740993, 9223372036854775807, pd.NA, pd.NA]
+    assert engine.column_details['id']['conversion_failures'] == 1
+    all_ids = engine.convert_column_types(ids.head(2), {'id': 'int64'})['id']
+    assert all_ids.dtype == 'int64' and all_ids[0] == 9007199254740993
+
+    # The input keeps its values and unconverted columns share their data
+    assert df['flag'].dtype == 'object' and df['count'].tolist()[2] == 'x'
+    assert np.shares_memory(converted['id'].to_numpy(), df['id'].to_numpy())
+
+def test_profile_state_resumes_after_serialization():
+    """Test that a saved profile folds in later rows like an uninterrupted one."""
+    df = pd.DataFrame({
+        'id': range(3000),
+        'code': [f"c{i % 1500}" for i in range(3000)],
+        'amount': [str(i) for i in range(2999)] + ['1.5'],
+        'flag': ['yes', 'no'] * 1500,
+    })
+    engine = InferenceEngine()
+    full = StreamingProfiler(engine)
+    full.update(df.iloc[:2000])
+    full.update(df.iloc[2000:])
+
+    first = StreamingProfiler(engine)
+    first.update(df.iloc[:2000])
+    resumed = StreamingProfiler(engine)
+    resumed.load_state(json.loads(json.dumps(first.state())))
+    resumed.update(df.iloc[2000:])
+
+    expected, result = full.result(), resumed.result()
+    for streamed, whole in zip(result['columns'], expected['columns']):
+        for key in ('name', 'current_type', 'inferred_type', 'null_count', 'sample_values'):
+            assert streamed[key] == whole[key], key
+    # Distinct values beyond the exact limit are restored from a sketch
+    code = result['columns'][1]
+    assert not code['unique_count_exact'] and abs(code['unique_count'] - 1500) < 1500 * 0.03
+    assert result['columns'][3]['unique_count_exact'] and result['columns'][3]['unique_count'] == 2
+
+def test_schema_cache_reuses_and_rechecks_types():
+    """Test that recurring schemas reuse their types unless a sample contradicts them."""
+    def feed(hour, amounts):
+        return pd.DataFrame({
+            'when': [f"2024-01-{hour:02d} {i % 24:02d}:00" for i in range(200)],
+            'amount': amounts,
+            'team': ['red', 'blue'] * 100,
+        })
+
+    engine = InferenceEngine(schema_cache=LRUCache(4))
+    expected = engine.infer_column_types(feed(1, [str(i) for i in range(200)]))
+    assert expected == {'when': 'datetime64[ns]', 'amount': 'int64', 'team': 'category'}
+
+    with mock.patch.object(InferenceEngine, 'sample_column', side_effect=AssertionError):
+        assert engine.infer_column_types(feed(2, [str(i * 3) for i in range(200)])) == expected
+    assert engine.column_details['when'] == {'sample_size': 20, 'cached': True, 'date_format': '%Y-%m-%d %H:%M'}
+
+    # Same fingerprint, but the amounts turned into text after the first rows
+    changed = engine.infer_column_types(feed(3, ['1', '2', '3'] + [f"n/a {i % 5}" for i in range(197)]))
+    assert changed == {**expected, 'amount': 'category'}
+    assert 'cached' not in engine.column_details['amount'] and engine.column_details['team']['cached']
+    assert (engine.schema_cache.hits, engine.schema_cache.misses) == (2, 1)
+
+def test_cache_is_bounded_by_value_size():
+    """Test that a byte-bounded cache evicts by the size of its values."""
+    cache = LRUCache(max_entries=None, max_bytes=1000, sizeof=len)
+    cache.set('a', 'x' * 400)
+    cache.set('b', 'x' * 400)
+    cache.set('a', 'x' * 500)
+    assert cache.bytes == 900 and len(cache) == 2
+    cache.set('c', 'x' * 300)
+    assert cache.get('b') is None and cache.bytes == 800
+    # Values larger than the whole cache are not kept
+    cache.set('d', 'x' * 2000)
+    assert cache.get('d') is None and cache.bytes == 800
+    cache.discard_if(lambda key, value: key == 'a')
+    assert cache.bytes == 300 and cache.stats()['evictions'] == 1
+
+def test_registered_detectors_are_evaluated():
+    """Test that a third-party detector takes part in inference by priority."""
+    class PostcodeDetector(Detector):
+        name = 'postcode'
+        dtype = 'string'
+        cost = 3
+        priority = 35
+
+        def prefilter(self, context):
+            return context.stats['alpha_share'] >= context.threshold
+
+        def detect(self, context):
+            ratio = context.text.str.fullmatch(r'[A-Z]{1,2}\d[A-Z\d]? ?\d[A-Z]{2}').mean()
+            return {'ratio': ratio} if ratio >= context.threshold else None
+
+    df = pd.DataFrame({
+        'postcode': ['SW1A 1AA', 'EC1A 1BB', 'W1A 0AX', 'M1 1AE'] * 10,
+        'count': ['1', '2', '3', '4'] * 10,
+        'team': ['red', 'blue', 'green', 'grey'] * 10,
+    })
+    registry = DetectorRegistry(list(default_registry))
+    registry.register(PostcodeDetector())
+
+    inferred = InferenceEngine(detectors=registry).infer_column_types(df)
+    assert inferred == {'postcode': 'string', 'count': 'int64', 'team': 'category'}
+    # Chunked profiles are typed by the same detectors
+    profiler = StreamingProfiler(InferenceEngine(detectors=registry))
+    profiler.update(df.iloc[:20])
+    profiler.update(df.iloc[20:])
+    assert {col['name']: col['inferred_type'] for col in profiler.result()['columns']} == inferred
+    # The default registry is left untouched
+    assert InferenceEngine().infer_column_types(df)['postcode'] == 'category'
+
+    registry.unregister('categorical')
+    assert InferenceEngine(detectors=registry).infer_column_type(df['team']) == 'object'
+
 if __name__ == "__main__":
-    test_type_inference()
\ No newline at end of file
+    test_type_inference()
+    test_vectorized_match_ratios()
+    test_date_format_inference()
+    test_streaming_matches_in_memory_inference()
+    test_parallel_inference_matches_serial()
+    test_convert_path_updates_only_converted_columns()
+    test_columnar_output_preserves_types()
+    test_memory_optimization_downcasts_safely()
+    test_streaming_ingest_matches_file_read()
+    test_streaming_ingest_keeps_text_of_mixed_columns()
+    test_sampling_escalates_near_threshold()
+    test_distinct_counts_are_estimated_for_long_columns()
+    test_streaming_distinct_values_are_bounded()
+    test_timings_cover_stages_and_detectors()
+    test_excel_sheets_and_row_ranges()
+    test_csv_dialects_are_sniffed()
+    test_conversion_counts_failures_and_leaves_input_unchanged()
+    test_profile_state_resumes_after_serialization()
+    test_schema_cache_reuses_and_rechecks_types()
+    test_cache_is_bounded_by_value_size()
+    test_registered_detectors_are_evaluated()